@@ -0,0 +1,30 @@
+"""Adiciona content_hash em analysis_results
+
+Revision ID: 5e8a3c0b7f21
+Revises: 9c1f2a7d4e10
+Create Date: 2026-10-17 10:41:05.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a3c0b7f21'
+down_revision: Union[str, Sequence[str], None] = '9c1f2a7d4e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_results', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_analysis_results_content_hash'), 'analysis_results', ['content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_results_content_hash'), table_name='analysis_results')
+    op.drop_column('analysis_results', 'content_hash')
@@ -0,0 +1,40 @@
+"""Cria tabela analysis_jobs
+
+Revision ID: 9c1f2a7d4e10
+Revises: 43b4ae17028c
+Create Date: 2026-10-17 09:12:40.318202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1f2a7d4e10'
+down_revision: Union[str, Sequence[str], None] = '43b4ae17028c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('error', sa.String(length=1024), nullable=True),
+    sa.Column('result_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['result_id'], ['analysis_results.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_jobs_status'), 'analysis_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_jobs_status'), table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
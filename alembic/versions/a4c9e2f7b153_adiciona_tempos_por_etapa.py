@@ -0,0 +1,30 @@
+"""Adiciona os tempos por etapa do pipeline em analysis_results
+
+Revision ID: a4c9e2f7b153
+Revises: e7b25d1f6a08
+Create Date: 2026-10-17 18:02:11.304871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7b153'
+down_revision: Union[str, Sequence[str], None] = 'e7b25d1f6a08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        batch_op.drop_column('stage_timings')
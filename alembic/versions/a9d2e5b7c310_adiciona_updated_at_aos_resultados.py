@@ -0,0 +1,30 @@
+"""Adiciona updated_at a analysis_results
+
+Revision ID: a9d2e5b7c310
+Revises: f3a8c1e6d274
+Create Date: 2026-10-17 23:05:12.481930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d2e5b7c310'
+down_revision: Union[str, Sequence[str], None] = 'f3a8c1e6d274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_results', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_analysis_results_updated_at'), 'analysis_results', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_results_updated_at'), table_name='analysis_results')
+    op.drop_column('analysis_results', 'updated_at')
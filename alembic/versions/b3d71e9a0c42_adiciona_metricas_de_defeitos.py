@@ -0,0 +1,43 @@
+"""Adiciona métricas de defeitos em analysis_results
+
+Revision ID: b3d71e9a0c42
+Revises: 5e8a3c0b7f21
+Create Date: 2026-10-17 14:12:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d71e9a0c42'
+down_revision: Union[str, Sequence[str], None] = '5e8a3c0b7f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTEGER_COLUMNS = (
+    'degenerate_faces_count',
+    'duplicate_faces_count',
+    'non_manifold_edges_count',
+    'boundary_edges_count',
+    'shells_count',
+)
+FLOAT_COLUMNS = ('volume', 'bounding_box_x', 'bounding_box_y', 'bounding_box_z')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        for name in INTEGER_COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), nullable=True))
+        for name in FLOAT_COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        for name in reversed(INTEGER_COLUMNS + FLOAT_COLUMNS):
+            batch_op.drop_column(name)
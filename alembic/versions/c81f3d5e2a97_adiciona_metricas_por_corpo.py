@@ -0,0 +1,30 @@
+"""Adiciona as métricas por corpo em analysis_results
+
+Revision ID: c81f3d5e2a97
+Revises: a4c9e2f7b153
+Create Date: 2026-10-17 19:14:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f3d5e2a97'
+down_revision: Union[str, Sequence[str], None] = 'a4c9e2f7b153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        batch_op.add_column(sa.Column('bodies', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('analysis_results') as batch_op:
+        batch_op.drop_column('bodies')
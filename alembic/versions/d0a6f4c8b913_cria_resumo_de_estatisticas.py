@@ -0,0 +1,47 @@
+"""Cria o resumo materializado analysis_statistics
+
+Revision ID: d0a6f4c8b913
+Revises: b3d71e9a0c42
+Create Date: 2026-10-17 16:03:11.274530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0a6f4c8b913'
+down_revision: Union[str, Sequence[str], None] = 'b3d71e9a0c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_statistics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_analyses', sa.Integer(), nullable=False),
+    sa.Column('watertight_models', sa.Integer(), nullable=False),
+    sa.Column('models_with_inverted_faces', sa.Integer(), nullable=False),
+    sa.Column('clean_models_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Preenche o resumo com os contadores atuais, em uma única varredura de analysis_results.
+    op.execute(
+        "INSERT INTO analysis_statistics "
+        "(id, total_analyses, watertight_models, models_with_inverted_faces, clean_models_count, updated_at) "
+        "SELECT 1, COUNT(*), "
+        "COALESCE(SUM(CASE WHEN is_watertight THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN has_inverted_faces THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN is_watertight AND NOT has_inverted_faces THEN 1 ELSE 0 END), 0), "
+        "CURRENT_TIMESTAMP "
+        "FROM analysis_results"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('analysis_statistics')
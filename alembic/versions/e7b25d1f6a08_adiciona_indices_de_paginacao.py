@@ -0,0 +1,30 @@
+"""Adiciona índices compostos para a paginação por cursor
+
+Revision ID: e7b25d1f6a08
+Revises: d0a6f4c8b913
+Create Date: 2026-10-17 17:25:48.660913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b25d1f6a08'
+down_revision: Union[str, Sequence[str], None] = 'd0a6f4c8b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_analysis_results_timestamp_id', 'analysis_results', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_analysis_results_quality_timestamp', 'analysis_results', ['is_watertight', 'has_inverted_faces', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_results_quality_timestamp', table_name='analysis_results')
+    op.drop_index('ix_analysis_results_timestamp_id', table_name='analysis_results')
@@ -0,0 +1,40 @@
+"""Recalcula o resumo analysis_statistics
+
+Revision ID: f3a8c1e6d274
+Revises: c81f3d5e2a97
+Create Date: 2026-10-17 21:12:40.318227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c1e6d274'
+down_revision: Union[str, Sequence[str], None] = 'c81f3d5e2a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O resumo só é mantido com STATISTICS_SUMMARY ligado: bases que rodaram com a opção
+    # desligada têm contadores antigos. A aplicação também o recalcula ao subir com a opção ligada.
+    op.execute("DELETE FROM analysis_statistics WHERE id = 1")
+    op.execute(
+        "INSERT INTO analysis_statistics "
+        "(id, total_analyses, watertight_models, models_with_inverted_faces, clean_models_count, updated_at) "
+        "SELECT 1, COUNT(*), "
+        "COALESCE(SUM(CASE WHEN is_watertight THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN has_inverted_faces THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN is_watertight AND NOT has_inverted_faces THEN 1 ELSE 0 END), 0), "
+        "CURRENT_TIMESTAMP "
+        "FROM analysis_results"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
@@ -0,0 +1,45 @@
+# benchmarks/conftest.py
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from . import meshes
+
+# Tamanhos (faces) das icosferas. Na CI ficam os pequenos; localmente, por exemplo:
+# BENCHMARK_FACES=1000,20000,100000,1000000,5000000
+BENCHMARK_FACES: List[int] = [int(value) for value in os.getenv("BENCHMARK_FACES", "1000,20000,100000").split(",")]
+
+# Variante de defeito -> transformação aplicada à icosfera.
+DEFECTS: Dict[str, Callable] = {
+    "limpa": lambda mesh: mesh,
+    "furos": meshes.with_holes,
+    "invertidas": meshes.with_flipped_faces,
+}
+
+
+@pytest.fixture(scope="session")
+def mesh_file(tmp_path_factory) -> Callable[..., Tuple[str, bytes]]:
+    """
+    Fábrica de arquivos de malha gerados uma única vez por sessão, por (faces, defeito, formato, corpos).
+    Retorna o caminho do arquivo e o seu conteúdo.
+    """
+    directory: Path = tmp_path_factory.mktemp("malhas")
+    generated: Dict[tuple, Tuple[str, bytes]] = {}
+
+    def build(faces: int, defect: str = "limpa", fmt: str = "stl", bodies: int = 1) -> Tuple[str, bytes]:
+        key = (faces, defect, fmt, bodies)
+        if key not in generated:
+            if bodies > 1:
+                mesh = meshes.multi_body_scene(bodies, faces)
+            else:
+                mesh = DEFECTS[defect](meshes.icosphere(faces))
+            data = meshes.export(mesh, fmt)
+            path = directory / meshes.file_name(f"{defect}_{faces}_{bodies}", fmt)
+            path.write_bytes(data)
+            generated[key] = (str(path), data)
+        return generated[key]
+
+    return build
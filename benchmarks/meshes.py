@@ -0,0 +1,68 @@
+# benchmarks/meshes.py
+
+"""
+Geradores procedurais de malhas para os benchmarks: icosferas de tamanho controlado,
+variantes com defeitos (furos, faces invertidas), cenas com vários corpos e exportação
+nos formatos aceitos pela API.
+"""
+
+import math
+from typing import Union
+
+import numpy as np
+import trimesh
+
+# Formato do benchmark -> (file_type de exportação do trimesh, extensão do arquivo).
+FORMATS = {
+    "stl": ("stl", "stl"),
+    "stl_ascii": ("stl_ascii", "stl"),
+    "obj": ("obj", "obj"),
+    "glb": ("glb", "glb"),
+}
+
+
+def icosphere(target_faces: int) -> trimesh.Trimesh:
+    """
+    Icosfera com a quantidade de faces mais próxima de `target_faces` (20 * 4^n):
+    1k -> 1.280, 20k -> 20.480, 100k -> 81.920, 1M -> 1.310.720, 5M -> 5.242.880.
+    """
+    subdivisions = max(0, round(math.log(max(target_faces, 20) / 20, 4)))
+    return trimesh.creation.icosphere(subdivisions=subdivisions)
+
+
+def with_holes(mesh: trimesh.Trimesh, fraction: float = 0.01, seed: int = 0) -> trimesh.Trimesh:
+    """Remove uma fração das faces, abrindo furos (malha não estanque)."""
+    rng = np.random.default_rng(seed)
+    keep = np.ones(len(mesh.faces), dtype=bool)
+    keep[rng.choice(len(mesh.faces), size=max(1, int(len(mesh.faces) * fraction)), replace=False)] = False
+    return trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces[keep], process=False)
+
+
+def with_flipped_faces(mesh: trimesh.Trimesh, fraction: float = 0.01, seed: int = 0) -> trimesh.Trimesh:
+    """Inverte a orientação de uma fração das faces (orientação inconsistente)."""
+    rng = np.random.default_rng(seed)
+    faces = mesh.faces.copy()
+    flipped = rng.choice(len(faces), size=max(1, int(len(faces) * fraction)), replace=False)
+    faces[flipped] = faces[flipped][:, ::-1]
+    return trimesh.Trimesh(vertices=mesh.vertices, faces=faces, process=False)
+
+
+def multi_body_scene(bodies: int, target_faces: int) -> trimesh.Scene:
+    """Cena com `bodies` icosferas lado a lado, somando aproximadamente `target_faces` faces."""
+    scene = trimesh.Scene()
+    for index in range(bodies):
+        body = icosphere(target_faces // bodies)
+        body.apply_translation([3.0 * index, 0.0, 0.0])
+        scene.add_geometry(body, geom_name=f"corpo_{index}")
+    return scene
+
+
+def export(mesh: Union[trimesh.Trimesh, trimesh.Scene], fmt: str) -> bytes:
+    """Exporta a malha (ou cena) no formato do benchmark; ver `FORMATS`."""
+    file_type, _ = FORMATS[fmt]
+    data = mesh.export(file_type=file_type)
+    return data.encode() if isinstance(data, str) else data
+
+
+def file_name(label: str, fmt: str) -> str:
+    return f"{label}.{FORMATS[fmt][1]}"
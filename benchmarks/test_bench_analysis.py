@@ -0,0 +1,38 @@
+# benchmarks/test_bench_analysis.py
+
+import pytest
+
+from printqa.analysis import analyze_file
+
+from .conftest import BENCHMARK_FACES, DEFECTS
+
+pytestmark = [pytest.mark.slow, pytest.mark.benchmark(group="analysis")]
+
+
+@pytest.mark.parametrize("faces", BENCHMARK_FACES)
+def test_analyze_file_by_size(benchmark, mesh_file, faces: int):
+    path, _ = mesh_file(faces)
+    result = benchmark(analyze_file, path)
+    assert result["is_watertight"]
+
+
+@pytest.mark.parametrize("defect", list(DEFECTS))
+def test_analyze_file_by_defect(benchmark, mesh_file, defect: str):
+    path, _ = mesh_file(BENCHMARK_FACES[-1], defect)
+    result = benchmark(analyze_file, path)
+    assert result["is_watertight"] == (defect != "furos")
+    assert result["has_inverted_faces"] == (defect == "invertidas")
+
+
+@pytest.mark.parametrize("fmt", ["stl", "stl_ascii", "obj"])
+def test_analyze_file_by_format(benchmark, mesh_file, fmt: str):
+    path, _ = mesh_file(BENCHMARK_FACES[-1], fmt=fmt)
+    result = benchmark(analyze_file, path)
+    assert result["faces_count"] > 0
+
+
+@pytest.mark.parametrize("fmt", ["stl", "glb"])
+def test_analyze_file_multi_body(benchmark, mesh_file, fmt: str):
+    path, _ = mesh_file(BENCHMARK_FACES[-1], fmt=fmt, bodies=8)
+    result = benchmark(analyze_file, path)
+    assert result["shells_count"] == 8
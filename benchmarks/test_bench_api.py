@@ -0,0 +1,45 @@
+# benchmarks/test_bench_api.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from .conftest import BENCHMARK_FACES
+
+pytestmark = [pytest.mark.slow, pytest.mark.benchmark(group="api")]
+
+
+@pytest.fixture
+def api_client(client: TestClient, db_engine, setup_database) -> TestClient:
+    return client
+
+
+def _forget_results(client: TestClient, db_engine) -> None:
+    # Cada rodada deve analisar a malha de novo: sem o resultado no banco nem no cache.
+    client.app.state.result_cache.clear()
+    with db_engine.begin() as connection:
+        connection.execute(text("DELETE FROM analysis_results"))
+
+
+@pytest.mark.parametrize("faces", BENCHMARK_FACES)
+def test_upload_endpoint_cache_miss(benchmark, api_client: TestClient, db_engine, mesh_file, faces: int):
+    """Upload completo: recebimento, análise no pool de processos e gravação do resultado."""
+    _, data = mesh_file(faces)
+
+    def upload():
+        return api_client.post("/analyze_mesh/", files={"file": ("bench.stl", data, "model/stl")})
+
+    response = benchmark.pedantic(
+        upload, setup=lambda: _forget_results(api_client, db_engine), rounds=5, warmup_rounds=1
+    )
+    assert response.status_code == 200
+    assert response.json()["cache_hit"] is False
+
+
+def test_upload_endpoint_cache_hit(benchmark, api_client: TestClient, mesh_file):
+    """Upload de conteúdo já analisado: digest e resposta pelo cache, sem passar pelo pool."""
+    _, data = mesh_file(BENCHMARK_FACES[-1])
+    api_client.post("/analyze_mesh/", files={"file": ("bench.stl", data, "model/stl")})
+
+    response = benchmark(api_client.post, "/analyze_mesh/", files={"file": ("bench.stl", data, "model/stl")})
+    assert response.json()["cache_hit"] is True
@@ -0,0 +1,70 @@
+# benchmarks/test_bench_crud.py
+
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from printqa import crud, models, schemas
+from printqa.cache import content_digest
+
+pytestmark = [pytest.mark.slow, pytest.mark.benchmark(group="crud")]
+
+ROWS = 10_000
+_unique = itertools.count()
+
+
+def _analyses(count: int):
+    return [
+        schemas.AnalysisResultCreate(
+            file_name=f"bench_{index}.stl",
+            is_watertight=index % 3 != 0,
+            has_inverted_faces=index % 5 == 0,
+            faces_count=1280,
+            content_hash=content_digest(f"bench-{index}".encode()),
+        )
+        for index in (next(_unique) for _ in range(count))
+    ]
+
+
+@pytest.fixture
+def populated(db_session: Session) -> Session:
+    results = crud.create_analysis_results_bulk(db=db_session, analyses=_analyses(ROWS))
+    # Timestamps distintos, como numa base real, para a paginação por cursor.
+    start = datetime(2100, 1, 1)
+    for offset, result in enumerate(results):
+        result.timestamp = start + timedelta(seconds=offset)
+    db_session.commit()
+    return db_session
+
+
+def test_results_first_page(benchmark, populated: Session):
+    page, cursor = benchmark(crud.get_analysis_results_page, db=populated, limit=100)
+    assert len(page) == 100 and cursor is not None
+
+
+def test_results_deep_page_with_filters(benchmark, populated: Session):
+    _, cursor = crud.get_analysis_results_page(db=populated, limit=ROWS // 2, watertight_only=True)
+    page, _ = benchmark(
+        crud.get_analysis_results_page, db=populated, limit=100, cursor=cursor, watertight_only=True
+    )
+    assert all(result.is_watertight for result in page)
+
+
+def test_statistics_aggregate(benchmark, populated: Session):
+    statistics = benchmark(crud.get_analysis_statistics, db=populated)
+    assert statistics["total_analyses"] >= ROWS
+
+
+def test_lookup_by_hash(benchmark, populated: Session):
+    digest = populated.query(models.AnalysisResultDB.content_hash).first()[0]
+    assert benchmark(crud.get_analysis_result_by_hash, db=populated, content_hash=digest) is not None
+
+
+def test_bulk_insert(benchmark, db_session: Session):
+    results = benchmark.pedantic(
+        lambda analyses: crud.create_analysis_results_bulk(db=db_session, analyses=analyses),
+        setup=lambda: ((_analyses(500),), {}), rounds=10,
+    )
+    assert len(results) == 500
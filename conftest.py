@@ -79,6 +79,10 @@ def fixtures_path() -> Path:
 def cube_perfect_path(fixtures_path: Path) -> str:
     return str(fixtures_path / "cube_perfect.stl")
 
+@pytest.fixture
+def cube_path(fixtures_path: Path) -> str:
+    return str(fixtures_path / "cube.stl")
+
 @pytest.fixture
 def cube_open_path(fixtures_path: Path) -> str:
     return str(fixtures_path / "cubo_aberto.stl")
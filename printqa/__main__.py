@@ -0,0 +1,71 @@
+# printqa/__main__.py
+
+"""
+Comandos de manutenção do PrintQA.
+
+Uso:
+    python -m printqa reanalyze --directory /dados/malhas
+    python -m printqa reanalyze --store /var/cache/printqa/malhas --workers 8 --batch-size 500
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+
+def _reanalyze(args: argparse.Namespace) -> int:
+    from . import meshstore, reanalyze
+
+    if args.directory:
+        tasks = reanalyze.directory_tasks(args.directory)
+    else:
+        store_dir = args.store or meshstore.MESH_STORE_DIR
+        if not store_dir:
+            print("ERRO: informe --directory ou --store (ou defina MESH_STORE_DIR).", file=sys.stderr)
+            return 2
+        tasks = reanalyze.store_tasks(store_dir)
+
+    summary = reanalyze.run(
+        tasks,
+        store_dir=args.store or meshstore.MESH_STORE_DIR,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+    )
+    print(
+        f"{summary.processed} arquivos reanalisados em {summary.elapsed:.1f} s "
+        f"({summary.files_per_second:.1f} arquivos/s): {summary.updated} atualizados, "
+        f"{summary.missing} sem registro, {summary.failed} falhas, {summary.skipped} já concluídos."
+    )
+    return 1 if summary.failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .reanalyze import DEFAULT_BATCH_SIZE, DEFAULT_CHECKPOINT
+
+    parser = argparse.ArgumentParser(prog="printqa", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reanalyze = commands.add_parser(
+        "reanalyze", help="Reanalisa as malhas guardadas e atualiza os resultados gravados.",
+    )
+    source = reanalyze.add_mutually_exclusive_group()
+    source.add_argument("--directory", help="Diretório com os arquivos originais (percorrido recursivamente).")
+    source.add_argument("--store", help="Armazenamento de malhas (padrão: MESH_STORE_DIR).")
+    reanalyze.add_argument("--workers", type=int, default=None, help="Processos de análise (padrão: número de CPUs).")
+    reanalyze.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                           help="Resultados gravados por UPDATE em massa/commit.")
+    reanalyze.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                           help="Arquivo com as malhas já concluídas, para retomar a reanálise.")
+    reanalyze.add_argument("--restart", action="store_true", help="Ignora o checkpoint existente e recomeça.")
+    reanalyze.set_defaults(handler=_reanalyze)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
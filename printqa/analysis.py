@@ -1,45 +1,509 @@
 # printqa/analysis.py
 
 import trimesh
+import io
 import logging
+import mmap
 import os
 import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from . import meshstore
+from .timing import StageTimer
 
 logger = logging.getLogger(__name__)
 
-def analyze_file(file_path: str) -> dict:
+# Threads por análise para os corpos de uma cena (arquivos com várias peças).
+SCENE_THREADS = int(os.getenv("ANALYSIS_SCENE_THREADS", "4"))
+
+# Layout do STL binário: cabeçalho de 80 bytes, contagem uint32 e registros de 50 bytes por triângulo.
+STL_HEADER_SIZE = 84
+STL_TRIANGLE_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2"),
+])
+# Casas decimais da unificação de vértices: as mesmas do `merge_vertices` do trimesh (`tol.merge`).
+MERGE_DIGITS = trimesh.util.decimal_to_digits(trimesh.tol.merge)
+
+def is_binary_stl(buffer) -> bool:
+    """Verifica se o buffer tem o tamanho exato de um STL binário com a contagem declarada no cabeçalho."""
+    size = len(buffer)
+    if size < STL_HEADER_SIZE:
+        return False
+    count = int(np.frombuffer(buffer, dtype="<u4", count=1, offset=80)[0])
+    return size == STL_HEADER_SIZE + count * STL_TRIANGLE_DTYPE.itemsize
+
+def quantize_vertices(points: np.ndarray) -> np.ndarray:
+    """
+    Coordenadas arredondadas a `MERGE_DIGITS` casas, como inteiros int64: a chave com que o
+    trimesh unifica vértices. Pontos que diferem menos que `tol.merge` (ruído de CAD) têm a
+    mesma chave, e -0.0 e 0.0 também.
+    """
+    return np.round(points.astype(np.float64) * 10.0 ** MERGE_DIGITS).astype(np.int64)
+
+def load_binary_stl(buffer) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lê um STL binário direto do buffer (bytes, memoryview ou mmap) e retorna `(vertices, faces)`
+    com os vértices repetidos já unificados, sem construir um `trimesh.Trimesh`.
+
+    Os registros são interpretados com `np.frombuffer` sem cópia. Os vértices são unificados
+    como no carregamento do trimesh: pelas coordenadas arredondadas de `quantize_vertices`,
+    ordenadas com `np.lexsort`. Triângulos com coordenadas não finitas são descartados.
+    """
+    count = int(np.frombuffer(buffer, dtype="<u4", count=1, offset=80)[0])
+    triangles = np.frombuffer(buffer, dtype=STL_TRIANGLE_DTYPE, count=count, offset=STL_HEADER_SIZE)
+
+    corners = triangles["vertices"]
+    corners = corners[np.isfinite(corners).all(axis=(1, 2))].reshape(-1, 3)
+
+    keys = quantize_vertices(corners)
+    order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+    keys = keys[order]
+
+    is_new = np.empty(len(order), dtype=bool)
+    is_new[:1] = True
+    is_new[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.cumsum(is_new) - 1
+
+    vertices = corners[order[is_new]].astype(np.float64)
+    faces = inverse.reshape(-1, 3)
+    return vertices, faces
+
+def sorted_edge_keys(faces: np.ndarray, vertex_count: int) -> np.ndarray:
+    """
+    Monta as arestas orientadas das faces (a->b, b->c, c->a) e as ordena uma única vez.
+    Cada aresta vira uma chave int64 `(min(a, b) * vertex_count + max(a, b)) * 2 + (a < b)`:
+    os bits altos identificam a aresta não orientada e o bit menos significativo, o sentido.
+    Como tudo cabe em uma chave só, basta um `np.sort` de valores (sem argsort/lexsort),
+    e as ocorrências da mesma aresta ficam em posições consecutivas.
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    first = faces.ravel()
+    second = faces[:, [1, 2, 0]].ravel()
+    keys = (np.minimum(first, second) * vertex_count + np.maximum(first, second)) * 2 + (first < second)
+    keys.sort()
+    return keys
+
+def _group_edges(packed: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Agrupa as chaves ordenadas: retorna `(keys, starts, counts)` de cada aresta não orientada."""
+    keys = packed >> 1
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    return keys, starts, counts
+
+def _edge_checks(packed: np.ndarray, keys: np.ndarray, starts: np.ndarray, counts: np.ndarray, vertex_count: int) -> Tuple[bool, bool]:
+    return bool((counts == 2).all()), _is_winding_consistent(packed, keys, starts, counts, vertex_count)
+
+def _is_winding_consistent(packed: np.ndarray, keys: np.ndarray, starts: np.ndarray, counts: np.ndarray, vertex_count: int) -> bool:
+    # Sentidos opostos têm bits de sentido diferentes. Arestas degeneradas (a, a) não têm
+    # sentido e, como no trimesh, não contam como inconsistentes.
+    pairs = starts[counts == 2]
+    opposite = (packed[pairs] & 1) != (packed[pairs + 1] & 1)
+    degenerate = keys[pairs] % (vertex_count + 1) == 0
+    return bool((opposite | degenerate).all())
+
+def check_edges(faces: np.ndarray, vertex_count: int) -> Tuple[bool, bool]:
+    """
+    Calcula `(is_watertight, is_winding_consistent)` a partir do array de arestas ordenado,
+    sem construir grafos de adjacência nem os caches do trimesh (mesma semântica do trimesh):
+
+    - estanque: toda aresta é compartilhada por exatamente duas faces;
+    - orientação consistente: nas arestas compartilhadas por duas faces, os sentidos são opostos.
+    """
+    packed = sorted_edge_keys(faces, vertex_count)
+    if len(packed) == 0:
+        return False, False
+    return _edge_checks(packed, *_group_edges(packed), vertex_count)
+
+def _count_components(vertex_count: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Rotula os componentes conexos do grafo de vértices com arestas `(a, b)`, por union-find
+    vetorizado: cada rodada liga a raiz maior à menor e comprime os caminhos por pointer jumping.
+    Retorna, para cada vértice, o menor índice do seu componente.
+    """
+    labels = np.arange(vertex_count)
+    while len(a):
+        la, lb = labels[a], labels[b]
+        pending = la != lb
+        a, b, la, lb = a[pending], b[pending], la[pending], lb[pending]
+        if not len(a):
+            break
+        np.minimum.at(labels, np.maximum(la, lb), np.minimum(la, lb))
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+    return labels
+
+def _count_duplicate_faces(faces: np.ndarray) -> int:
+    """Conta as faces que repetem o conjunto de vértices de outra face (em qualquer ordem)."""
+    low = faces.min(axis=1)
+    high = faces.max(axis=1)
+    middle = faces.sum(axis=1) - low - high
+    rows = np.stack([low, middle, high], axis=1).astype(np.uint64)
+
+    # Um hash de 64 bits separa quase todas as faces com um sort de valores; só as colisões
+    # (as duplicatas e raros falsos positivos) passam pela comparação exata das linhas.
+    hashes = rows[:, 0] * np.uint64(0x9E3779B97F4A7C15) + rows[:, 1] * np.uint64(0xC2B2AE3D27D4EB4F) + rows[:, 2]
+    sorted_hashes = np.sort(hashes)
+    colliding = np.unique(sorted_hashes[1:][sorted_hashes[1:] == sorted_hashes[:-1]])
+    if len(colliding) == 0:
+        return 0
+    candidates = rows[np.isin(hashes, colliding)]
+    return len(candidates) - len(np.unique(candidates, axis=0))
+
+def mesh_metrics(vertices: np.ndarray, faces: np.ndarray, timer: Optional[StageTimer] = None) -> dict:
+    """
+    Calcula, em uma única passada vetorizada sobre os arrays de faces e arestas, as
+    verificações de estanqueidade/orientação e as métricas de defeitos para impressão.
+    O array de arestas ordenado é montado uma vez e reaproveitado por todas as métricas.
+    Com `timer`, registra o tempo das etapas `watertight`, `winding` e `metrics`.
+    """
+    return _mesh_metrics(vertices, faces, timer or StageTimer())[0]
+
+def _mesh_metrics(vertices: np.ndarray, faces: np.ndarray, timer: StageTimer) -> Tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Como `mesh_metrics`, retornando também os cantos da caixa delimitadora (mínimo e máximo).
+    Malhas grandes são divididas entre processos com `ANALYSIS_PARTITIONS` (ver `printqa.parallel`).
+    """
+    from . import parallel
+
+    if parallel.should_partition(len(faces)):
+        return parallel.partitioned_mesh_metrics(vertices, faces, timer)
+    with timer.stage("watertight"):
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64)
+        vertex_count = len(vertices)
+
+        packed = sorted_edge_keys(faces, vertex_count)
+        keys, starts, counts = _group_edges(packed)
+        is_watertight = bool((counts == 2).all())
+
+    with timer.stage("winding"):
+        is_winding_consistent = _is_winding_consistent(packed, keys, starts, counts, vertex_count)
+
+    with timer.stage("metrics"):
+        defects, lower, upper = _defect_metrics(vertices, faces, keys, starts, counts)
+        return {
+            "is_watertight": is_watertight,
+            "has_inverted_faces": not is_winding_consistent,
+            **defects,
+        }, lower, upper
+
+def _defect_metrics(
+    vertices: np.ndarray, faces: np.ndarray, keys: np.ndarray, starts: np.ndarray, counts: np.ndarray
+) -> Tuple[dict, np.ndarray, np.ndarray]:
+    used, lower, upper, scale = _vertex_bounds(vertices, faces)
+    degenerate_faces_count, volume = _face_geometry(vertices, faces, scale)
+    return _defect_summary(
+        degenerate_faces_count,
+        _count_duplicate_faces(faces),
+        int((counts > 2).sum()),
+        int((counts == 1).sum()),
+        _shells_count(len(vertices), keys[starts], used),
+        volume,
+        lower,
+        upper,
+    )
+
+def _vertex_bounds(vertices: np.ndarray, faces: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """Vértices usados pelas faces, cantos da caixa delimitadora e sua diagonal (escala da malha)."""
+    used = np.zeros(len(vertices), dtype=bool)
+    used[faces.ravel()] = True
+    points = vertices[used]
+    lower, upper = points.min(axis=0), points.max(axis=0)
+    return used, lower, upper, float(np.linalg.norm(upper - lower)) or 1.0
+
+def _shells_count(vertex_count: int, unique_keys: np.ndarray, used: np.ndarray) -> int:
+    """Componentes conexos entre os vértices usados, a partir das chaves das arestas não orientadas."""
+    labels = _count_components(vertex_count, unique_keys // vertex_count, unique_keys % vertex_count)
+    return int((labels == np.arange(vertex_count))[used].sum())
+
+def _face_geometry(vertices: np.ndarray, faces: np.ndarray, scale: float) -> Tuple[int, float]:
+    """
+    Faces degeneradas e volume com sinal. Ambos são somas sobre as faces, então podem ser
+    calculados por partes (partições das faces) e somados.
+    """
+    triangles = vertices[faces]
+    origin = triangles[:, 0]
+    u = triangles[:, 1] - origin
+    v = triangles[:, 2] - origin
+    normals = np.column_stack([
+        u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1],
+        u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2],
+        u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0],
+    ])
+    doubled_areas = np.sqrt(np.einsum("ij,ij->i", normals, normals))
+    # Volume com sinal pelo teorema da divergência: soma dos tetraedros (0, a, b, c), onde
+    # a · (b × c) = a · ((b - a) × (c - a)) reaproveita as normais já calculadas.
+    volume = float(np.einsum("ij,ij->", origin, normals) / 6.0)
+    return int((doubled_areas <= 1e-12 * scale * scale).sum()), volume
+
+def _defect_summary(
+    degenerate_faces_count: int,
+    duplicate_faces_count: int,
+    non_manifold_edges_count: int,
+    boundary_edges_count: int,
+    shells_count: int,
+    volume: float,
+    lower: np.ndarray,
+    upper: np.ndarray,
+) -> Tuple[dict, np.ndarray, np.ndarray]:
+    extents = upper - lower
+    return {
+        "degenerate_faces_count": degenerate_faces_count,
+        "duplicate_faces_count": duplicate_faces_count,
+        "non_manifold_edges_count": non_manifold_edges_count,
+        "boundary_edges_count": boundary_edges_count,
+        "shells_count": shells_count,
+        "volume": volume,
+        "bounding_box_x": float(extents[0]),
+        "bounding_box_y": float(extents[1]),
+        "bounding_box_z": float(extents[2]),
+    }, lower, upper
+
+def file_type_from_name(file_name: str) -> Optional[str]:
+    """Deduz o formato da malha (ex.: 'stl', 'obj') a partir da extensão do nome do arquivo."""
+    extension = os.path.splitext(file_name)[1].lower().lstrip('.')
+    return extension or None
+
+def analyze_file(file_path: str, file_name: Optional[str] = None, content_hash: Optional[str] = None) -> dict:
     """
     Carrega um modelo 3D, analisa suas propriedades e retorna um dicionário com os resultados.
+    O arquivo é mapeado em memória (mmap) e lido sem cópias intermediárias de I/O.
+    `file_name` é o nome exibido nas mensagens de erro (por padrão, o nome do arquivo em disco).
+
+    Com `content_hash` e o armazenamento de malhas ligado (`MESH_STORE_DIR`), uma malha já
+    interpretada é lida do armazenamento, sem passar pelo parser; as novas são gravadas nele.
+
+    STL binários grandes demais para o orçamento `ANALYSIS_MEMORY_BUDGET_MB` são analisados
+    em blocos, fora da memória (ver `printqa.outofcore`).
     """
+    from . import outofcore
+
     logger.info(f"Iniciando análise para o arquivo: {file_path}")
     start_time = time.monotonic()
+    display_name = file_name or os.path.basename(file_path)
+    timer = StageTimer()
+
+    stored = _load_stored(content_hash, timer)
+    if stored is not None:
+        return _analyze_parts(stored.bodies, display_name, stored.file_size, start_time, timer)
 
+    out_of_core = False
     try:
+        file_type = file_type_from_name(file_path)
         file_size = os.path.getsize(file_path)
-        mesh = trimesh.load_mesh(file_path, force='mesh')
+        if file_type == "stl" and outofcore.exceeds_memory_budget(file_size):
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                out_of_core = is_binary_stl(buffer)
+
+        if not out_of_core:
+            with timer.stage("parse"):
+                with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    mesh = _load_mesh(buffer, file_type)
     except Exception as e:
         logger.error(f"Falha ao carregar o arquivo '{file_path}': {e}")
-        raise ValueError(f"Falha ao carregar o arquivo: O arquivo '{os.path.basename(file_path)}' é inválido ou está vazio.")
+        raise ValueError(f"Falha ao carregar o arquivo: O arquivo '{display_name}' é inválido ou está vazio.")
+
+    if out_of_core:
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return outofcore.analyze_out_of_core(buffer, display_name, file_size, start_time, timer)
+
+    return _analyze_mesh(mesh, display_name, file_size, start_time, timer, content_hash)
+
+def analyze_stream(
+    file_obj: BinaryIO, file_type: Optional[str], file_name: str = "arquivo", content_hash: Optional[str] = None
+) -> dict:
+    """
+    Analisa uma malha lida de um objeto de arquivo (BytesIO, mmap, arquivo aberto), sem passar
+    por um caminho no disco. `file_type` indica o formato, já que não há extensão para consultar.
+    `content_hash` tem o mesmo papel que em `analyze_file`.
+    """
+    logger.info(f"Iniciando análise do stream: {file_name}")
+    start_time = time.monotonic()
+    timer = StageTimer()
+
+    stored = _load_stored(content_hash, timer)
+    if stored is not None:
+        return _analyze_parts(stored.bodies, file_name, stored.file_size, start_time, timer)
+
+    try:
+        with timer.stage("parse"):
+            file_obj.seek(0, os.SEEK_END)
+            file_size = file_obj.tell()
+            file_obj.seek(0)
+            mesh = _load_mesh(file_obj, file_type)
+    except Exception as e:
+        logger.error(f"Falha ao carregar o arquivo '{file_name}': {e}")
+        raise ValueError(f"Falha ao carregar o arquivo: O arquivo '{file_name}' é inválido ou está vazio.")
 
+    return _analyze_mesh(mesh, file_name, file_size, start_time, timer, content_hash)
+
+def analyze_bytes(
+    data: Union[bytes, bytearray, memoryview],
+    file_type: Optional[str],
+    file_name: str = "arquivo",
+    content_hash: Optional[str] = None,
+) -> dict:
+    """Analisa uma malha mantida em memória (bytes ou memoryview). Ver `analyze_stream`."""
+    return analyze_stream(io.BytesIO(data), file_type, file_name, content_hash)
+
+def analyze_stored(content_hash: str, file_name: Optional[str] = None, store_dir: Optional[str] = None) -> dict:
+    """
+    Reanalisa uma malha do armazenamento de malhas (`store_dir` ou `MESH_STORE_DIR`), sem o
+    arquivo original: os arrays são mapeados do disco e vão direto para as métricas.
+    """
+    start_time = time.monotonic()
+    timer = StageTimer()
+    store = meshstore.MeshStore(store_dir) if store_dir else meshstore.default_store()
+    with timer.stage("parse"):
+        stored = store.load(content_hash) if store is not None else None
+    if stored is None:
+        raise ValueError(f"A malha '{content_hash}' não está no armazenamento de malhas.")
+    display_name = file_name or stored.file_name or content_hash
+    return _analyze_parts(stored.bodies, display_name, stored.file_size, start_time, timer)
+
+def _load_stored(content_hash: Optional[str], timer: StageTimer) -> Optional[meshstore.StoredMesh]:
+    store = meshstore.default_store() if content_hash else None
+    if store is None:
+        return None
+    with timer.stage("parse"):
+        return store.load(content_hash)
+
+def _load_mesh(file_obj, file_type: Optional[str]):
+    """Carrega a malha, usando o leitor vetorizado para STL binário e o trimesh para os demais formatos."""
+    if file_type == "stl":
+        if isinstance(file_obj, mmap.mmap):
+            buffer = file_obj
+        elif isinstance(file_obj, io.BytesIO):
+            buffer = file_obj.getbuffer()
+        else:
+            buffer = file_obj.read()
+            file_obj.seek(0)
+
+        if is_binary_stl(buffer):
+            vertices, faces = load_binary_stl(buffer)
+            return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        del buffer
+
+    # Sem `force='mesh'`: arquivos com vários corpos (GLB, 3MF...) chegam como Scene e são
+    # analisados corpo a corpo, sem concatenar tudo em uma malha nova.
+    return trimesh.load(file_obj, file_type=file_type)
+
+def _analyze_mesh(
+    mesh, display_name: str, file_size: int, start_time: float, timer: StageTimer, content_hash: Optional[str] = None
+) -> dict:
     if isinstance(mesh, trimesh.Scene):
-        if not mesh.geometry:
-            raise ValueError("Cena 3D vazia, nenhum modelo para analisar.")
-        mesh = trimesh.util.concatenate(list(mesh.geometry.values()))
+        # Conteúdo que o trimesh não reconhece também chega como uma cena vazia.
+        parts = _scene_bodies(mesh) if mesh.geometry else []
+    elif hasattr(mesh, 'faces') and len(mesh.faces) > 0:
+        parts = [(None, mesh.vertices, mesh.faces)]
+    else:
+        parts = []
+    if not parts:
+        raise ValueError(f"O arquivo '{display_name}' não contém uma malha 3D válida.")
+
+    store = meshstore.default_store() if content_hash else None
+    if store is not None:
+        try:
+            store.save(content_hash, parts, file_size, display_name)
+        except OSError as e:
+            logger.error(f"Falha ao gravar '{display_name}' no armazenamento de malhas: {e}")
 
-    if not hasattr(mesh, 'faces') or len(mesh.faces) == 0:
-        raise ValueError(f"O arquivo '{os.path.basename(file_path)}' não contém uma malha 3D válida.")
+    return _analyze_parts(parts, display_name, file_size, start_time, timer)
+
+def _analyze_parts(
+    parts: List[Tuple[Optional[str], np.ndarray, np.ndarray]],
+    display_name: str,
+    file_size: int,
+    start_time: float,
+    timer: StageTimer,
+) -> dict:
+    """Analisa os corpos `(nome, vértices, faces)` de um arquivo; com mais de um, o resultado os detalha."""
+    bodies = None
+    if len(parts) > 1:
+        metrics, bodies = _analyze_bodies(parts, timer)
+    else:
+        _, vertices, faces = parts[0]
+        metrics, _, _ = _mesh_metrics(vertices, faces, timer)
+        metrics = {**metrics, "vertices_count": len(vertices), "faces_count": len(faces)}
 
-    has_inverted_faces = not bool(mesh.is_winding_consistent)
     end_time = time.monotonic()
     analysis_duration = int((end_time - start_time) * 1000)
 
-    logger.info(f"Análise de '{file_path}' concluída em {analysis_duration}ms.")
+    logger.info(f"Análise de '{display_name}' concluída em {analysis_duration}ms.")
 
     return {
-        "is_watertight": bool(mesh.is_watertight),
-        "has_inverted_faces": has_inverted_faces,
-        "vertices_count": len(mesh.vertices),
-        "faces_count": len(mesh.faces),
+        **metrics,
         "file_size": file_size,
         "analysis_duration": analysis_duration,
-    }
\ No newline at end of file
+        "stage_timings": timer.timings,
+        "bodies": bodies,
+    }
+
+def _scene_bodies(scene) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Corpos da cena, um por instância no grafo: `(nome do nó, vértices já posicionados, faces)`.
+    Só os vértices de instâncias com transformação são copiados; as faces nunca são.
+    Geometrias sem faces (curvas, nuvens de pontos) são ignoradas.
+    """
+    bodies = []
+    for node in scene.graph.nodes_geometry:
+        transform, geometry_name = scene.graph[node]
+        geometry = scene.geometry.get(geometry_name)
+        if geometry is None or not hasattr(geometry, 'faces') or len(geometry.faces) == 0:
+            continue
+        vertices = geometry.vertices
+        if not np.allclose(transform, np.eye(4)):
+            vertices = trimesh.transform_points(vertices, transform)
+        bodies.append((node, vertices, geometry.faces))
+    return bodies
+
+def _analyze_body(body: Tuple[str, np.ndarray, np.ndarray]) -> Tuple[dict, np.ndarray, np.ndarray, Dict[str, float]]:
+    name, vertices, faces = body
+    timer = StageTimer()
+    metrics, lower, upper = _mesh_metrics(vertices, faces, timer)
+    return {"name": name, **metrics, "vertices_count": len(vertices), "faces_count": len(faces)}, lower, upper, timer.timings
+
+def _analyze_bodies(bodies: List[Tuple[str, np.ndarray, np.ndarray]], timer: StageTimer) -> Tuple[dict, List[dict]]:
+    """
+    Analisa os corpos em paralelo (threads: as operações do numpy liberam o GIL) e combina os
+    resultados: a peça é estanque se todos os corpos forem, tem faces invertidas se algum tiver,
+    contagens e volumes são somados e a caixa delimitadora envolve todos os corpos.
+    Faces duplicadas entre corpos diferentes não são contadas.
+    """
+    workers = min(SCENE_THREADS, len(bodies))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_analyze_body, bodies))
+    else:
+        outcomes = [_analyze_body(body) for body in bodies]
+
+    results = [result for result, _, _, _ in outcomes]
+    extents = np.max([upper for _, _, upper, _ in outcomes], axis=0) - np.min([lower for _, lower, _, _ in outcomes], axis=0)
+    # Os tempos por etapa somam os corpos: com threads, podem passar do tempo de relógio da análise.
+    for _, _, _, timings in outcomes:
+        for stage, milliseconds in timings.items():
+            timer.add(stage, milliseconds / 1000)
+
+    summed = (
+        "degenerate_faces_count", "duplicate_faces_count", "non_manifold_edges_count", "boundary_edges_count",
+        "shells_count", "vertices_count", "faces_count",
+    )
+    metrics = {
+        "is_watertight": all(result["is_watertight"] for result in results),
+        "has_inverted_faces": any(result["has_inverted_faces"] for result in results),
+        **{key: sum(result[key] for result in results) for key in summed},
+        "volume": float(sum(result["volume"] for result in results)),
+        "bounding_box_x": float(extents[0]),
+        "bounding_box_y": float(extents[1]),
+        "bounding_box_z": float(extents[2]),
+    }
+    return metrics, results
@@ -0,0 +1,116 @@
+# printqa/batch.py
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import schemas
+from .cache import ResultCache
+from .database import run_db
+from .metrics import observe_stages
+from .profiling import ProfilingConfig
+from .uploads import StoredUpload, UploadTooLargeError
+from .validation import TooManyFacesError
+from .workers import AnalysisExecutor
+
+logger = logging.getLogger(__name__)
+
+
+async def analyze_batch(
+    uploads: List[StoredUpload],
+    db: Union[Session, AsyncSession],
+    executor: AnalysisExecutor,
+    result_cache: ResultCache,
+    profiling: Optional[ProfilingConfig] = None,
+) -> schemas.BatchAnalysisResult:
+    """
+    Analisa um lote de uploads em paralelo no pool de processos e persiste os resultados
+    novos com um único insert em massa.
+
+    Arquivos de conteúdo repetido (no lote ou já analisados antes) são analisados no
+    máximo uma vez. Falhas de um arquivo não interrompem o lote: o erro é informado no
+    item correspondente. No máximo `max_workers` análises do lote ocupam o pool ao mesmo
+    tempo, deixando a fila livre para as demais requisições. Arquivos recusados pela
+    pré-validação do cabeçalho nem chegam ao pool. Com `profiling`, cada análise roda sob
+    perfil (ver `printqa.profiling`).
+    """
+    start_time = time.monotonic()
+
+    unique: Dict[str, StoredUpload] = {}
+    for upload in uploads:
+        unique.setdefault(upload.content_hash, upload)
+
+    results: Dict[str, schemas.AnalysisResult] = {}
+    errors: Dict[str, str] = {}
+    pending: List[StoredUpload] = []
+    for digest, upload in unique.items():
+        try:
+            upload.precheck()
+        except (ValueError, UploadTooLargeError, TooManyFacesError) as e:
+            errors[digest] = str(e)
+            continue
+        cached = await run_db(db, result_cache.lookup, digest)
+        if cached is not None:
+            results[digest] = cached
+        else:
+            pending.append(upload)
+
+    slots = asyncio.Semaphore(executor.max_workers)
+
+    async def analyze(upload: StoredUpload) -> dict:
+        async with slots:
+            func, args = upload.analysis_call(profiling)
+            return await executor.run_when_available(func, *args)
+
+    outcomes = await asyncio.gather(*(analyze(upload) for upload in pending), return_exceptions=True)
+
+    analyses = []
+    for upload, outcome in zip(pending, outcomes):
+        if isinstance(outcome, ValueError):
+            errors[upload.content_hash] = str(outcome)
+        elif isinstance(outcome, Exception):
+            logger.error(f"Erro inesperado ao processar '{upload.file_name}' no lote: {outcome}", exc_info=outcome)
+            errors[upload.content_hash] = "Ocorreu um erro interno inesperado ao processar o arquivo."
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            outcome['file_name'] = upload.file_name
+            outcome['content_hash'] = upload.content_hash
+            outcome['stage_timings'] = {**upload.stage_timings, **outcome['stage_timings']}
+            analyses.append(schemas.AnalysisResultCreate(**outcome))
+
+    analysis_duration = sum(analysis.analysis_duration or 0 for analysis in analyses)
+    insert_start = time.perf_counter()
+    stored = await run_db(db, result_cache.store_many, analyses)
+    # O insert em massa é único: cada resultado do lote registra a duração do lote inteiro.
+    db_insert = round((time.perf_counter() - insert_start) * 1000, 3)
+    for result in stored:
+        stage_timings = {**(result.stage_timings or {}), "db_insert": db_insert}
+        observe_stages(stage_timings)
+        results[result.content_hash] = result.model_copy(update={"stage_timings": stage_timings})
+
+    items = []
+    seen = set()
+    for upload in uploads:
+        result = results.get(upload.content_hash)
+        if result is not None and upload.content_hash in seen:
+            result = result.model_copy(update={"cache_hit": True})
+        seen.add(upload.content_hash)
+        items.append(schemas.BatchAnalysisItem(
+            file_name=upload.file_name, result=result, error=errors.get(upload.content_hash)
+        ))
+
+    succeeded = sum(1 for item in items if item.result is not None)
+    return schemas.BatchAnalysisResult(
+        items=items,
+        total_files=len(items),
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+        cache_hits=sum(1 for item in items if item.result is not None and item.result.cache_hit),
+        analysis_duration=analysis_duration,
+        total_duration=int((time.monotonic() - start_time) * 1000),
+    )
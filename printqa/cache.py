@@ -0,0 +1,153 @@
+# printqa/cache.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+
+
+def content_digest(data: bytes) -> str:
+    """Calcula o digest SHA-256 (hex) usado como chave de conteúdo das análises."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache LRU em memória de resultados de análise, indexado pelo digest do conteúdo.
+
+    Fica à frente da consulta por `content_hash` no banco: um upload repetido é
+    respondido sem o trimesh e com uma só consulta pela chave primária, que confirma que
+    o registro não foi removido por outro processo. `maxsize=0` desativa o LRU,
+    mantendo apenas a consulta ao banco.
+
+    Registros reescritos por outro processo (a reanálise) são descartados do LRU: no
+    máximo a cada `sync_interval` segundos, `lookup` consulta os resultados com `updated_at`
+    posterior à última verificação. `sync_interval < 0` desativa a verificação.
+    """
+
+    def __init__(self, maxsize: int = 1024, sync_interval: float = 5.0):
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, schemas.AnalysisResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._synced_until = datetime.utcnow()
+        self._next_sync = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            maxsize=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+            sync_interval=float(os.getenv("RESULT_CACHE_SYNC_INTERVAL", "5")),
+        )
+
+    def get(self, digest: str) -> Optional[schemas.AnalysisResult]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+            return entry
+
+    def put(self, digest: str, result: schemas.AnalysisResult) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = result
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, digest: Optional[str]) -> None:
+        if digest:
+            with self._lock:
+                self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def sync(self, db: Session) -> None:
+        """Descarta do LRU os resultados atualizados no banco desde a última verificação."""
+        if self.maxsize <= 0 or self.sync_interval < 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            since = self._synced_until
+
+        updated = crud.get_results_updated_since(db, since)
+        with self._lock:
+            for digest, updated_at in updated:
+                self._entries.pop(digest, None)
+                self._synced_until = max(self._synced_until, updated_at)
+
+    def lookup(self, db: Session, digest: str) -> Optional[schemas.AnalysisResult]:
+        """
+        Procura um resultado já calculado para o digest: primeiro no LRU, depois no banco.
+        Retorna o resultado marcado com `cache_hit=True`, ou None se o conteúdo é inédito.
+        """
+        self.sync(db)
+        result = self.get(digest)
+        if result is not None and not crud.analysis_result_exists(db, result.id):
+            # Removido em outro worker do uvicorn: o DELETE só limpa o LRU do próprio processo.
+            self.invalidate(digest)
+            result = None
+        if result is None:
+            db_result = crud.get_analysis_result_by_hash(db=db, content_hash=digest)
+            if db_result is not None:
+                result = schemas.AnalysisResult.model_validate(db_result)
+                self.put(digest, result)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return result.model_copy(update={"cache_hit": True})
+
+    def store(self, db: Session, analysis: schemas.AnalysisResultCreate) -> schemas.AnalysisResult:
+        """
+        Persiste um novo resultado e o adiciona ao LRU. Se outro upload do mesmo conteúdo
+        foi salvo nesse meio tempo (violação do índice único), devolve o registro existente.
+        """
+        try:
+            db_result = crud.create_analysis_result(db=db, analysis=analysis)
+        except IntegrityError:
+            db.rollback()
+            existing = crud.get_analysis_result_by_hash(db=db, content_hash=analysis.content_hash)
+            if existing is None:
+                raise
+            return schemas.AnalysisResult.model_validate(existing).model_copy(update={"cache_hit": True})
+
+        result = schemas.AnalysisResult.model_validate(db_result)
+        if analysis.content_hash:
+            self.put(analysis.content_hash, result)
+        return result
+
+    def store_many(self, db: Session, analyses: List[schemas.AnalysisResultCreate]) -> List[schemas.AnalysisResult]:
+        """
+        Persiste um lote de resultados com um único insert em massa. Se algum conteúdo foi
+        salvo por outra requisição nesse meio tempo, o lote é refeito linha a linha por `store`.
+        """
+        try:
+            db_results = crud.create_analysis_results_bulk(db=db, analyses=analyses)
+        except IntegrityError:
+            db.rollback()
+            return [self.store(db, analysis) for analysis in analyses]
+
+        results = [schemas.AnalysisResult.model_validate(db_result) for db_result in db_results]
+        for result in results:
+            if result.content_hash:
+                self.put(result.content_hash, result)
+        return results
@@ -1,18 +1,71 @@
 # printqa/crud.py
 
+import base64
+import binascii
+import json
+import os
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, case, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from . import models, schemas
 
+# Com o resumo materializado ativo, as escritas em analysis_results atualizam os contadores de
+# analysis_statistics na mesma transação e as estatísticas são lidas de uma única linha. O resumo
+# é recalculado na subida da aplicação (`refresh_analysis_statistics`), pois fica desatualizado
+# enquanto a opção está desligada.
+STATISTICS_SUMMARY = os.getenv("STATISTICS_SUMMARY", "false").lower() in ("1", "true", "yes")
+STATISTICS_SUMMARY_ID = 1
+
 def create_analysis_result(db: Session, analysis: schemas.AnalysisResultCreate) -> models.AnalysisResultDB:
     db_analysis = models.AnalysisResultDB(**analysis.model_dump())
     
     db.add(db_analysis)
+    _record_statistics(db, added=[db_analysis])
     db.commit()
     db.refresh(db_analysis)
     
     return db_analysis
 
+def create_analysis_results_bulk(
+    db: Session, analyses: List[schemas.AnalysisResultCreate]
+) -> List[models.AnalysisResultDB]:
+    """
+    Insere vários resultados em uma única transação, com um só commit para o lote.
+
+    Quando todos os resultados têm `content_hash` distintos (o caso dos uploads), as linhas
+    vão em um único executemany, sem RETURNING, e são relidas com uma só consulta pelo
+    digest: o custo em round trips fica constante, independentemente do tamanho do lote.
+    Caso contrário, as linhas passam pelo flush do ORM para obter os ids gerados.
+    """
+    if not analyses:
+        return []
+
+    rows = [analysis.model_dump() for analysis in analyses]
+    hashes = [row['content_hash'] for row in rows]
+    if all(hashes) and len(set(hashes)) == len(hashes):
+        db.execute(insert(models.AnalysisResultDB), rows)
+        _record_statistics(db, added=analyses)
+        db.commit()
+        by_hash = {
+            db_analysis.content_hash: db_analysis
+            for db_analysis in db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.content_hash.in_(hashes))
+        }
+        return [by_hash[content_hash] for content_hash in hashes]
+
+    db_analyses = [models.AnalysisResultDB(**row) for row in rows]
+    db.add_all(db_analyses)
+    db.flush()
+    ids = [db_analysis.id for db_analysis in db_analyses]
+    _record_statistics(db, added=db_analyses)
+    db.commit()
+
+    # Recarrega os registros expirados pelo commit com uma só consulta, em vez de um refresh por linha.
+    db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.id.in_(ids)).all()
+    return db_analyses
+
 def get_analysis_result(db: Session, result_id: int) -> Optional[models.AnalysisResultDB]:
     return db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.id == result_id).first()
 
@@ -23,44 +76,164 @@ def get_analysis_result_by_filename(db: Session, file_name: str) -> Optional[mod
               .order_by(models.AnalysisResultDB.timestamp.desc(), models.AnalysisResultDB.id.desc())
               .first())
 
+def analysis_result_exists(db: Session, result_id: int) -> bool:
+    return db.query(models.AnalysisResultDB.id).filter(models.AnalysisResultDB.id == result_id).first() is not None
+
+def get_analysis_result_by_hash(db: Session, content_hash: str) -> Optional[models.AnalysisResultDB]:
+    return db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.content_hash == content_hash).first()
+
 def get_analysis_results(
     db: Session, 
     skip: int = 0, 
     limit: int = 100,
     watertight_only: Optional[bool] = None,
-    no_inverted_faces_only: Optional[bool] = None
+    no_inverted_faces_only: Optional[bool] = None,
+    cursor: Optional[str] = None
 ) -> List[models.AnalysisResultDB]:
-    query = db.query(models.AnalysisResultDB)
+    result = models.AnalysisResultDB
+    query = db.query(result)
     
     if watertight_only is not None:
-        query = query.filter(models.AnalysisResultDB.is_watertight == watertight_only)
+        query = query.filter(result.is_watertight == watertight_only)
     
     if no_inverted_faces_only is not None:
-        
-        query = query.filter(models.AnalysisResultDB.has_inverted_faces != no_inverted_faces_only)
+        # Igualdade (e não `!=`) para que o filtro use o índice (is_watertight, has_inverted_faces, timestamp).
+        query = query.filter(result.has_inverted_faces == (not no_inverted_faces_only))
+
+    if cursor is not None:
+        # Keyset: continua a partir da última linha da página anterior, sem descartar linhas com OFFSET.
+        timestamp, result_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            result.timestamp < timestamp,
+            and_(result.timestamp == timestamp, result.id < result_id)
+        ))
     
-    return query.order_by(models.AnalysisResultDB.timestamp.desc()).offset(skip).limit(limit).all()
+    return query.order_by(result.timestamp.desc(), result.id.desc()).offset(skip).limit(limit).all()
+
+def get_analysis_results_page(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    watertight_only: Optional[bool] = None,
+    no_inverted_faces_only: Optional[bool] = None
+) -> Tuple[List[models.AnalysisResultDB], Optional[str]]:
+    """
+    Retorna uma página de resultados, do mais recente ao mais antigo, e o cursor da próxima
+    página (None na última). A ordem (timestamp, id) é coberta pelos índices compostos, então
+    o custo de cada página independe da sua posição na listagem.
+    """
+    results = get_analysis_results(
+        db, limit=limit + 1, cursor=cursor,
+        watertight_only=watertight_only, no_inverted_faces_only=no_inverted_faces_only
+    )
+    if len(results) <= limit:
+        return results, None
+    return results[:limit], encode_cursor(results[limit - 1])
+
+def encode_cursor(result: models.AnalysisResultDB) -> str:
+    """Gera o cursor opaco que aponta para `result` na ordem (timestamp, id)."""
+    payload = json.dumps([result.timestamp.isoformat(), result.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica um cursor gerado por `encode_cursor`; levanta `ValueError` se ele for inválido."""
+    try:
+        timestamp, result_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(timestamp), int(result_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Cursor de paginação inválido.") from e
 
 def get_analysis_statistics(db: Session) -> dict:
-    total_count = db.query(models.AnalysisResultDB).count()
-    watertight_count = db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.is_watertight == True).count()
-    inverted_faces_count = db.query(models.AnalysisResultDB).filter(models.AnalysisResultDB.has_inverted_faces == True).count()
-    
+    if STATISTICS_SUMMARY:
+        summary = db.get(models.AnalysisStatisticsDB, STATISTICS_SUMMARY_ID)
+        if summary is None:
+            summary = refresh_analysis_statistics(db)
+        counts = (
+            summary.total_analyses, summary.watertight_models,
+            summary.models_with_inverted_faces, summary.clean_models_count
+        )
+    else:
+        counts = _aggregate_statistics(db)
+
+    total_count, watertight_count, inverted_faces_count, clean_count = counts
     return {
         'total_analyses': total_count,
         'watertight_models': watertight_count,
         'models_with_inverted_faces': inverted_faces_count,
         'watertight_percentage': (watertight_count / total_count * 100) if total_count > 0 else 0,
-        'clean_models_count': db.query(models.AnalysisResultDB).filter(
-            models.AnalysisResultDB.is_watertight == True,
-            models.AnalysisResultDB.has_inverted_faces == False
-        ).count()
+        'clean_models_count': clean_count
     }
 
+def refresh_analysis_statistics(db: Session) -> models.AnalysisStatisticsDB:
+    """
+    Recalcula o resumo materializado a partir de analysis_results (ex.: ao ativá-lo em uma base
+    existente). Se outro processo criar a linha ao mesmo tempo, o recálculo é refeito sobre ela.
+    """
+    for attempt in range(2):
+        total_count, watertight_count, inverted_faces_count, clean_count = _aggregate_statistics(db)
+        summary = db.get(models.AnalysisStatisticsDB, STATISTICS_SUMMARY_ID)
+        if summary is None:
+            summary = models.AnalysisStatisticsDB(id=STATISTICS_SUMMARY_ID)
+            db.add(summary)
+        summary.total_analyses = total_count
+        summary.watertight_models = watertight_count
+        summary.models_with_inverted_faces = inverted_faces_count
+        summary.clean_models_count = clean_count
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+            continue
+        db.refresh(summary)
+        return summary
+
+def _aggregate_statistics(db: Session) -> tuple:
+    """Calcula os quatro contadores em uma única varredura, com agregações condicionais."""
+    result = models.AnalysisResultDB
+    row = db.query(
+        func.count(result.id),
+        func.sum(case((result.is_watertight == True, 1), else_=0)),
+        func.sum(case((result.has_inverted_faces == True, 1), else_=0)),
+        func.sum(case(((result.is_watertight == True) & (result.has_inverted_faces == False), 1), else_=0)),
+    ).one()
+    return tuple(int(value or 0) for value in row)
+
+def _record_statistics(db: Session, added: Iterable = (), removed: Iterable = ()) -> None:
+    """
+    Aplica ao resumo materializado a entrada dos resultados `added` e a saída dos `removed`
+    (objetos com `is_watertight` e `has_inverted_faces`), com um único UPDATE relativo na
+    transação corrente. Se a linha de resumo ainda não existe, nada é feito: a próxima leitura
+    a cria a partir da tabela, sem que duas escritas concorrentes disputem a inserção.
+    """
+    if not STATISTICS_SUMMARY:
+        return
+
+    total = watertight = inverted = clean = 0
+    for sign, results in ((1, added), (-1, removed)):
+        for result in results:
+            total += sign
+            watertight += sign * bool(result.is_watertight)
+            inverted += sign * bool(result.has_inverted_faces)
+            clean += sign * bool(result.is_watertight and not result.has_inverted_faces)
+    if not (total or watertight or inverted or clean):
+        return
+
+    summary = models.AnalysisStatisticsDB
+    db.flush()
+    db.query(summary).filter(summary.id == STATISTICS_SUMMARY_ID).update({
+        summary.total_analyses: summary.total_analyses + total,
+        summary.watertight_models: summary.watertight_models + watertight,
+        summary.models_with_inverted_faces: summary.models_with_inverted_faces + inverted,
+        summary.clean_models_count: summary.clean_models_count + clean,
+    }, synchronize_session=False)
+
 def delete_analysis_result(db: Session, result_id: int) -> bool:
     result = db.query(models.AnalysisResultDB).get(result_id)
     if result:
         db.delete(result)
+        _record_statistics(db, removed=[result])
         db.commit()
         return True
     return False
@@ -68,10 +241,117 @@ def delete_analysis_result(db: Session, result_id: int) -> bool:
 def update_analysis_result(db: Session, result_id: int, **kwargs) -> Optional[models.AnalysisResultDB]:
     result = db.query(models.AnalysisResultDB).get(result_id)
     if result:
+        previous = models.AnalysisResultDB(
+            is_watertight=result.is_watertight, has_inverted_faces=result.has_inverted_faces
+        )
         for key, value in kwargs.items():
             if hasattr(result, key):
                 setattr(result, key, value)
+        _record_statistics(db, added=[result], removed=[previous])
         db.commit()
         db.refresh(result)
         return result
     return None
+
+def update_analysis_results_by_hash(db: Session, updates: Dict[str, dict]) -> int:
+    """
+    Atualiza em lote os resultados identificados pelo `content_hash` (chave de `updates`) com
+    os campos do valor correspondente. Os ids e os valores anteriores vêm de uma só consulta
+    e as linhas vão em um único UPDATE em massa por chave primária, com um só commit, em vez
+    de uma consulta e um commit por registro como em `update_analysis_result`.
+    Digests sem registro são ignorados. Retorna o número de registros atualizados.
+    O `updated_at` das linhas é renovado, o que muda o ETag/Last-Modified de `/results/{id}`
+    e faz os caches em memória descartarem os resultados antigos (`get_results_updated_since`).
+    """
+    if not updates:
+        return 0
+
+    result = models.AnalysisResultDB
+    previous = db.query(result.id, result.content_hash, result.is_watertight, result.has_inverted_faces).filter(
+        result.content_hash.in_(list(updates))
+    ).all()
+    if not previous:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [{**updates[row.content_hash], "id": row.id, "updated_at": now} for row in previous]
+    db.execute(update(result), rows)
+    _record_statistics(
+        db,
+        added=[
+            models.AnalysisResultDB(
+                is_watertight=values.get("is_watertight", row.is_watertight),
+                has_inverted_faces=values.get("has_inverted_faces", row.has_inverted_faces),
+            )
+            for row, values in zip(previous, rows)
+        ],
+        removed=previous,
+    )
+    db.commit()
+    return len(rows)
+
+def get_results_updated_since(db: Session, since: datetime) -> List[Tuple[str, datetime]]:
+    """(content_hash, updated_at) dos resultados atualizados depois de `since`, pelo índice de `updated_at`."""
+    result = models.AnalysisResultDB
+    rows = db.query(result.content_hash, result.updated_at).filter(
+        result.updated_at > since, result.content_hash.isnot(None)
+    ).all()
+    return [(row.content_hash, row.updated_at) for row in rows]
+
+def create_analysis_job(db: Session, file_name: str) -> models.AnalysisJobDB:
+    db_job = models.AnalysisJobDB(
+        id=uuid.uuid4().hex, file_name=file_name, status=schemas.JobStatus.QUEUED.value
+    )
+
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+
+    return db_job
+
+def get_analysis_job(db: Session, job_id: str) -> Optional[models.AnalysisJobDB]:
+    return db.query(models.AnalysisJobDB).filter(models.AnalysisJobDB.id == job_id).first()
+
+def update_analysis_job(
+    db: Session,
+    job_id: str,
+    status: schemas.JobStatus,
+    result_id: Optional[int] = None,
+    error: Optional[str] = None
+) -> Optional[models.AnalysisJobDB]:
+    job = get_analysis_job(db, job_id)
+    if job:
+        job.status = status.value
+        job.result_id = result_id
+        job.error = error[:1024] if error else None
+        db.commit()
+        db.refresh(job)
+        return job
+    return None
+
+def touch_analysis_jobs(db: Session, job_ids: List[str]) -> None:
+    """Renova o `updated_at` dos jobs em andamento neste processo (heartbeat), com um só UPDATE."""
+    if not job_ids:
+        return
+    job = models.AnalysisJobDB
+    db.execute(
+        update(job).where(job.id.in_(job_ids)).values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def fail_stale_analysis_jobs(db: Session, stale_before: datetime, error: str) -> int:
+    """
+    Marca como `failed` os jobs ainda `queued`/`running` sem heartbeat desde `stale_before`:
+    o processo que os executava morreu ou foi reiniciado. Retorna o número de jobs marcados.
+    """
+    job = models.AnalysisJobDB
+    unfinished = (schemas.JobStatus.QUEUED.value, schemas.JobStatus.RUNNING.value)
+    result = db.execute(
+        update(job)
+        .where(job.status.in_(unfinished), job.updated_at < stale_before)
+        .values(status=schemas.JobStatus.FAILED.value, error=error[:1024], updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
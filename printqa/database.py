@@ -1,20 +1,194 @@
 import os
 import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, Union
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
+from starlette.concurrency import run_in_threadpool
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL não está definida no ambiente.")
+logger = logging.getLogger(__name__)
 
-try:
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base = declarative_base()
-except Exception as e:
-    logging.getLogger(__name__).exception(f"Falha ao criar o engine do SQLAlchemy: {e}")
-    raise
+Base = declarative_base()
+
+
+class PoolMetrics:
+    """ Acumula o tempo de espera por conexões do pool, que o SQLAlchemy não expõe por eventos. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """ Mede quanto tempo cada checkout do pool aguardou por uma conexão livre. """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options_from_env(url: str, poolclass: type = InstrumentedQueuePool) -> dict:
+    """
+    Monta as opções do pool a partir do ambiente. `DB_POOL_PRE_PING` (padrão: ligado) e
+    `DB_POOL_RECYCLE` (padrão: 1800 s, abaixo do `wait_timeout` do MariaDB) evitam usar
+    conexões derrubadas pelo servidor. `DB_POOL_SIZE`, `DB_MAX_OVERFLOW` e `DB_POOL_TIMEOUT`
+    dimensionam o pool; sem eles, valem os padrões do SQLAlchemy.
+    """
+    options = {
+        'pool_pre_ping': _env_bool("DB_POOL_PRE_PING", True),
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
+    parsed = make_url(url)
+    # SQLite em memória usa um pool de conexão única, que não aceita as opções de dimensionamento.
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options['poolclass'] = poolclass
+    for env_name, option, cast in (
+        ("DB_POOL_SIZE", 'pool_size', int),
+        ("DB_MAX_OVERFLOW", 'max_overflow', int),
+        ("DB_POOL_TIMEOUT", 'pool_timeout', float),
+    ):
+        value = os.getenv(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+# Drivers assíncronos usados quando DATABASE_ASYNC está ativo e ASYNC_DATABASE_URL não foi informada.
+ASYNC_DRIVERS = {
+    "mysql": "asyncmy",
+    "mariadb": "asyncmy",
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Troca o driver síncrono da URL pelo equivalente assíncrono (ex.: mysql+mysqlconnector -> mysql+asyncmy)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Não há driver assíncrono configurado para o banco '{backend}'; defina ASYNC_DATABASE_URL.")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+class _Engines:
+    """
+    Engines e fábricas de sessão, criados no primeiro uso e não na importação do módulo:
+    importar a aplicação (ou um utilitário `python -m`) não exige DATABASE_URL nem abre o pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine: Optional[Engine] = None
+        self.session_factory: Optional[sessionmaker] = None
+        self.async_engine = None
+        self.async_session_factory: Optional[async_sessionmaker] = None
+
+    def get(self) -> "_Engines":
+        if self.engine is None:
+            with self._lock:
+                if self.engine is None:
+                    self._create()
+        return self
+
+    def _create(self) -> None:
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise ValueError("DATABASE_URL não está definida no ambiente.")
+
+        try:
+            engine = create_engine(database_url, **engine_options_from_env(database_url))
+            # Modo assíncrono: os endpoints `async def` usam AsyncSession; o engine síncrono continua
+            # atendendo os endpoints síncronos (threadpool), o Alembic e os scripts.
+            if _env_bool("DATABASE_ASYNC", False):
+                async_url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(database_url)
+                self.async_engine = create_async_engine(
+                    async_url, **engine_options_from_env(async_url, InstrumentedAsyncQueuePool)
+                )
+                self.async_session_factory = async_sessionmaker(self.async_engine, autoflush=False)
+        except Exception as e:
+            logger.exception(f"Falha ao criar o engine do SQLAlchemy: {e}")
+            raise
+
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.engine = engine
+
+
+_engines = _Engines()
+
+
+def get_engine() -> Engine:
+    """Engine síncrono, criado no primeiro uso a partir de DATABASE_URL."""
+    return _engines.get().engine
+
+def SessionLocal() -> Session:
+    """Abre uma sessão síncrona (fábrica criada no primeiro uso, como o engine)."""
+    return _engines.get().session_factory()
+
+def __getattr__(name: str) -> Any:
+    # Compatibilidade com `database.engine`, `database.async_engine` e `database.AsyncSessionLocal`.
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return _engines.get().async_engine
+    if name == "AsyncSessionLocal":
+        return _engines.get().async_session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 from . import models
@@ -26,3 +200,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_session() -> AsyncIterator[Union[Session, AsyncSession]]:
+    """Dependência dos endpoints assíncronos: AsyncSession com DATABASE_ASYNC, senão a sessão síncrona."""
+    async with session_scope() as db:
+        yield db
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[Union[Session, AsyncSession]]:
+    """Abre uma sessão do tipo configurado, para código assíncrono fora de uma requisição."""
+    engines = _engines.get()
+    if engines.async_session_factory is None:
+        with engines.session_factory() as db:
+            yield db
+    else:
+        async with engines.async_session_factory() as db:
+            yield db
+
+async def run_db(db: Union[Session, AsyncSession], func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Executa `func(session, *args)` — uma função do `crud` ou do cache — com a sessão recebida.
+    Com uma AsyncSession, o código síncrono roda pela ponte `run_sync` do SQLAlchemy: o I/O é
+    feito pelo driver assíncrono e o event loop fica livre enquanto o banco responde. Com uma
+    Session síncrona, a chamada vai para o threadpool, como nos endpoints síncronos do FastAPI.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args)
+    return await run_in_threadpool(func, db, *args)
+
+def pool_status() -> dict:
+    """Ocupação atual do pool (conexões em uso, ociosas e de overflow) e os tempos de espera acumulados."""
+    pool = get_engine().pool
+    status = {'pool_size': 0, 'checked_out': 0, 'checked_in': 0, 'overflow': 0}
+    if isinstance(pool, QueuePool):
+        status = {
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            # O contador interno começa negativo enquanto as conexões-base ainda não foram abertas.
+            'overflow': max(pool.overflow(), 0),
+        }
+    return {**status, **pool_metrics.snapshot()}
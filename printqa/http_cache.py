@@ -0,0 +1,61 @@
+# printqa/http_cache.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+# Resultados, listagens e estatísticas podem mudar (novas análises, reanálises, atualizações): o
+# cache deve revalidar (barato, via 304 com o ETag do conteúdo) a cada uso.
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def conditional_json_response(
+    request: Request,
+    payload: BaseModel,
+    cache_control: str,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """
+    Serializa `payload` e responde com ETag (digest do corpo), Last-Modified e Cache-Control.
+    Se o cliente já tem essa versão (If-None-Match, ou If-Modified-Since na ausência dele),
+    responde 304 sem corpo.
+    """
+    body = payload.model_dump_json().encode()
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        "Cache-Control": cache_control,
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified).replace(microsecond=0), usegmt=True)
+
+    if _is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparação fraca (RFC 9110): ignora o prefixo W/ que proxies acrescentam ao recomprimir.
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Os timestamps do banco são gravados em UTC sem fuso (`datetime.utcnow`).
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
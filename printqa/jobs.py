@@ -0,0 +1,198 @@
+# printqa/jobs.py
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Callable, Dict, Optional
+
+from . import crud, schemas
+from .database import run_db
+from .profiling import ProfilingConfig
+from .uploads import StoredUpload
+from .workers import AnalysisExecutor, AnalysisQueueFullError
+from .writer import ResultWriter
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {schemas.JobStatus.DONE.value, schemas.JobStatus.FAILED.value}
+
+# Jobs aceitos e ainda não concluídos por processo, cada um com seu upload guardado
+# (0: o mesmo limite do pool de análise, ANALYSIS_WORKERS + ANALYSIS_QUEUE_SIZE).
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "0"))
+# Intervalo (s) do heartbeat dos jobs em andamento e idade (s) a partir da qual um job
+# queued/running sem heartbeat é considerado órfão (o processo que o executava morreu).
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "15"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "60"))
+ORPHANED_JOB_ERROR = "O job foi interrompido: o processo que o executava foi encerrado."
+
+
+class JobRunner:
+    """
+    Executa em segundo plano as análises submetidas via `POST /jobs`.
+
+    O upload já está salvo em disco quando o job é iniciado; o runner
+    o envia ao pool de análise, persiste o resultado e atualiza o status do job
+    (queued -> running -> done/failed). No máximo `max_workers` jobs ocupam o
+    pool ao mesmo tempo; os demais aguardam no estado `queued`.
+
+    No máximo `max_pending` jobs ficam aceitos ao mesmo tempo: `reserve()` levanta
+    `AnalysisQueueFullError` acima disso, antes de o upload ser guardado.
+
+    Os jobs existem só como tarefas deste processo. Um heartbeat (`start_heartbeat`) renova
+    o `updated_at` dos jobs em andamento e marca como `failed` os jobs de qualquer processo
+    que ficaram sem heartbeat por `stale_after` segundos — inclusive os de uma execução
+    anterior da aplicação, já na subida.
+
+    As mudanças de status dos jobs deste processo também são avisadas em memória
+    (`status_changed`): o SSE acompanha esses jobs sem consultar o banco a cada intervalo.
+    """
+
+    def __init__(
+        self,
+        executor: AnalysisExecutor,
+        session_scope: Callable[[], AsyncContextManager],
+        result_writer: ResultWriter,
+        retry_interval: float = 0.5,
+        max_pending: Optional[int] = None,
+        heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL,
+        stale_after: float = JOB_STALE_AFTER,
+    ):
+        self._executor = executor
+        self._session_scope = session_scope
+        self._result_writer = result_writer
+        self._retry_interval = retry_interval
+        self.max_pending = max_pending or MAX_PENDING_JOBS or executor.max_workers + executor.queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._slots = asyncio.Semaphore(executor.max_workers)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._status_events: Dict[str, asyncio.Event] = {}
+        self._reserved = 0
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Jobs aceitos (ou com vaga reservada) e ainda não concluídos."""
+        return self._reserved
+
+    def reserve(self) -> None:
+        """
+        Reserva a vaga de um novo job, ou levanta `AnalysisQueueFullError` se não houver.
+        A vaga passa ao job em `start`; se o job não chegar a ser iniciado, chame `release`.
+        """
+        if self._reserved >= self.max_pending:
+            raise AnalysisQueueFullError(self._executor.retry_after)
+        self._reserved += 1
+
+    def release(self) -> None:
+        self._reserved -= 1
+
+    def start(self, job_id: str, upload: StoredUpload, profiling: Optional[ProfilingConfig] = None) -> None:
+        """
+        Agenda a execução do job no event loop corrente (sob perfil, com `profiling`), com a
+        vaga reservada por `reserve`, que é liberada ao fim do job.
+        """
+        task = asyncio.create_task(self._run(job_id, upload, profiling))
+        self._tasks[job_id] = task
+        self._status_events[job_id] = asyncio.Event()
+        task.add_done_callback(lambda _: self._finished(job_id))
+
+    def status_changed(self, job_id: str) -> Optional[asyncio.Event]:
+        """
+        Evento disparado na próxima mudança de status do job, se ele roda neste processo; None
+        se não roda (outro worker do uvicorn, ou já concluído), e o status só vem do banco.
+        Obtenha o evento antes de ler o status, para não perder uma mudança entre os dois.
+        """
+        return self._status_events.get(job_id)
+
+    def start_heartbeat(self) -> None:
+        """Inicia o heartbeat dos jobs em segundo plano; a primeira rodada marca os órfãos já existentes."""
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def shutdown(self) -> None:
+        """Cancela o heartbeat e os jobs ainda em andamento e aguarda seu encerramento."""
+        tasks = list(self._tasks.values())
+        if self._heartbeat is not None:
+            tasks.append(self._heartbeat)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def beat(self) -> int:
+        """
+        Uma rodada do heartbeat: renova os jobs deste processo e marca como `failed` os que
+        estão sem heartbeat há mais de `stale_after` segundos. Retorna os jobs marcados.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        async with self._session_scope() as db:
+            await run_db(db, crud.touch_analysis_jobs, list(self._tasks))
+            failed = await run_db(db, crud.fail_stale_analysis_jobs, stale_before, ORPHANED_JOB_ERROR)
+        if failed:
+            logger.warning(f"{failed} job(s) órfão(s) marcado(s) como 'failed'.")
+        return failed
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            try:
+                await self.beat()
+            except Exception as e:
+                logger.warning(f"Falha no heartbeat dos jobs: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _finished(self, job_id: str) -> None:
+        self._tasks.pop(job_id, None)
+        event = self._status_events.pop(job_id, None)
+        if event is not None:
+            event.set()
+        self.release()
+
+    def _notify(self, job_id: str) -> None:
+        event = self._status_events.get(job_id)
+        if event is not None:
+            self._status_events[job_id] = asyncio.Event()
+            event.set()
+
+    async def _run(self, job_id: str, upload: StoredUpload, profiling: Optional[ProfilingConfig]) -> None:
+        try:
+            async with self._slots:
+                await self._update(job_id, schemas.JobStatus.RUNNING)
+                analysis_data = await self._analyze(upload, profiling)
+                analysis_data['file_name'] = upload.file_name
+                analysis_data['content_hash'] = upload.content_hash
+                analysis_data['stage_timings'] = {**upload.stage_timings, **analysis_data['stage_timings']}
+
+                async with self._session_scope() as db:
+                    db_result = await self._result_writer.store(
+                        db, schemas.AnalysisResultCreate(**analysis_data)
+                    )
+                    await run_db(db, crud.update_analysis_job, job_id, schemas.JobStatus.DONE, db_result.id)
+
+        except asyncio.CancelledError:
+            await self._update(
+                job_id, schemas.JobStatus.FAILED,
+                error="O job foi interrompido pelo encerramento da aplicação."
+            )
+            raise
+
+        except ValueError as e:
+            await self._update(job_id, schemas.JobStatus.FAILED, error=str(e))
+
+        except Exception as e:
+            logger.exception(f"Erro inesperado ao processar o job '{job_id}': {e}")
+            await self._update(
+                job_id, schemas.JobStatus.FAILED,
+                error="Ocorreu um erro interno inesperado ao processar o arquivo."
+            )
+        finally:
+            upload.remove()
+
+    async def _analyze(self, upload: StoredUpload, profiling: Optional[ProfilingConfig]) -> dict:
+        # Jobs já foram aceitos: em vez de falhar com a fila cheia, aguardam uma vaga.
+        analyze, args = upload.analysis_call(profiling)
+        return await self._executor.run_when_available(analyze, *args, retry_interval=self._retry_interval)
+
+    async def _update(self, job_id: str, status: schemas.JobStatus, error: Optional[str] = None) -> None:
+        async with self._session_scope() as db:
+            await run_db(db, crud.update_analysis_job, job_id, status, None, error)
+        self._notify(job_id)
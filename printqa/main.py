@@ -1,22 +1,64 @@
 import os
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from . import crud, models, schemas, database
-from .analysis import analyze_file
+from . import crud, models, schemas, database, metrics
+from .batch import analyze_batch
+from .cache import ResultCache
+from .http_cache import REVALIDATE_CACHE_CONTROL, conditional_json_response
+from .jobs import JobRunner, TERMINAL_STATUSES
+from .profiling import PROFILE_HEADER, ProfilingConfig
+from .uploads import (
+    MAX_BATCH_FILES, MAX_UPLOAD_SIZE, StoredUpload, UploadTooLargeError, extract_zip_entries, is_zip_upload, save_upload
+)
+from .validation import TooManyFacesError
+from .workers import AnalysisExecutor, AnalysisQueueFullError, AnalysisWorkerLostError
+from .writer import ResultWriter
+
+# Limite do corpo da requisição, verificado pelo Content-Length antes do parsing do multipart.
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", str(MAX_UPLOAD_SIZE + 1024 * 1024)))
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "0.5"))
+JOB_EVENTS_KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
 
 # Gerenciador do Ciclo de Vida da Aplicação
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    app.state.analysis_executor = AnalysisExecutor.from_env()
+    if app.state.analysis_executor.prewarm:
+        app.state.analysis_executor.warm_up()
+    app.state.result_cache = ResultCache.from_env()
+    app.state.profiling = ProfilingConfig.from_env()
+    app.state.result_writer = ResultWriter.from_env(app.state.result_cache, database.SessionLocal)
+    app.state.job_runner = JobRunner(
+        app.state.analysis_executor, database.session_scope, app.state.result_writer
+    )
+    app.state.job_runner.start_heartbeat()
+    if crud.STATISTICS_SUMMARY:
+        # Escritas feitas com a opção desligada não atualizam o resumo: recalcula ao subir.
+        async with database.session_scope() as db:
+            await database.run_db(db, crud.refresh_analysis_statistics)
+    metrics.runtime_collector.bind(app.state.analysis_executor, app.state.result_cache, app.state.result_writer)
     yield
+    await app.state.job_runner.shutdown()
+    await app.state.result_writer.close()
+    app.state.analysis_executor.shutdown()
     print("INFO:     Aplicação encerrada.")
 
 
 logger = logging.getLogger(__name__)
 
+# Sessão dos endpoints assíncronos: AsyncSession com DATABASE_ASYNC, senão a sessão síncrona.
+DatabaseSession = Union[Session, AsyncSession]
+
 app = FastAPI(
     title="PrintQA Mesh Analysis API",
     description="API para análise de arquivos de malha 3D (.stl, .obj)",
@@ -33,34 +75,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": f"A requisição excede o tamanho máximo de {MAX_REQUEST_SIZE} bytes."}
+        )
+    return await call_next(request)
+
+def get_analysis_executor(request: Request) -> AnalysisExecutor:
+    """Dependência que fornece o pool de análise criado no `lifespan`."""
+    return request.app.state.analysis_executor
+
+def get_result_cache(request: Request) -> ResultCache:
+    """Dependência que fornece o cache de resultados criado no `lifespan`."""
+    return request.app.state.result_cache
+
+def get_result_writer(request: Request) -> ResultWriter:
+    """Dependência que fornece o writer de resultados criado no `lifespan`."""
+    return request.app.state.result_writer
+
+def get_job_runner(request: Request) -> JobRunner:
+    """Dependência que fornece o executor de jobs criado no `lifespan`."""
+    return request.app.state.job_runner
+
+def get_profiling(request: Request) -> Optional[ProfilingConfig]:
+    """Dependência que indica se a análise desta requisição roda sob perfil (ambiente ou cabeçalho)."""
+    return request.app.state.profiling.for_request(request.headers.get(PROFILE_HEADER))
+
 @app.post("/analyze_mesh/", response_model=schemas.AnalysisResult)
 async def analyze_mesh_and_save(
-    db: Session = Depends(database.get_db),
+    db: DatabaseSession = Depends(database.get_session),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    result_cache: ResultCache = Depends(get_result_cache),
+    result_writer: ResultWriter = Depends(get_result_writer),
+    profiling: Optional[ProfilingConfig] = Depends(get_profiling),
     file: UploadFile = File(...)
 ):
-    file_contents = await file.read()
-    if not file_contents:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="O arquivo enviado está vazio."
-        )
+    upload = None
+    try:
+        upload = await save_upload(file)
 
-    upload_dir = "temp_uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, file.filename)
+        # Conteúdo já analisado: responde com o resultado armazenado, sem reprocessar a malha.
+        cached = await database.run_db(db, result_cache.lookup, upload.content_hash)
+        if cached is not None:
+            return cached
 
-    try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_contents)
-        
-        analysis_data = analyze_file(file_path)
-        analysis_data['file_name'] = file.filename
+        analyze, args = upload.analysis_call(profiling)
+        analysis_data = await executor.run(analyze, *args)
+        analysis_data['file_name'] = upload.file_name
+        analysis_data['content_hash'] = upload.content_hash
+        analysis_data['stage_timings'] = {**upload.stage_timings, **analysis_data['stage_timings']}
         
         analysis_to_create = schemas.AnalysisResultCreate(**analysis_data)
-        db_result = crud.create_analysis_result(db=db, analysis=analysis_to_create)
-        
-        return db_result
+        return await result_writer.store(db, analysis_to_create)
         
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    except TooManyFacesError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=e.message)
+
+    except (AnalysisQueueFullError, AnalysisWorkerLostError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
@@ -71,5 +155,247 @@ async def analyze_mesh_and_save(
             detail="Ocorreu um erro interno inesperado ao processar o arquivo."
         )
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
\ No newline at end of file
+        if upload is not None:
+            upload.remove()
+
+@app.post("/analyze_batch/", response_model=schemas.BatchAnalysisResult)
+async def analyze_batch_and_save(
+    db: DatabaseSession = Depends(database.get_session),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    result_cache: ResultCache = Depends(get_result_cache),
+    profiling: Optional[ProfilingConfig] = Depends(get_profiling),
+    files: List[UploadFile] = File(...)
+):
+    """
+    Analisa vários arquivos de uma vez, enviados como múltiplos campos `files` ou como
+    um arquivo .zip. Retorna o resultado (ou o erro) de cada arquivo e os tempos do lote.
+    """
+    uploads = []
+    try:
+        for file in files:
+            try:
+                uploads.extend(await _save_batch_file(file))
+            except UploadTooLargeError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"'{file.filename}': {e}"
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"'{file.filename}': {e}")
+
+        if len(uploads) > MAX_BATCH_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"O lote excede o limite de {MAX_BATCH_FILES} arquivos."
+            )
+
+        return await analyze_batch(uploads, db, executor, result_cache, profiling)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.exception(f"Erro inesperado ao processar o lote: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ocorreu um erro interno inesperado ao processar o lote."
+        )
+    finally:
+        for upload in uploads:
+            upload.remove()
+
+async def _save_batch_file(file: UploadFile) -> List[StoredUpload]:
+    """
+    Salva um arquivo do lote; um .zip é expandido nas suas entradas e descartado.
+    A pré-validação fica para `analyze_batch`, que reporta a falha no item do arquivo.
+    """
+    upload = await save_upload(file, validate=False)
+    if not is_zip_upload(upload):
+        return [upload]
+    try:
+        return await run_in_threadpool(extract_zip_entries, upload)
+    finally:
+        upload.remove()
+
+@app.get("/results/", response_model=schemas.AnalysisResultPage)
+def list_analysis_results(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    watertight_only: Optional[bool] = None,
+    no_inverted_faces_only: Optional[bool] = None,
+    db: Session = Depends(database.get_db)
+):
+    """Lista os resultados do mais recente ao mais antigo; use `next_cursor` para a próxima página."""
+    try:
+        results, next_cursor = crud.get_analysis_results_page(
+            db, limit=limit, cursor=cursor,
+            watertight_only=watertight_only, no_inverted_faces_only=no_inverted_faces_only
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    page = schemas.AnalysisResultPage(
+        items=[schemas.AnalysisResult.model_validate(result) for result in results], next_cursor=next_cursor
+    )
+    # Sem Last-Modified: remover um item da página não muda a data mais recente dela, e um
+    # If-Modified-Since receberia 304 com a página antiga. A revalidação é só pelo ETag.
+    return conditional_json_response(request, page, REVALIDATE_CACHE_CONTROL)
+
+@app.get("/results/{result_id}", response_model=schemas.AnalysisResult)
+def get_analysis_result(result_id: int, request: Request, db: Session = Depends(database.get_db)):
+    db_result = crud.get_analysis_result(db=db, result_id=result_id)
+    if db_result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resultado não encontrado.")
+
+    result = schemas.AnalysisResult.model_validate(db_result)
+    return conditional_json_response(request, result, REVALIDATE_CACHE_CONTROL, result.updated_at or result.timestamp)
+
+@app.delete("/results/{result_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_analysis_result(
+    result_id: int,
+    db: Session = Depends(database.get_db),
+    result_cache: ResultCache = Depends(get_result_cache)
+):
+    db_result = crud.get_analysis_result(db=db, result_id=result_id)
+    if db_result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resultado não encontrado.")
+
+    # Sem isso, um novo upload do mesmo conteúdo seria respondido com o resultado removido.
+    result_cache.invalidate(db_result.content_hash)
+    crud.delete_analysis_result(db=db, result_id=result_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.get("/statistics/", response_model=schemas.AnalysisStatistics)
+def get_analysis_statistics(request: Request, db: Session = Depends(database.get_db)):
+    statistics = schemas.AnalysisStatistics(**crud.get_analysis_statistics(db=db))
+    return conditional_json_response(request, statistics, REVALIDATE_CACHE_CONTROL)
+
+@app.get("/health/db", response_model=schemas.PoolStatus)
+def get_database_pool_status():
+    """Ocupação do pool de conexões e tempo de espera acumulado, para dimensionar `DB_POOL_*`."""
+    return database.pool_status()
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Métricas no formato do Prometheus: tempos por etapa, fila do pool e acertos do cache."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+@app.post("/jobs", response_model=schemas.AnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job(
+    response: Response,
+    db: DatabaseSession = Depends(database.get_session),
+    runner: JobRunner = Depends(get_job_runner),
+    result_cache: ResultCache = Depends(get_result_cache),
+    profiling: Optional[ProfilingConfig] = Depends(get_profiling),
+    file: UploadFile = File(...)
+):
+    """
+    Registra um job de análise e retorna imediatamente, sem aguardar o processamento.
+    Com o limite de jobs pendentes atingido, responde 503 sem guardar o arquivo nem criar o
+    job; o corpo da requisição, porém, já foi recebido pelo FastAPI antes deste ponto.
+    """
+    try:
+        runner.reserve()
+    except AnalysisQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    upload = None
+    started = False
+    try:
+        upload = await save_upload(file)
+        job = await database.run_db(db, _create_job, upload.file_name)
+        response.headers["Location"] = f"/jobs/{job.id}"
+
+        cached = await database.run_db(db, result_cache.lookup, upload.content_hash)
+        if cached is not None:
+            return await database.run_db(db, _complete_job, job.id, cached.id)
+
+        runner.start(job.id, upload, profiling)
+        started = True
+        return job
+
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except TooManyFacesError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        # Sem o job em execução, o upload e a vaga reservada não têm mais dono.
+        if not started:
+            runner.release()
+            if upload is not None:
+                upload.remove()
+
+def _create_job(db: Session, file_name: str) -> schemas.AnalysisJob:
+    return schemas.AnalysisJob.model_validate(crud.create_analysis_job(db=db, file_name=file_name))
+
+def _complete_job(db: Session, job_id: str, result_id: int) -> schemas.AnalysisJob:
+    db_job = crud.update_analysis_job(db, job_id, schemas.JobStatus.DONE, result_id=result_id)
+    return schemas.AnalysisJob.model_validate(db_job)
+
+def _get_job(db: Session, job_id: str) -> Optional[schemas.AnalysisJob]:
+    db_job = crud.get_analysis_job(db=db, job_id=job_id)
+    return schemas.AnalysisJob.model_validate(db_job) if db_job is not None else None
+
+@app.get("/jobs/{job_id}", response_model=schemas.AnalysisJob)
+def get_analysis_job(job_id: str, db: Session = Depends(database.get_db)):
+    db_job = crud.get_analysis_job(db=db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado.")
+    return db_job
+
+@app.get("/jobs/{job_id}/events")
+def stream_analysis_job_events(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(database.get_db),
+    runner: JobRunner = Depends(get_job_runner)
+):
+    """Transmite as mudanças de status do job via Server-Sent Events até que ele termine."""
+    if crud.get_analysis_job(db=db, job_id=job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado.")
+
+    return StreamingResponse(
+        _job_events(job_id, request, runner),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _job_events(job_id: str, request: Request, runner: JobRunner):
+    last_status = None
+    idle = 0.0
+    while True:
+        changed = runner.status_changed(job_id)
+        # O status é lido do banco, pois o job pode estar rodando em outro worker do uvicorn.
+        async with database.session_scope() as db:
+            payload = await database.run_db(db, _get_job, job_id)
+        if payload is None:
+            return
+
+        if payload.status != last_status:
+            last_status = payload.status
+            idle = 0.0
+            yield f"event: status\ndata: {payload.model_dump_json()}\n\n"
+            if payload.status.value in TERMINAL_STATUSES:
+                return
+        elif idle >= JOB_EVENTS_KEEPALIVE:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+
+        if await request.is_disconnected():
+            return
+        waited_since = time.monotonic()
+        if changed is None:
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+        else:
+            # Job deste processo: a próxima leitura só acontece quando o status mudar.
+            try:
+                await asyncio.wait_for(changed.wait(), JOB_EVENTS_KEEPALIVE - idle)
+            except asyncio.TimeoutError:
+                pass
+        idle += time.monotonic() - waited_since
@@ -0,0 +1,140 @@
+# printqa/meshstore.py
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Diretório do armazenamento de malhas já interpretadas (vazio desliga o armazenamento).
+MESH_STORE_DIR = os.getenv("MESH_STORE_DIR") or None
+MESH_STORE_MAX_BYTES = int(float(os.getenv("MESH_STORE_MAX_MB", "10240")) * 1024 * 1024)
+
+META_FILE = "meta.json"
+
+# (nome do corpo, vértices, faces); o nome é None para arquivos com uma única malha.
+Body = Tuple[Optional[str], np.ndarray, np.ndarray]
+
+
+@dataclass
+class StoredMesh:
+    """Malha lida do armazenamento: corpos com vértices e faces mapeados do disco (somente leitura)."""
+    content_hash: str
+    file_name: Optional[str]
+    file_size: int
+    bodies: List[Body]
+
+
+class MeshStore:
+    """
+    Armazena as malhas já interpretadas (vértices deduplicados e faces de cada corpo) como
+    arquivos `.npy`, um diretório por digest do conteúdo. A leitura mapeia os arrays em
+    memória (`mmap_mode="r"`), sem cópia e sem interpretar o STL/OBJ original de novo.
+
+    O tamanho total fica limitado a `max_bytes`: ao gravar, as malhas usadas há mais tempo
+    são removidas (LRU, pela data de modificação do diretório, atualizada a cada leitura).
+    A malha mais recente é sempre mantida, mesmo que sozinha passe do limite.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = MESH_STORE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry(self, content_hash: str) -> str:
+        if not content_hash or os.sep in content_hash or content_hash.startswith("."):
+            raise ValueError(f"Digest inválido para o armazenamento de malhas: '{content_hash}'.")
+        return os.path.join(self.directory, content_hash)
+
+    def __contains__(self, content_hash: str) -> bool:
+        return os.path.exists(os.path.join(self._entry(content_hash), META_FILE))
+
+    def digests(self) -> List[str]:
+        """Digests armazenados, do menos ao mais recentemente usado."""
+        return [content_hash for content_hash, _, _ in self._entries()]
+
+    def load(self, content_hash: str) -> Optional[StoredMesh]:
+        """Lê a malha do digest, ou None se ela não está armazenada (ou foi removida no meio da leitura)."""
+        entry = self._entry(content_hash)
+        try:
+            with open(os.path.join(entry, META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+            bodies = [
+                (name, np.load(os.path.join(entry, f"{index}_vertices.npy"), mmap_mode="r"),
+                 np.load(os.path.join(entry, f"{index}_faces.npy"), mmap_mode="r"))
+                for index, name in enumerate(meta["bodies"])
+            ]
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Malha '{content_hash}' ilegível no armazenamento: {e}")
+            return None
+        return StoredMesh(content_hash, meta.get("file_name"), meta["file_size"], bodies)
+
+    def save(self, content_hash: str, bodies: List[Body], file_size: int, file_name: Optional[str] = None) -> None:
+        """
+        Grava a malha do digest (se ainda não está armazenada) e aplica o limite de tamanho.
+        A gravação é feita em um diretório temporário renomeado no final, então leitores
+        concorrentes (outros processos do pool) nunca veem uma malha pela metade.
+        """
+        entry = self._entry(content_hash)
+        if os.path.exists(entry):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".tmp_")
+        try:
+            for index, (_, vertices, faces) in enumerate(bodies):
+                np.save(os.path.join(staging, f"{index}_vertices.npy"), np.asarray(vertices, dtype=np.float64))
+                np.save(os.path.join(staging, f"{index}_faces.npy"), np.asarray(faces, dtype=np.int64))
+            with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+                json.dump({
+                    "file_name": file_name,
+                    "file_size": file_size,
+                    "bodies": [name for name, _, _ in bodies],
+                    "created_at": time.time(),
+                }, f)
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if os.path.exists(entry):  # gravada por outro processo ao mesmo tempo
+                return
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove as malhas usadas há mais tempo até o armazenamento respeitar `max_bytes`."""
+        entries = self._entries()
+        total_bytes = sum(size for _, _, size in entries)
+        while len(entries) > 1 and total_bytes > self.max_bytes:
+            content_hash, _, size = entries.pop(0)
+            shutil.rmtree(os.path.join(self.directory, content_hash), ignore_errors=True)
+            total_bytes -= size
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        try:
+            scanned = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        for entry in scanned:
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+                size = sum(item.stat().st_size for item in os.scandir(entry.path))
+            except FileNotFoundError:  # removida por outro processo do pool
+                continue
+            entries.append((entry.name, mtime, size))
+        return sorted(entries, key=lambda item: (item[1], item[0]))
+
+
+def default_store() -> Optional[MeshStore]:
+    """Armazenamento configurado por `MESH_STORE_DIR`, ou None se desligado."""
+    return MeshStore(MESH_STORE_DIR, MESH_STORE_MAX_BYTES) if MESH_STORE_DIR else None
@@ -0,0 +1,79 @@
+# printqa/metrics.py
+
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .timing import STAGES
+
+if TYPE_CHECKING:  # evita o ciclo de importação com o writer, que registra as métricas
+    from .cache import ResultCache
+    from .workers import AnalysisExecutor
+    from .writer import ResultWriter
+
+# Etapas vão de milissegundos (gravação de um upload pequeno) a minutos (malhas de milhões de faces).
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+ANALYSIS_STAGE_SECONDS = Histogram(
+    "printqa_analysis_stage_seconds",
+    "Tempo gasto em cada etapa do pipeline de análise.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+
+def observe_stages(stage_timings: Optional[Dict[str, float]]) -> None:
+    """Registra nos histogramas os tempos por etapa (ms) de uma análise."""
+    for stage, milliseconds in (stage_timings or {}).items():
+        if stage in STAGES:
+            ANALYSIS_STAGE_SECONDS.labels(stage=stage).observe(milliseconds / 1000)
+
+
+class RuntimeCollector:
+    """
+    Lê, a cada coleta, o estado do pool de análise, do cache e do writer da aplicação:
+    profundidade da fila, análises em execução, resultados aguardando gravação e acertos do cache.
+    """
+
+    def __init__(self):
+        self.executor: Optional["AnalysisExecutor"] = None
+        self.result_cache: Optional["ResultCache"] = None
+        self.result_writer: Optional["ResultWriter"] = None
+
+    def bind(self, executor: "AnalysisExecutor", result_cache: "ResultCache", result_writer: "ResultWriter") -> None:
+        self.executor = executor
+        self.result_cache = result_cache
+        self.result_writer = result_writer
+
+    def collect(self) -> Iterable:
+        if self.executor is not None:
+            yield GaugeMetricFamily(
+                "printqa_analysis_queue_depth", "Análises aguardando um processo livre no pool.",
+                value=self.executor.queued,
+            )
+            yield GaugeMetricFamily(
+                "printqa_analysis_in_flight", "Análises em execução no pool.", value=self.executor.in_flight
+            )
+        if self.result_writer is not None:
+            yield GaugeMetricFamily(
+                "printqa_result_writer_pending", "Resultados no buffer aguardando gravação.",
+                value=self.result_writer.pending,
+            )
+        if self.result_cache is not None:
+            hits, misses = self.result_cache.hits, self.result_cache.misses
+            yield CounterMetricFamily("printqa_result_cache_hits", "Uploads respondidos pelo cache.", value=hits)
+            yield CounterMetricFamily("printqa_result_cache_misses", "Uploads de conteúdo inédito.", value=misses)
+            yield GaugeMetricFamily(
+                "printqa_result_cache_hit_ratio", "Fração das consultas ao cache que foram acertos.",
+                value=hits / (hits + misses) if hits + misses else 0.0,
+            )
+
+
+runtime_collector = RuntimeCollector()
+REGISTRY.register(runtime_collector)
+
+
+def render() -> bytes:
+    """Serializa todas as métricas registradas no formato texto do Prometheus."""
+    return generate_latest(REGISTRY)
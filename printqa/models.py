@@ -1,5 +1,6 @@
 # printqa/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Index, JSON
+from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from .database import Base
@@ -7,17 +8,40 @@ from .database import Base
 class AnalysisResultDB(Base):
     """ Modelo para armazenar resultados de análise de arquivos 3D. """
     __tablename__ = "analysis_results"
+    __table_args__ = (
+        # Cobrem a ordenação (timestamp, id) da paginação por cursor, com e sem os filtros de qualidade.
+        Index("ix_analysis_results_timestamp_id", "timestamp", "id"),
+        Index("ix_analysis_results_quality_timestamp", "is_watertight", "has_inverted_faces", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String(255), index=True, nullable=False)
     is_watertight = Column(Boolean, nullable=False)
     has_inverted_faces = Column(Boolean, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Última reanálise do registro (nulo se nunca foi atualizado): entra no Last-Modified/ETag
+    # e avisa os caches em memória das instâncias da API de que o resultado mudou.
+    updated_at = Column(DateTime, onupdate=datetime.utcnow, nullable=True, index=True)
     
     file_size = Column(Integer, nullable=True)
     vertices_count = Column(Integer, nullable=True)
     faces_count = Column(Integer, nullable=True)
     analysis_duration = Column(Integer, nullable=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=True)
+
+    degenerate_faces_count = Column(Integer, nullable=True)
+    duplicate_faces_count = Column(Integer, nullable=True)
+    non_manifold_edges_count = Column(Integer, nullable=True)
+    boundary_edges_count = Column(Integer, nullable=True)
+    shells_count = Column(Integer, nullable=True)
+    volume = Column(Float, nullable=True)
+    bounding_box_x = Column(Float, nullable=True)
+    bounding_box_y = Column(Float, nullable=True)
+    bounding_box_z = Column(Float, nullable=True)
+    # Tempo (ms) de cada etapa do pipeline: receive, write, parse, watertight, winding, metrics.
+    stage_timings = Column(JSON, nullable=True)
+    # Métricas de cada corpo, para arquivos com mais de um (cenas/montagens).
+    bodies = Column(JSON, nullable=True)
 
     def __repr__(self):
         return f"<AnalysisResultDB(id={self.id}, file_name='{self.file_name}', is_watertight={self.is_watertight})>"
@@ -30,8 +54,66 @@ class AnalysisResultDB(Base):
             'is_watertight': self.is_watertight,
             'has_inverted_faces': self.has_inverted_faces,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'file_size': self.file_size,
             'vertices_count': self.vertices_count,
             'faces_count': self.faces_count,
-            'analysis_duration': self.analysis_duration
+            'analysis_duration': self.analysis_duration,
+            'content_hash': self.content_hash,
+            'degenerate_faces_count': self.degenerate_faces_count,
+            'duplicate_faces_count': self.duplicate_faces_count,
+            'non_manifold_edges_count': self.non_manifold_edges_count,
+            'boundary_edges_count': self.boundary_edges_count,
+            'shells_count': self.shells_count,
+            'volume': self.volume,
+            'bounding_box_x': self.bounding_box_x,
+            'bounding_box_y': self.bounding_box_y,
+            'bounding_box_z': self.bounding_box_z,
+            'stage_timings': self.stage_timings,
+            'bodies': self.bodies
+        }
+
+
+class AnalysisStatisticsDB(Base):
+    """ Resumo materializado de analysis_results (linha única), mantido incrementalmente pelo crud. """
+    __tablename__ = "analysis_statistics"
+
+    id = Column(Integer, primary_key=True)
+    total_analyses = Column(Integer, nullable=False, default=0)
+    watertight_models = Column(Integer, nullable=False, default=0)
+    models_with_inverted_faces = Column(Integer, nullable=False, default=0)
+    clean_models_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AnalysisStatisticsDB(total_analyses={self.total_analyses}, watertight_models={self.watertight_models})>"
+
+
+class AnalysisJobDB(Base):
+    """ Modelo para acompanhar análises assíncronas submetidas via /jobs. """
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(36), primary_key=True)
+    file_name = Column(String(255), nullable=False)
+    status = Column(String(16), index=True, nullable=False, default="queued")
+    error = Column(String(1024), nullable=True)
+    result_id = Column(Integer, ForeignKey("analysis_results.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    result = relationship(AnalysisResultDB)
+
+    def __repr__(self):
+        return f"<AnalysisJobDB(id='{self.id}', file_name='{self.file_name}', status='{self.status}')>"
+
+    def to_dict(self):
+        """Converte o modelo para dicionário."""
+        return {
+            'id': self.id,
+            'file_name': self.file_name,
+            'status': self.status,
+            'error': self.error,
+            'result_id': self.result_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
\ No newline at end of file
@@ -0,0 +1,303 @@
+# printqa/outofcore.py
+
+import logging
+import os
+import tempfile
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .analysis import STL_HEADER_SIZE, STL_TRIANGLE_DTYPE, _group_edges, quantize_vertices
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Memória de trabalho de uma análise (0 desliga o modo fora da memória). STL binários cuja análise
+# em memória passaria desse orçamento são analisados em blocos, com as arestas ordenadas em disco.
+MEMORY_BUDGET = int(float(os.getenv("ANALYSIS_MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+# Diretório dos arquivos temporários da ordenação externa (padrão: o temporário do sistema).
+SPILL_DIR = os.getenv("ANALYSIS_SPILL_DIR") or None
+
+# Pico de memória medido da análise em memória de um STL binário, por face.
+IN_MEMORY_BYTES_PER_FACE = 400
+# Memória de trabalho por triângulo de um bloco lido do mmap (cantos, hashes e chaves de arestas).
+CHUNK_BYTES_PER_TRIANGLE = 512
+MIN_CHUNK_TRIANGLES = 1024
+MIN_MERGE_BLOCK = 1024
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_SEED = np.uint64(0x9E3779B97F4A7C15)
+
+
+def exceeds_memory_budget(file_size: int, memory_budget: Optional[int] = None) -> bool:
+    """Indica se a análise em memória de um STL binário de `file_size` bytes passaria do orçamento."""
+    memory_budget = MEMORY_BUDGET if memory_budget is None else memory_budget
+    faces = max(file_size - STL_HEADER_SIZE, 0) // STL_TRIANGLE_DTYPE.itemsize
+    return memory_budget > 0 and faces * IN_MEMORY_BYTES_PER_FACE > memory_budget
+
+
+class ExternalSorter:
+    """
+    Ordenação externa de chaves uint64. As chaves são acumuladas em memória até metade de
+    `memory_budget` (a ordenação de um lote precisa de uma cópia); a partir daí, cada lote é
+    ordenado e gravado como uma sequência ("run") em `directory`. `iter_sorted` devolve todas
+    as chaves em ordem, em blocos de no máximo um quarto do lote, com um merge k-way que
+    mantém em memória só um pedaço de cada sequência. Com `unique`, as repetições são
+    descartadas em cada sequência (o consumidor ainda vê repetições entre blocos).
+    """
+
+    def __init__(self, directory: str, memory_budget: int, name: str = "keys", unique: bool = False):
+        self.directory = directory
+        self.capacity = max(memory_budget // 16, MIN_MERGE_BLOCK)
+        self.block = max(self.capacity // 4, MIN_MERGE_BLOCK)
+        self.name = name
+        self.unique = unique
+        self.runs: List[Tuple[str, int]] = []
+        self._pending: List[np.ndarray] = []
+        self._pending_count = 0
+
+    def add(self, keys: np.ndarray) -> None:
+        self._pending.append(np.asarray(keys, dtype=np.uint64))
+        self._pending_count += len(keys)
+        if self._pending_count >= self.capacity:
+            self._spill()
+
+    def _sorted_pending(self) -> np.ndarray:
+        keys = np.concatenate(self._pending) if self._pending else np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_count = 0
+        if self.unique:
+            return np.unique(keys)
+        keys.sort()
+        return keys
+
+    def _spill(self) -> None:
+        keys = self._sorted_pending()
+        path = os.path.join(self.directory, f"{self.name}_{len(self.runs)}.bin")
+        keys.tofile(path)
+        self.runs.append((path, len(keys)))
+
+    def iter_sorted(self) -> Iterator[np.ndarray]:
+        if not self.runs:
+            # Tudo coube no orçamento: nenhuma escrita em disco.
+            keys = self._sorted_pending()
+            for start in range(0, len(keys), self.block):
+                yield keys[start:start + self.block]
+            return
+        if self._pending:
+            self._spill()
+
+        runs = [np.memmap(path, dtype=np.uint64, mode="r", shape=(count,)) for path, count in self.runs if count]
+        block = max(self.block // len(runs), MIN_MERGE_BLOCK)
+        positions = [0] * len(runs)
+        while True:
+            heads = [run[position:position + block] for run, position in zip(runs, positions) if position < len(run)]
+            if not heads:
+                break
+            # Tudo até o menor dos últimos valores carregados já está no lugar certo da ordem global;
+            # a sequência que define o corte é consumida por inteiro, então o merge sempre avança.
+            cutoff = min(head[-1] for head in heads)
+            parts = []
+            for index, run in enumerate(runs):
+                head = run[positions[index]:positions[index] + block]
+                taken = int(np.searchsorted(head, cutoff, side="right"))
+                parts.append(head[:taken])
+                positions[index] += taken
+            merged = np.concatenate(parts)
+            merged.sort(kind="stable")  # as partes já vêm ordenadas
+            yield merged
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Finalizador do splitmix64: espalha os bits de cada valor uint64."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX_1
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+def vertex_hashes(corners: np.ndarray) -> np.ndarray:
+    """
+    Índice dos vértices por hash: cada canto `(n, 3, 3)` float32 vira um hash de 64 bits das três
+    coordenadas arredondadas por `quantize_vertices`, a mesma unificação de `load_binary_stl`.
+    Cantos com a mesma chave têm o mesmo hash, sem precisar de uma tabela de vértices.
+    """
+    keys = quantize_vertices(corners).view(np.uint64)
+    return _mix(keys[..., 0] ^ _mix(keys[..., 1] ^ _mix(keys[..., 2] ^ _SEED)))
+
+
+def edge_keys(hashes: np.ndarray) -> np.ndarray:
+    """
+    Chaves das arestas orientadas das faces `(n, 3)` de hashes de vértices, no formato de
+    `sorted_edge_keys`: os bits altos identificam a aresta não orientada e o bit menos
+    significativo, o sentido. O bit seguinte marca arestas degeneradas (a, a), que não têm
+    sentido. Com 62 bits de hash, a chance de duas arestas distintas colidirem em uma malha de
+    50 milhões de faces é da ordem de 1 em 1.000.
+    """
+    first = hashes.ravel()
+    second = hashes[:, [1, 2, 0]].ravel()
+    low = np.minimum(first, second)
+    high = np.maximum(first, second)
+    edge = _mix(low ^ _mix(high ^ _SEED)) & ~np.uint64(3)
+    return edge | ((low == high).astype(np.uint64) << np.uint64(1)) | (first < second).astype(np.uint64)
+
+
+class _EdgeAccumulator:
+    """Acumula as verificações de arestas sobre blocos ordenados de chaves (ver `edge_keys`)."""
+
+    def __init__(self):
+        self.is_watertight = True
+        self.is_winding_consistent = True
+        self.boundary_edges = 0
+        self.non_manifold_edges = 0
+        self._carry = np.empty(0, dtype=np.uint64)
+
+    def add(self, packed: np.ndarray) -> None:
+        packed = np.concatenate([self._carry, packed])
+        # A última aresta pode continuar no próximo bloco: fica para a próxima chamada.
+        cut = int(np.searchsorted(packed >> np.uint64(1), packed[-1] >> np.uint64(1), side="left"))
+        self._carry = packed[cut:]
+        self._check(packed[:cut])
+
+    def close(self) -> None:
+        self._check(self._carry)
+        self._carry = np.empty(0, dtype=np.uint64)
+
+    def _check(self, packed: np.ndarray) -> None:
+        if not len(packed):
+            return
+        keys, starts, counts = _group_edges(packed)
+        self.is_watertight &= bool((counts == 2).all())
+        self.boundary_edges += int((counts == 1).sum())
+        self.non_manifold_edges += int((counts > 2).sum())
+        pairs = starts[counts == 2]
+        opposite = (packed[pairs] & np.uint64(1)) != (packed[pairs + 1] & np.uint64(1))
+        degenerate = (keys[pairs] & np.uint64(1)) == 1
+        self.is_winding_consistent &= bool((opposite | degenerate).all())
+
+
+def _count_distinct(blocks: Iterator[np.ndarray]) -> int:
+    count = 0
+    last = None
+    for block in blocks:
+        distinct = np.unique(block)
+        count += len(distinct) - int(last is not None and distinct[0] == last)
+        last = distinct[-1]
+    return count
+
+
+def binary_stl_metrics(
+    buffer,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    timer: Optional[StageTimer] = None,
+) -> Tuple[dict, int]:
+    """
+    Analisa um STL binário (bytes ou mmap) em blocos de triângulos, sem carregar a malha:
+    o volume e a caixa delimitadora são acumulados bloco a bloco, e as arestas (chaves de 64
+    bits sobre o índice de vértices por hash) passam por uma ordenação externa que grava em
+    `spill_dir` o que não cabe em `memory_budget`. Retorna `(métricas, faces analisadas)`.
+
+    Calcula estanqueidade, orientação, arestas de borda e não-manifold, vértices, volume e
+    caixa delimitadora com a mesma semântica da análise em memória. Faces degeneradas,
+    duplicadas e cascas exigem a malha inteira e ficam como None.
+    """
+    memory_budget = memory_budget or MEMORY_BUDGET or 512 * 1024 * 1024
+    timer = timer or StageTimer()
+    count = int(np.frombuffer(buffer, dtype="<u4", count=1, offset=80)[0])
+    chunk = max(memory_budget // 4 // CHUNK_BYTES_PER_TRIANGLE, MIN_CHUNK_TRIANGLES)
+
+    with tempfile.TemporaryDirectory(prefix="printqa_", dir=spill_dir) as directory:
+        edges = ExternalSorter(directory, memory_budget // 2, "edges")
+        vertices = ExternalSorter(directory, memory_budget // 4, "vertices", unique=True)
+        faces = 0
+        volume = 0.0
+        lower = np.full(3, np.inf)
+        upper = np.full(3, -np.inf)
+
+        with timer.stage("parse"):
+            for offset in range(0, count, chunk):
+                triangles = np.frombuffer(
+                    buffer, dtype=STL_TRIANGLE_DTYPE, count=min(chunk, count - offset),
+                    offset=STL_HEADER_SIZE + offset * STL_TRIANGLE_DTYPE.itemsize,
+                )
+                corners = triangles["vertices"]
+                corners = corners[np.isfinite(corners).all(axis=(1, 2))]
+                if not len(corners):
+                    continue
+                faces += len(corners)
+
+                hashes = vertex_hashes(corners)
+                edges.add(edge_keys(hashes))
+                vertices.add(np.unique(hashes))
+
+                points = corners.astype(np.float64)
+                lower = np.minimum(lower, points.min(axis=(0, 1)))
+                upper = np.maximum(upper, points.max(axis=(0, 1)))
+                # Volume com sinal pelo teorema da divergência, como em `_defect_metrics`.
+                volume += float(np.einsum("ij,ij->", points[:, 0], np.cross(points[:, 1], points[:, 2])) / 6.0)
+
+        if faces == 0:
+            return {}, 0
+
+        # O merge das arestas responde estanqueidade e orientação na mesma passada.
+        with timer.stage("watertight"):
+            accumulator = _EdgeAccumulator()
+            for block in edges.iter_sorted():
+                accumulator.add(block)
+            accumulator.close()
+
+        with timer.stage("metrics"):
+            vertices_count = _count_distinct(vertices.iter_sorted())
+
+        if edges.runs:
+            logger.info(
+                f"Ordenação externa das arestas em {len(edges.runs)} sequências "
+                f"(orçamento de {memory_budget} bytes)."
+            )
+
+    extents = upper - lower
+    return {
+        "is_watertight": accumulator.is_watertight,
+        "has_inverted_faces": not accumulator.is_winding_consistent,
+        "vertices_count": vertices_count,
+        "faces_count": faces,
+        "degenerate_faces_count": None,
+        "duplicate_faces_count": None,
+        "non_manifold_edges_count": accumulator.non_manifold_edges,
+        "boundary_edges_count": accumulator.boundary_edges,
+        "shells_count": None,
+        "volume": volume,
+        "bounding_box_x": float(extents[0]),
+        "bounding_box_y": float(extents[1]),
+        "bounding_box_z": float(extents[2]),
+    }, faces
+
+
+def analyze_out_of_core(
+    buffer,
+    display_name: str,
+    file_size: int,
+    start_time: float,
+    timer: StageTimer,
+    memory_budget: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+) -> dict:
+    """Como `analysis._analyze_mesh`, para um STL binário analisado fora da memória."""
+    logger.info(f"Analisando '{display_name}' em blocos, fora da memória ({file_size} bytes).")
+    metrics, faces = binary_stl_metrics(buffer, memory_budget, spill_dir or SPILL_DIR, timer)
+    if faces == 0:
+        raise ValueError(f"O arquivo '{display_name}' não contém uma malha 3D válida.")
+
+    analysis_duration = int((time.monotonic() - start_time) * 1000)
+    logger.info(f"Análise de '{display_name}' concluída em {analysis_duration}ms.")
+    return {
+        **metrics,
+        "file_size": file_size,
+        "analysis_duration": analysis_duration,
+        "stage_timings": timer.timings,
+        "bodies": None,
+    }
@@ -0,0 +1,237 @@
+# printqa/parallel.py
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .analysis import (
+    _count_duplicate_faces, _defect_summary, _face_geometry, _group_edges, _is_winding_consistent, _shells_count,
+    _vertex_bounds, sorted_edge_keys,
+)
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Processos que dividem a análise de uma única malha grande (1 desliga a divisão).
+PARTITIONS = int(os.getenv("ANALYSIS_PARTITIONS", "1"))
+# Malhas com menos faces que isso são analisadas em um processo só: abaixo disso, o custo de
+# copiar os arrays para a memória compartilhada e coordenar as partições não compensa.
+PARTITION_MIN_FACES = int(os.getenv("ANALYSIS_PARTITION_MIN_FACES", "1000000"))
+# Amostras das chaves de cada partição usadas para escolher os cortes do merge.
+SAMPLES_PER_PARTITION = 256
+
+# (nome do bloco de memória compartilhada, shape, dtype)
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def should_partition(faces_count: int, partitions: Optional[int] = None) -> bool:
+    partitions = PARTITIONS if partitions is None else partitions
+    return partitions > 1 and faces_count >= PARTITION_MIN_FACES
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool das partições, criado na primeira malha grande e reaproveitado pelas seguintes.
+    Cada processo do pool de análise tem o seu, com `workers` processos: no total, até
+    ANALYSIS_WORKERS × ANALYSIS_PARTITIONS processos ficam ativos.
+
+    Os processos do pool não são daemon: ao sair, o processo dono espera por eles. Por isso
+    `shutdown` é registrado como finalizador do multiprocessing, executado antes dessa espera
+    e antes dos finalizadores das filas (prioridade 10), que ainda levam o aviso de fim aos
+    processos; sem ele, o encerramento do pool de análise ficaria bloqueado para sempre.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            if not _pools:
+                util.Finalize(None, shutdown, exitpriority=100)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+
+def shutdown() -> None:
+    """Encerra os pools das partições (são recriados sob demanda)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        _pools.clear()
+
+
+def _create(shape: Tuple[int, ...], dtype) -> Tuple[shared_memory.SharedMemory, ArraySpec]:
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return block, (block.name, shape, dtype.str)
+
+
+def _view(block: shared_memory.SharedMemory, spec: ArraySpec) -> np.ndarray:
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _call_attached(func: Callable[..., Any], specs: List[ArraySpec], *args: Any) -> Any:
+    """
+    Roda `func(*arrays, *args)` em um processo do pool, com os arrays compartilhados `specs`
+    mapeados sem cópia. Com "spawn", os processos do pool usam o resource tracker de quem
+    criou os blocos, que continua responsável por removê-los (`unlink`). O resultado não pode
+    conter views dos blocos: elas impediriam o `close`.
+    """
+    blocks = [shared_memory.SharedMemory(name=spec[0]) for spec in specs]
+    result = func(*[_view(block, spec) for block, spec in zip(blocks, specs)], *args)
+    # Em caso de erro, os blocos ficam mapeados até o coletor de lixo: o traceback ainda
+    # referencia as views, e um `close` agora mascararia a exceção original.
+    for block in blocks:
+        block.close()
+    return result
+
+
+def _sort_partition(
+    vertices: np.ndarray, faces: np.ndarray, packed: np.ndarray, start: int, stop: int, scale: float
+) -> Tuple[np.ndarray, int, float]:
+    """
+    Partição das faces `[start, stop)`: ordena as chaves das suas arestas (`sorted_edge_keys`)
+    direto na fatia correspondente do array compartilhado e calcula as somas por face
+    (faces degeneradas e volume). Retorna amostras das chaves para os cortes do merge.
+    """
+    faces = faces[start:stop]
+    keys = sorted_edge_keys(faces, len(vertices))
+    packed[3 * start:3 * stop] = keys
+    degenerate, volume = _face_geometry(vertices, faces, scale)
+    samples = keys[np.linspace(0, len(keys) - 1, min(SAMPLES_PER_PARTITION, len(keys))).astype(np.int64)]
+    return samples, degenerate, volume
+
+
+def _merge_range(
+    packed: np.ndarray, merged: np.ndarray, pieces: List[Tuple[int, int]], offset: int, vertex_count: int
+) -> Tuple[bool, bool, int, int, np.ndarray]:
+    """
+    Reconcilia uma faixa de chaves: junta os pedaços da faixa vindos de cada partição (as
+    arestas na fronteira entre partições aparecem em mais de uma), grava o resultado ordenado
+    em `merged[offset:]` e verifica as arestas da faixa. Como os cortes caem entre arestas não
+    orientadas diferentes, as ocorrências de uma aresta nunca ficam em faixas diferentes.
+    """
+    target = merged[offset:offset + sum(stop - start for start, stop in pieces)]
+    if not len(target):
+        return True, True, 0, 0, np.empty(0, dtype=np.int64)
+    np.concatenate([packed[start:stop] for start, stop in pieces], out=target)
+    target.sort(kind="stable")  # os pedaços já vêm ordenados
+
+    keys, starts, counts = _group_edges(target)
+    return (
+        bool((counts == 2).all()),
+        _is_winding_consistent(target, keys, starts, counts, vertex_count),
+        int((counts > 2).sum()),
+        int((counts == 1).sum()),
+        keys[starts],
+    )
+
+
+def _splitters(samples: List[np.ndarray], partitions: int) -> np.ndarray:
+    """Cortes das faixas do merge: quantis das amostras, alinhados ao início de uma aresta não orientada."""
+    ordered = np.sort(np.concatenate(samples))
+    cuts = ordered[np.linspace(0, len(ordered), partitions + 1).astype(np.int64)[1:-1]]
+    return np.unique((cuts >> 1) << 1)
+
+
+def partitioned_mesh_metrics(
+    vertices: np.ndarray, faces: np.ndarray, timer: StageTimer, partitions: Optional[int] = None
+) -> Tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Como `analysis._mesh_metrics`, dividindo a malha entre `partitions` processos. Vértices e
+    faces vão uma vez para a memória compartilhada (`multiprocessing.shared_memory`), sem
+    serialização por partição:
+
+    1. cada partição de faces ordena as chaves das suas arestas e soma as métricas por face;
+    2. as chaves são divididas em faixas por amostragem e cada faixa é reconciliada em um
+       processo (merge dos pedaços de todas as partições), que verifica estanqueidade,
+       orientação e arestas de borda/não-manifold.
+
+    As faces duplicadas são contadas em paralelo à primeira etapa; as cascas, no processo
+    atual, sobre as arestas únicas devolvidas pelas faixas.
+    """
+    partitions = partitions or PARTITIONS
+    vertices = np.ascontiguousarray(vertices, dtype=np.float64)
+    faces = np.ascontiguousarray(faces, dtype=np.int64)
+    vertex_count, face_count = len(vertices), len(faces)
+    pool = _get_pool(partitions)
+    logger.info(f"Analisando malha de {face_count} faces em {partitions} partições.")
+
+    blocks = []
+    packed = None
+    try:
+        # Estanqueidade e orientação saem do mesmo merge: o tempo fica todo em `watertight`.
+        with timer.stage("watertight"):
+            used, lower, upper, scale = _vertex_bounds(vertices, faces)
+            specs = []
+            for shape, dtype in (
+                (vertices.shape, vertices.dtype), (faces.shape, faces.dtype),
+                ((3 * face_count,), np.int64), ((3 * face_count,), np.int64),
+            ):
+                block, spec = _create(shape, dtype)
+                blocks.append(block)
+                specs.append(spec)
+            vertices_spec, faces_spec, packed_spec, merged_spec = specs
+            _view(blocks[0], vertices_spec)[...] = vertices
+            _view(blocks[1], faces_spec)[...] = faces
+            packed = _view(blocks[2], packed_spec)
+
+            bounds = np.linspace(0, face_count, partitions + 1).astype(np.int64)
+            duplicates = pool.submit(_call_attached, _count_duplicate_faces, [faces_spec])
+            sorted_parts = [
+                pool.submit(
+                    _call_attached, _sort_partition, [vertices_spec, faces_spec, packed_spec], int(start), int(stop), scale
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            outcomes = [future.result() for future in sorted_parts]
+
+            # Posição de cada corte em cada partição já ordenada: a faixa i vai de cuts[:, i] a cuts[:, i + 1].
+            splitters = _splitters([samples for samples, _, _ in outcomes], partitions)
+            cuts = np.array([
+                np.r_[3 * start, 3 * start + np.searchsorted(packed[3 * start:3 * stop], splitters), 3 * stop]
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ])
+            offsets = np.r_[0, np.cumsum((cuts[:, 1:] - cuts[:, :-1]).sum(axis=0))]
+            ranges = [
+                pool.submit(
+                    _call_attached, _merge_range, [packed_spec, merged_spec],
+                    [(int(cuts[part, index]), int(cuts[part, index + 1])) for part in range(partitions)],
+                    int(offsets[index]), vertex_count,
+                )
+                for index in range(len(splitters) + 1)
+            ]
+            checks = [future.result() for future in ranges]
+
+        with timer.stage("metrics"):
+            unique_keys = np.concatenate([unique for _, _, _, _, unique in checks])
+            defects = _defect_summary(
+                sum(degenerate for _, degenerate, _ in outcomes),
+                duplicates.result(),
+                sum(non_manifold for _, _, non_manifold, _, _ in checks),
+                sum(boundary for _, _, _, boundary, _ in checks),
+                _shells_count(vertex_count, unique_keys, used),
+                float(sum(volume for _, _, volume in outcomes)),
+                lower,
+                upper,
+            )
+    finally:
+        packed = None  # a view impede o `close` do bloco
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    metrics, lower, upper = defects
+    return {
+        "is_watertight": all(watertight for watertight, _, _, _, _ in checks),
+        "has_inverted_faces": not all(consistent for _, consistent, _, _, _ in checks),
+        **metrics,
+    }, lower, upper
@@ -0,0 +1,158 @@
+# printqa/profiling.py
+
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho que liga o perfil para uma requisição específica (quando `allow_header` está ativo).
+PROFILE_HEADER = "X-PrintQA-Profile"
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in _TRUE_VALUES
+
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    """
+    Configuração do perfil de análises lentas. Com `enabled` (ou por requisição, pelo
+    cabeçalho `X-PrintQA-Profile`, se `allow_header` foi ligado pelo operador), a análise
+    roda sob cProfile e tracemalloc no processo do pool; se passar de `min_duration_ms` ou
+    de `min_peak_bytes` — ou se o perfil foi pedido explicitamente (`force`) — o perfil
+    `.prof` e um `.json` com o digest da malha, o pico de memória e as maiores alocações são
+    gravados em `directory`. O diretório guarda no máximo `max_files` perfis e `max_bytes`
+    bytes; os mais antigos são removidos.
+    """
+    enabled: bool = False
+    allow_header: bool = False
+    directory: str = "profiles"
+    min_duration_ms: int = 10_000
+    min_peak_bytes: int = 512 * 1024 * 1024
+    max_files: int = 50
+    max_bytes: int = 256 * 1024 * 1024
+    force: bool = False
+
+    @classmethod
+    def from_env(cls) -> "ProfilingConfig":
+        """Cria a configuração a partir das variáveis de ambiente `ANALYSIS_PROFILE*`."""
+        return cls(
+            enabled=_env_flag("ANALYSIS_PROFILE", False),
+            allow_header=_env_flag("ANALYSIS_PROFILE_HEADER", False),
+            directory=os.getenv("ANALYSIS_PROFILE_DIR", "profiles"),
+            min_duration_ms=int(os.getenv("ANALYSIS_PROFILE_MIN_DURATION_MS", "10000")),
+            min_peak_bytes=int(float(os.getenv("ANALYSIS_PROFILE_MIN_PEAK_MB", "512")) * 1024 * 1024),
+            max_files=int(os.getenv("ANALYSIS_PROFILE_MAX_FILES", "50")),
+            max_bytes=int(float(os.getenv("ANALYSIS_PROFILE_MAX_MB", "256")) * 1024 * 1024),
+        )
+
+    def for_request(self, header_value: Optional[str]) -> Optional["ProfilingConfig"]:
+        """
+        Configuração a aplicar a uma requisição: None se o perfil está desligado para ela.
+        O cabeçalho força a gravação do perfil, independentemente dos limites.
+        """
+        if self.allow_header and header_value is not None and header_value.lower() in _TRUE_VALUES:
+            return replace(self, force=True)
+        return self if self.enabled else None
+
+
+def profiled_call(
+    config: ProfilingConfig, content_hash: str, file_name: str, func: Callable[..., Any], *args: Any
+) -> Any:
+    """
+    Executa `func(*args)` sob cProfile e tracemalloc e grava o perfil se a execução passou
+    dos limites de `config`. Roda no processo do pool, como a própria análise.
+    """
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    error = None
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args)
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        profiler.disable()
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        try:
+            if config.force or duration_ms >= config.min_duration_ms or peak_bytes >= config.min_peak_bytes:
+                snapshot = tracemalloc.take_snapshot()
+                _write_profile(config, profiler, snapshot, {
+                    "content_hash": content_hash,
+                    "file_name": file_name,
+                    "duration_ms": duration_ms,
+                    "peak_bytes": peak_bytes,
+                    "error": error,
+                })
+        except OSError as e:
+            logger.error(f"Falha ao gravar o perfil da análise de '{file_name}': {e}")
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+
+def _write_profile(config: ProfilingConfig, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, report: dict) -> str:
+    os.makedirs(config.directory, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    base = os.path.join(
+        config.directory, f"{created_at:%Y%m%dT%H%M%S%f}_{(report['content_hash'] or 'sem-digest')[:16]}_{os.getpid()}"
+    )
+    profiler.dump_stats(f"{base}.prof")
+
+    report["created_at"] = created_at.isoformat()
+    # Alocações ainda vivas ao fim da análise, agrupadas por linha de código.
+    report["top_allocations"] = [
+        {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:20]
+    ]
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    logger.warning(
+        f"Perfil da análise de '{report['file_name']}' ({report['duration_ms']}ms, "
+        f"pico de {report['peak_bytes']} bytes) gravado em '{base}.prof'."
+    )
+    rotate_profiles(config.directory, config.max_files, config.max_bytes)
+    return f"{base}.prof"
+
+
+def rotate_profiles(directory: str, max_files: int, max_bytes: int) -> None:
+    """
+    Remove os perfis mais antigos até o diretório respeitar `max_files` e `max_bytes`.
+    O perfil mais recente é sempre mantido, mesmo que sozinho passe do limite.
+    """
+    profiles = {}
+    for entry in os.scandir(directory):
+        stem, extension = os.path.splitext(entry.name)
+        if extension in (".prof", ".json"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removido por outro processo do pool
+                continue
+            mtime, size = profiles.get(stem, (0.0, 0))
+            profiles[stem] = (max(mtime, stat.st_mtime), size + stat.st_size)
+
+    ordered = sorted(profiles.items(), key=lambda item: (item[1][0], item[0]))
+    total_bytes = sum(size for _, (_, size) in ordered)
+    while len(ordered) > 1 and (len(ordered) > max_files or total_bytes > max_bytes):
+        stem, (_, size) = ordered.pop(0)
+        total_bytes -= size
+        for extension in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(directory, stem + extension))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,269 @@
+# printqa/reanalyze.py
+
+"""
+Reanálise dos resultados já gravados, para quando a lógica de análise muda: percorre as
+malhas guardadas (um diretório com os arquivos originais ou o armazenamento de malhas),
+roda a análise em um pool de processos e grava os novos resultados em lotes, sobre os
+registros existentes (casados pelo digest do conteúdo).
+
+O progresso fica em um arquivo de checkpoint, então uma execução interrompida retoma de
+onde parou. Ver `python -m printqa reanalyze --help`.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, TextIO, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from . import crud, database, schemas
+from .meshstore import MeshStore
+from .workers import initialize_worker
+
+logger = logging.getLogger(__name__)
+
+# Extensões consideradas ao percorrer um diretório de arquivos originais.
+MESH_EXTENSIONS = (".stl", ".obj", ".ply", ".off", ".glb", ".gltf", ".3mf")
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_CHECKPOINT = "reanalyze.checkpoint"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ReanalysisTask:
+    """Uma malha a reanalisar: `path` para arquivos em disco, senão `content_hash` no armazenamento."""
+    key: str
+    content_hash: Optional[str] = None
+    path: Optional[str] = None
+    file_name: Optional[str] = None
+
+
+@dataclass
+class ReanalysisSummary:
+    total: int = 0
+    skipped: int = 0
+    processed: int = 0
+    updated: int = 0
+    missing: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def store_tasks(store_dir: str) -> List[ReanalysisTask]:
+    """Uma tarefa por malha do armazenamento; a chave do checkpoint é o próprio digest."""
+    return [ReanalysisTask(key=digest, content_hash=digest) for digest in sorted(MeshStore(store_dir).digests())]
+
+
+def directory_tasks(directory: str) -> List[ReanalysisTask]:
+    """Uma tarefa por arquivo de malha sob `directory`; a chave é o caminho relativo."""
+    tasks = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or os.path.splitext(name)[1].lower() not in MESH_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            tasks.append(ReanalysisTask(key=os.path.relpath(path, directory), path=path, file_name=name))
+    return tasks
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 do arquivo, o mesmo `content_hash` calculado no upload."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reanalyze(task: ReanalysisTask, store_dir: Optional[str]) -> Tuple[str, Optional[str], Union[dict, str]]:
+    """
+    Roda a análise de uma tarefa em um processo do pool. Retorna (chave, digest, resultado),
+    com a mensagem de erro no lugar do resultado se a análise falhar, qualquer que seja a
+    exceção: uma malha ruim não interrompe a reanálise das demais.
+    """
+    from .analysis import analyze_file, analyze_stored
+
+    content_hash = task.content_hash
+    try:
+        if task.path is not None:
+            content_hash = _file_digest(task.path)
+            result = analyze_file(task.path, task.file_name, content_hash)
+        else:
+            result = analyze_stored(content_hash, task.file_name, store_dir)
+    except Exception as e:
+        return task.key, content_hash, f"{type(e).__name__}: {e}"
+    return task.key, content_hash, result
+
+
+def _result_fields(content_hash: str, result: dict) -> dict:
+    """Campos do resultado validados pelo schema, sem o nome e o digest (que identificam o registro)."""
+    analysis = schemas.AnalysisResultCreate(file_name="", content_hash=content_hash, **result)
+    return analysis.model_dump(exclude={"file_name", "content_hash"})
+
+
+class Checkpoint:
+    """
+    Chaves das tarefas já concluídas, uma por linha, acrescentadas só depois do commit do
+    lote: uma interrupção no meio de um lote faz a reanálise repetir o lote, nunca pulá-lo.
+    """
+
+    def __init__(self, path: str, restart: bool = False):
+        self.path = path
+        if restart and os.path.exists(path):
+            os.remove(path)
+
+    def load(self) -> Set[str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {line.rstrip("\n") for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def add(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{key}\n" for key in keys)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Mostra o andamento (concluídas, falhas e arquivos/s) a cada `interval` segundos."""
+
+    def __init__(self, total: int, stream: Optional[TextIO] = None, interval: float = 1.0):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self._last = 0.0
+
+    def update(self, summary: ReanalysisSummary, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        done = summary.skipped + summary.processed
+        percent = 100.0 * done / self.total if self.total else 100.0
+        self.stream.write(
+            f"{done}/{self.total} ({percent:.1f}%) · {summary.files_per_second:.1f} arquivos/s · "
+            f"{summary.updated} atualizados · {summary.missing} sem registro · {summary.failed} falhas\n"
+        )
+        self.stream.flush()
+
+
+def run(
+    tasks: List[ReanalysisTask],
+    store_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    restart: bool = False,
+    session_factory: Callable[[], Session] = database.SessionLocal,
+    progress_stream: Optional[TextIO] = None,
+) -> ReanalysisSummary:
+    """
+    Reanalisa `tasks` em um pool de `workers` processos e grava os resultados com
+    `crud.update_analysis_results_by_hash`, um UPDATE em massa e um commit a cada
+    `batch_size` resultados. As tarefas já registradas no checkpoint são puladas; ao
+    terminar sem interrupção, o checkpoint é removido.
+
+    Falhas de análise e malhas sem registro no banco também entram no checkpoint: são
+    contadas e registradas no log, e não são tentadas de novo ao retomar. Se um processo do
+    pool morrer (ex.: OOM killer), as tarefas em andamento contam como falhas e o pool é
+    recriado para as restantes.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint = Checkpoint(checkpoint_path, restart)
+    done = checkpoint.load()
+    pending = [task for task in tasks if task.key not in done]
+
+    summary = ReanalysisSummary(total=len(tasks), skipped=len(tasks) - len(pending))
+    progress = Progress(len(tasks), progress_stream)
+    start_time = time.monotonic()
+    updates: Dict[str, dict] = {}
+    keys: List[str] = []
+
+    def flush(db: Session) -> None:
+        if updates:
+            updated = crud.update_analysis_results_by_hash(db, updates)
+            summary.updated += updated
+            summary.missing += len(updates) - updated
+        checkpoint.add(keys)
+        updates.clear()
+        keys.clear()
+
+    def record(key: str, content_hash: Optional[str], result: Union[dict, str]) -> None:
+        summary.processed += 1
+        if isinstance(result, str):
+            logger.error(f"Falha ao reanalisar '{key}': {result}")
+            summary.failed += 1
+        else:
+            updates[content_hash] = _result_fields(content_hash, result)
+        keys.append(key)
+
+    def create_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=initialize_worker
+        )
+
+    pool = create_pool()
+    try:
+        with session_factory() as db:
+            queue = iter(pending)
+            running: Dict[Future, ReanalysisTask] = {}
+            while True:
+                # Janela limitada de submissões: a fila não cresce com o número de arquivos.
+                for task in queue:
+                    running[pool.submit(_reanalyze, task, store_dir)] = task
+                    if len(running) >= 2 * workers:
+                        break
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                lost = None
+                for future in finished:
+                    task = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool as e:
+                        lost = f"{type(e).__name__}: {e}"
+                        outcome = (task.key, task.content_hash, lost)
+                    except Exception as e:
+                        outcome = (task.key, task.content_hash, f"{type(e).__name__}: {e}")
+                    record(*outcome)
+                if lost is not None:
+                    # Um pool quebrado falha todas as tarefas pendentes: não dá para saber qual
+                    # malha derrubou o processo, então todas contam como falha.
+                    for task in running.values():
+                        record(task.key, task.content_hash, lost)
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = create_pool()
+                if len(keys) >= batch_size:
+                    flush(db)
+                summary.elapsed = time.monotonic() - start_time
+                progress.update(summary)
+            flush(db)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    summary.elapsed = time.monotonic() - start_time
+    progress.update(summary, force=True)
+    checkpoint.remove()
+    return summary
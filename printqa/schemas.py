@@ -1,12 +1,30 @@
 # printqa/schemas.py
 
+from enum import Enum
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ErrorResponse(BaseModel):
     detail: str
 
+class BodyAnalysis(BaseModel):
+    """Métricas de um corpo de um arquivo com várias peças (nó da cena)."""
+    name: str
+    is_watertight: bool
+    has_inverted_faces: bool
+    vertices_count: int
+    faces_count: int
+    degenerate_faces_count: int
+    duplicate_faces_count: int
+    non_manifold_edges_count: int
+    boundary_edges_count: int
+    shells_count: int
+    volume: float
+    bounding_box_x: float
+    bounding_box_y: float
+    bounding_box_z: float
+
 class AnalysisResultBase(BaseModel):
     file_name: str
     is_watertight: bool
@@ -15,6 +33,18 @@ class AnalysisResultBase(BaseModel):
     vertices_count: Optional[int] = None
     faces_count: Optional[int] = None
     analysis_duration: Optional[int] = None
+    content_hash: Optional[str] = None
+    degenerate_faces_count: Optional[int] = None
+    duplicate_faces_count: Optional[int] = None
+    non_manifold_edges_count: Optional[int] = None
+    boundary_edges_count: Optional[int] = None
+    shells_count: Optional[int] = None
+    volume: Optional[float] = None
+    bounding_box_x: Optional[float] = None
+    bounding_box_y: Optional[float] = None
+    bounding_box_z: Optional[float] = None
+    stage_timings: Optional[Dict[str, float]] = None
+    bodies: Optional[List[BodyAnalysis]] = None
 
 class AnalysisResultCreate(AnalysisResultBase):
     pass
@@ -22,4 +52,58 @@ class AnalysisResultCreate(AnalysisResultBase):
 class AnalysisResult(AnalysisResultBase):
     id: int
     timestamp: datetime
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    updated_at: Optional[datetime] = None
+    cache_hit: bool = False
+    model_config = ConfigDict(from_attributes=True)
+
+class AnalysisResultPage(BaseModel):
+    items: List[AnalysisResult]
+    next_cursor: Optional[str] = None
+
+class AnalysisStatistics(BaseModel):
+    total_analyses: int
+    watertight_models: int
+    models_with_inverted_faces: int
+    watertight_percentage: float
+    clean_models_count: int
+
+class PoolStatus(BaseModel):
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class AnalysisJob(BaseModel):
+    id: str
+    file_name: str
+    status: JobStatus
+    error: Optional[str] = None
+    result_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    result: Optional[AnalysisResult] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class BatchAnalysisItem(BaseModel):
+    file_name: str
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResult(BaseModel):
+    items: List[BatchAnalysisItem]
+    total_files: int
+    succeeded: int
+    failed: int
+    cache_hits: int
+    analysis_duration: int
+    total_duration: int
\ No newline at end of file
@@ -0,0 +1,29 @@
+# printqa/timing.py
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Etapas do pipeline de análise, na ordem em que acontecem.
+STAGES = ("receive", "write", "parse", "watertight", "winding", "metrics", "db_insert")
+
+
+class StageTimer:
+    """
+    Acumula o tempo (ms) gasto em cada etapa do pipeline de análise. Uma etapa medida
+    mais de uma vez (ex.: leitura do upload em blocos) tem os tempos somados.
+    """
+
+    def __init__(self, timings: Optional[Dict[str, float]] = None):
+        self.timings: Dict[str, float] = dict(timings or {})
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = round(self.timings.get(name, 0.0) + seconds * 1000, 3)
@@ -0,0 +1,309 @@
+# printqa/uploads.py
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from .profiling import ProfilingConfig, profiled_call
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "temp_uploads")
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(256 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Uploads até este tamanho ficam em memória e são analisados sem passar pelo disco.
+UPLOAD_SPOOL_SIZE = int(os.getenv("UPLOAD_SPOOL_SIZE", str(16 * 1024 * 1024)))
+# Limites das análises em lote: número de arquivos (incluindo as entradas de um .zip) e soma
+# dos tamanhos descompactados de um .zip.
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "500"))
+MAX_ZIP_SIZE = int(os.getenv("MAX_ZIP_SIZE", str(1024 * 1024 * 1024)))
+
+
+class UploadTooLargeError(Exception):
+    """Levantada quando o arquivo enviado excede o tamanho máximo permitido."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"O arquivo enviado excede o tamanho máximo de {max_bytes} bytes.")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredUpload:
+    """
+    Upload recebido, com tamanho e digest já calculados. O conteúdo fica em memória (`data`)
+    ou, acima de `UPLOAD_SPOOL_SIZE`, em um arquivo temporário exclusivo (`path`).
+    `stage_timings` guarda o tempo (ms) de recebimento e de gravação do upload.
+    """
+    file_name: str
+    size: int
+    content_hash: str
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+
+    def analysis_call(self, profiling: Optional[ProfilingConfig] = None) -> Tuple[Callable[..., Any], tuple]:
+        """
+        Retorna a função de análise e seus argumentos, prontos para envio ao pool de processos.
+        Com `profiling`, a análise é embrulhada em `profiled_call` (cProfile + tracemalloc).
+        """
+        from .analysis import analyze_bytes, analyze_file, file_type_from_name
+
+        # O digest permite reaproveitar a malha já interpretada (ver `printqa.meshstore`).
+        if self.data is not None:
+            func, args = analyze_bytes, (self.data, file_type_from_name(self.file_name), self.file_name, self.content_hash)
+        else:
+            func, args = analyze_file, (self.path, self.file_name, self.content_hash)
+        if profiling is None:
+            return func, args
+        return profiled_call, (profiling, self.content_hash, self.file_name, func, *args)
+
+    def read_head(self, size: int) -> bytes:
+        """Primeiros `size` bytes do conteúdo, sem carregar o restante do arquivo."""
+        if self.data is not None:
+            return self.data[:size]
+        with open(self.path, "rb") as f:
+            return f.read(size)
+
+    def precheck(self) -> None:
+        """Pré-validação do cabeçalho (ver `printqa.validation.check_mesh_header`)."""
+        from .validation import HEADER_SNIFF_SIZE, check_mesh_header
+
+        check_mesh_header(self.read_head(HEADER_SNIFF_SIZE), _extension(self.file_name), self.file_name, self.size)
+
+    def remove(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _extension(file_name: str) -> str:
+    return os.path.splitext(file_name)[1].lower().lstrip(".")
+
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+async def save_upload(
+    upload: UploadFile,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    spool_size: Optional[int] = None,
+    validate: bool = True,
+) -> StoredUpload:
+    """
+    Lê o upload em blocos de tamanho fixo, calculando o SHA-256 durante a leitura.
+    Arquivos de até `spool_size` bytes ficam em memória; os maiores são copiados para
+    um arquivo temporário à medida que chegam. O consumo de memória por requisição fica
+    limitado a `spool_size` mais um bloco, independentemente do tamanho do arquivo.
+
+    Com `validate`, o cabeçalho do arquivo passa pela pré-validação de
+    `printqa.validation` assim que os primeiros bytes chegam: conteúdo inválido ou acima do
+    teto de faces é recusado sem ler o resto do upload nem ocupar o pool de análise.
+
+    Levanta `UploadTooLargeError` assim que o limite é ultrapassado e `ValueError`
+    para uploads vazios ou inválidos; em todos os casos o arquivo temporário é removido.
+    """
+    from .validation import HEADER_SNIFF_SIZE, check_mesh_header
+
+    directory = directory or UPLOAD_DIR
+    max_bytes = max_bytes or MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    spool_size = UPLOAD_SPOOL_SIZE if spool_size is None else spool_size
+
+    # Quando o tamanho já é conhecido pelo parser multipart, recusa antes de copiar qualquer byte.
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    file_name = os.path.basename(upload.filename or "upload")
+    file_type = _extension(file_name)
+    head = bytearray()
+    checked = not validate
+    digest = hashlib.sha256()
+    # BytesIO em vez de bytearray: `getvalue()` devolve o próprio buffer como bytes, sem a cópia
+    # de `bytes(bytearray)`, que dobraria o pico de memória de cada upload mantido em memória.
+    spooled = io.BytesIO()
+    buffer = None
+    path = None
+    size = 0
+    timer = StageTimer()
+    try:
+        while True:
+            with timer.stage("receive"):
+                chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            if not checked and len(head) < HEADER_SNIFF_SIZE:
+                head += chunk[:HEADER_SNIFF_SIZE - len(head)]
+                if len(head) == HEADER_SNIFF_SIZE:
+                    # Sem o tamanho declarado, só o cabeçalho é verificado agora; o resto, ao final.
+                    check_mesh_header(bytes(head), file_type, file_name, upload.size)
+                    checked = upload.size is not None
+
+            with timer.stage("write"):
+                if buffer is None and size <= spool_size:
+                    digest.update(chunk)
+                    spooled.write(chunk)
+                    continue
+
+                if buffer is None:
+                    os.makedirs(directory, exist_ok=True)
+                    # O sufixo preserva a extensão, usada pelo trimesh para identificar o formato.
+                    fd, path = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(file_name)[1].lower())
+                    buffer = os.fdopen(fd, "wb")
+                    await run_in_threadpool(buffer.write, spooled.getbuffer())
+                    spooled = io.BytesIO()
+                await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+
+        if size == 0:
+            raise ValueError("O arquivo enviado está vazio.")
+        if not checked:
+            check_mesh_header(bytes(head), file_type, file_name, size)
+    except BaseException:
+        if buffer is not None:
+            buffer.close()
+            os.remove(path)
+        raise
+
+    if buffer is None:
+        return StoredUpload(
+            file_name=file_name, size=size, content_hash=digest.hexdigest(), data=spooled.getvalue(),
+            stage_timings=timer.timings,
+        )
+
+    with timer.stage("write"):
+        buffer.close()
+    logger.info(f"Upload '{file_name}' salvo em '{path}' ({size} bytes).")
+    return StoredUpload(
+        file_name=file_name, size=size, content_hash=digest.hexdigest(), path=path, stage_timings=timer.timings
+    )
+
+def is_zip_upload(upload: StoredUpload) -> bool:
+    return os.path.splitext(upload.file_name)[1].lower() == ".zip"
+
+
+def extract_zip_entries(
+    upload: StoredUpload,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    max_total_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    spool_size: Optional[int] = None,
+) -> List[StoredUpload]:
+    """
+    Descompacta as entradas de um upload .zip em blocos, com o mesmo tratamento de
+    `save_upload`: digest calculado durante a leitura, entradas pequenas em memória e as
+    maiores em arquivos temporários. Os tamanhos declarados no zip não são confiáveis,
+    então os limites são verificados sobre os bytes efetivamente descompactados.
+
+    Levanta `ValueError` para zips inválidos, vazios ou com entradas demais e
+    `UploadTooLargeError` quando uma entrada ou o total excedem os limites; nesses casos
+    as entradas já extraídas são removidas. Função bloqueante: deve rodar fora do event loop.
+    """
+    directory = directory or UPLOAD_DIR
+    max_bytes = max_bytes or MAX_UPLOAD_SIZE
+    max_entries = max_entries or MAX_BATCH_FILES
+    max_total_bytes = max_total_bytes or MAX_ZIP_SIZE
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    spool_size = UPLOAD_SPOOL_SIZE if spool_size is None else spool_size
+
+    entries: List[StoredUpload] = []
+    total = 0
+    try:
+        with zipfile.ZipFile(upload.path or io.BytesIO(upload.data)) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not _is_hidden_entry(info.filename)
+            ]
+            if not members:
+                raise ValueError("O arquivo zip enviado não contém arquivos.")
+            if len(members) > max_entries:
+                raise ValueError(f"O arquivo zip enviado excede o limite de {max_entries} arquivos.")
+
+            for info in members:
+                if total + info.file_size > max_total_bytes:
+                    raise UploadTooLargeError(max_total_bytes)
+                entry = _extract_entry(
+                    archive, info, directory, min(max_bytes, max_total_bytes - total), chunk_size, spool_size
+                )
+                entries.append(entry)
+                total += entry.size
+    except BaseException as e:
+        for entry in entries:
+            entry.remove()
+        if isinstance(e, (zipfile.BadZipFile, zlib.error, NotImplementedError)):
+            raise ValueError("O arquivo zip enviado é inválido ou usa um formato não suportado.") from e
+        raise
+
+    return entries
+
+
+def _is_hidden_entry(name: str) -> bool:
+    # Metadados que o Finder do macOS inclui nos zips (`__MACOSX/`, `._arquivo`).
+    return name.startswith("__MACOSX/") or os.path.basename(name).startswith(".")
+
+
+def _extract_entry(
+    archive: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    directory: str,
+    max_bytes: int,
+    chunk_size: int,
+    spool_size: int,
+) -> StoredUpload:
+    file_name = os.path.basename(info.filename)
+    if info.flag_bits & 0x1:
+        raise ValueError(f"A entrada '{file_name}' do arquivo zip está protegida por senha.")
+    if info.file_size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    digest = hashlib.sha256()
+    spooled = io.BytesIO()
+    buffer = None
+    path = None
+    size = 0
+    try:
+        with archive.open(info) as source:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+
+                digest.update(chunk)
+                if buffer is None and size <= spool_size:
+                    spooled.write(chunk)
+                    continue
+
+                if buffer is None:
+                    os.makedirs(directory, exist_ok=True)
+                    fd, path = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(file_name)[1].lower())
+                    buffer = os.fdopen(fd, "wb")
+                    buffer.write(spooled.getbuffer())
+                    spooled = io.BytesIO()
+                buffer.write(chunk)
+    except BaseException:
+        if buffer is not None:
+            buffer.close()
+            os.remove(path)
+        raise
+
+    if buffer is None:
+        return StoredUpload(file_name=file_name, size=size, content_hash=digest.hexdigest(), data=spooled.getvalue())
+
+    buffer.close()
+    return StoredUpload(file_name=file_name, size=size, content_hash=digest.hexdigest(), path=path)
@@ -0,0 +1,101 @@
+# printqa/validation.py
+
+import os
+import re
+import struct
+from typing import Optional
+
+# Bytes do início do arquivo inspecionados pela pré-validação.
+HEADER_SNIFF_SIZE = 4096
+# Teto de faces declaradas no cabeçalho (STL binário); acima disso a análise nem começa.
+MAX_MESH_FACES = int(os.getenv("MAX_MESH_FACES", "50000000"))
+
+STL_HEADER_SIZE = 84
+STL_TRIANGLE_SIZE = 50
+
+# Palavras-chave das instruções de um OBJ (geometria, agrupamento e materiais).
+OBJ_KEYWORDS = {
+    b"v", b"vt", b"vn", b"vp", b"f", b"l", b"p", b"o", b"g", b"s", b"mtllib", b"usemtl",
+    b"cstype", b"deg", b"bmat", b"step", b"curv", b"curv2", b"surf", b"parm", b"trim", b"hole",
+    b"scrv", b"sp", b"end", b"con", b"mg", b"bevel", b"c_interp", b"d_interp", b"lod",
+    b"shadow_obj", b"trace_obj", b"ctech", b"stech", b"maplib", b"usemap",
+}
+_ASCII_STL = re.compile(rb"^\s*(#[^\n]*\n\s*)*solid\b", re.IGNORECASE)
+
+
+class TooManyFacesError(Exception):
+    """
+    Levantada quando o cabeçalho do modelo declara mais faces que o máximo permitido.
+    Os endpoints a respondem com 413, como os uploads acima do tamanho máximo.
+    """
+
+    def __init__(self, faces: int, max_faces: int):
+        self.message = f"O modelo declara {faces} faces, acima do máximo de {max_faces}."
+        super().__init__(self.message)
+        self.faces = faces
+        self.max_faces = max_faces
+
+
+def check_mesh_header(
+    head: bytes,
+    file_type: Optional[str],
+    file_name: str,
+    size: Optional[int] = None,
+    max_faces: Optional[int] = None,
+) -> None:
+    """
+    Pré-validação barata do início do arquivo (`head`, os primeiros `HEADER_SNIFF_SIZE` bytes),
+    antes de qualquer parsing: recusa STL binário truncado ou com contagem de triângulos
+    incompatível com o tamanho, STL ASCII e OBJ que não são texto, e modelos acima do teto
+    de faces. `size` é o tamanho total, quando já conhecido; sem ele, só o que o cabeçalho
+    permite concluir é verificado. Formatos sem verificação específica passam direto.
+
+    Levanta `ValueError` (400) para conteúdo inválido e `TooManyFacesError` (413).
+    """
+    max_faces = max_faces or MAX_MESH_FACES
+    if file_type == "stl":
+        _check_stl(head, file_name, size, max_faces)
+    elif file_type == "obj":
+        _check_obj(head, file_name, size)
+
+
+def _invalid(file_name: str, reason: str) -> ValueError:
+    return ValueError(f"O arquivo '{file_name}' não contém uma malha 3D válida: {reason}.")
+
+
+def _check_stl(head: bytes, file_name: str, size: Optional[int], max_faces: int) -> None:
+    count = struct.unpack_from("<I", head, 80)[0] if len(head) >= STL_HEADER_SIZE else None
+    expected = STL_HEADER_SIZE + count * STL_TRIANGLE_SIZE if count is not None else None
+    # STL ASCII: texto começando por "solid" (o trimesh aceita comentários antes). Alguns
+    # exportadores gravam "solid" no cabeçalho de STL binário; o tamanho exato desempata.
+    if (size is None or size != expected) and b"\x00" not in head and _ASCII_STL.match(head):
+        return
+
+    if count is None:
+        raise _invalid(file_name, f"STL com {len(head)} bytes, menor que o cabeçalho de um STL binário")
+    if count == 0:
+        raise _invalid(file_name, "o STL binário não declara nenhum triângulo")
+    if count > max_faces:
+        raise TooManyFacesError(count, max_faces)
+    if size is not None and size != expected:
+        raise _invalid(
+            file_name,
+            f"o cabeçalho do STL binário declara {count} triângulos ({expected} bytes), mas o arquivo tem {size} bytes"
+        )
+
+
+def _check_obj(head: bytes, file_name: str, size: Optional[int]) -> None:
+    if b"\x00" in head:
+        raise _invalid(file_name, "o OBJ não é um arquivo de texto")
+
+    complete = size is not None and size <= len(head)
+    lines = head.splitlines()
+    if not complete and lines:
+        lines = lines[:-1]  # a última linha pode ter sido cortada no meio
+
+    keywords = [line.split(None, 1)[0] for line in lines if line.strip() and not line.lstrip().startswith(b"#")]
+    # Basta a primeira instrução ser de OBJ: linhas desconhecidas depois dela são toleradas pelo trimesh.
+    if keywords and keywords[0] not in OBJ_KEYWORDS:
+        raise _invalid(file_name, f"o arquivo não começa com uma instrução de OBJ ('{keywords[0][:20].decode('latin-1')}')")
+    if complete and b"f" not in keywords:
+        raise _invalid(file_name, "o OBJ não declara nenhuma face")
@@ -0,0 +1,189 @@
+# printqa/workers.py
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def initialize_worker() -> None:
+    """
+    Inicializador dos processos de análise (deste pool e do pool da reanálise): importa o
+    módulo de análise (numpy, trimesh) uma vez por processo, antes da primeira análise, em
+    vez de cobrar esse custo dela.
+    """
+    from . import analysis  # noqa: F401
+
+
+class AnalysisQueueFullError(RuntimeError):
+    """Levantada quando a fila de análises atingiu sua capacidade máxima."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("A fila de análise está cheia. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class AnalysisWorkerLostError(RuntimeError):
+    """
+    Levantada quando um processo do pool morre durante a análise (ex.: OOM killer). O pool
+    é recriado para as próximas submissões; a análise interrompida pode ser reenviada.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("O processo de análise foi interrompido. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class AnalysisExecutor:
+    """
+    Executa as análises de malha (CPU-bound) em um pool de processos,
+    liberando o event loop para os demais endpoints.
+
+    A capacidade total é `max_workers + queue_size`: além das análises em execução,
+    no máximo `queue_size` podem aguardar na fila. Ao atingir o limite, novas
+    submissões falham imediatamente com `AnalysisQueueFullError`.
+
+    Com `prewarm=True`, cada processo importa as dependências pesadas da análise ao ser
+    criado; `warm_up()` cria todos os processos de uma vez, em segundo plano.
+
+    Se um processo morre (o pool fica `BrokenProcessPool`), o pool é recriado: as análises
+    em andamento falham com `AnalysisWorkerLostError` e as próximas vão para o pool novo.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        retry_after: int = 5,
+        start_method: str = "spawn",
+        prewarm: bool = False,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = self.max_workers * 4 if queue_size is None else queue_size
+        self.retry_after = retry_after
+        self.prewarm = prewarm
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool_lock = threading.Lock()
+        self._pool = self._create_pool()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=initialize_worker if self.prewarm else None,
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Troca o pool quebrado por um novo (uma vez só, mesmo com várias análises falhando juntas)."""
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            logger.error("Um processo de análise morreu; recriando o pool de análise.")
+            self._pool = self._create_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+        if self.prewarm:
+            self.warm_up()
+
+    @classmethod
+    def from_env(cls) -> "AnalysisExecutor":
+        """Cria o executor a partir das variáveis de ambiente `ANALYSIS_*`."""
+        workers = os.getenv("ANALYSIS_WORKERS")
+        queue_size = os.getenv("ANALYSIS_QUEUE_SIZE")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            queue_size=int(queue_size) if queue_size else None,
+            retry_after=int(os.getenv("ANALYSIS_RETRY_AFTER", "5")),
+            start_method=os.getenv("ANALYSIS_START_METHOD", "spawn"),
+            prewarm=os.getenv("ANALYSIS_PREWARM", "true").lower() in ("1", "true", "yes", "on"),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Número de análises em execução ou aguardando na fila."""
+        return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        """Análises em execução: o pool atende a fila em ordem, até `max_workers` por vez."""
+        return min(self._pending, self.max_workers)
+
+    @property
+    def queued(self) -> int:
+        """Análises aguardando um processo livre."""
+        return max(self._pending - self.max_workers, 0)
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """Submete `func(*args)` ao pool, ou levanta `AnalysisQueueFullError` se não houver vaga."""
+        if not self._slots.acquire(blocking=False):
+            raise AnalysisQueueFullError(self.retry_after)
+
+        with self._lock:
+            self._pending += 1
+        pool = self._pool
+        try:
+            try:
+                future = pool.submit(func, *args)
+            except BrokenProcessPool:
+                # O pool quebrou depois da última análise: a submissão vai para um pool novo.
+                self._replace_pool(pool)
+                pool = self._pool
+                future = pool.submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        # A vaga só é liberada quando o processo termina, mesmo que quem aguarda seja cancelado.
+        future.add_done_callback(lambda done: self._finished(done, pool))
+        return future
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Versão assíncrona de `submit`: aguarda o resultado sem bloquear o event loop.
+        Levanta `AnalysisWorkerLostError` se o processo da análise morrer.
+        """
+        try:
+            return await asyncio.wrap_future(self.submit(func, *args))
+        except BrokenProcessPool as e:
+            raise AnalysisWorkerLostError(self.retry_after) from e
+
+    async def run_when_available(self, func: Callable[..., Any], *args: Any, retry_interval: float = 0.5) -> Any:
+        """
+        Como `run`, mas para trabalho já aceito (jobs, itens de um lote): em vez de falhar
+        com a fila cheia, aguarda `retry_interval` segundos e tenta novamente.
+        """
+        while True:
+            try:
+                return await self.run(func, *args)
+            except AnalysisQueueFullError:
+                await asyncio.sleep(retry_interval)
+
+    def warm_up(self) -> List[Future]:
+        """
+        Inicia todos os processos do pool sem ocupar vagas da fila. Retorna as futures das
+        tarefas de aquecimento, sem aguardá-las: a aplicação sobe enquanto os processos carregam.
+        """
+        return [self._pool.submit(initialize_worker) for _ in range(self.max_workers)]
+
+    def shutdown(self, wait: bool = True) -> None:
+        logger.info("Encerrando o pool de análise.")
+        with self._pool_lock:
+            pool = self._pool
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _finished(self, future: Future, pool: ProcessPoolExecutor) -> None:
+        self._release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._replace_pool(pool)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
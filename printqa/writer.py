@@ -0,0 +1,127 @@
+# printqa/writer.py
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import schemas
+from .cache import ResultCache
+from .database import run_db
+from .metrics import observe_stages
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWriter:
+    """
+    Persiste os resultados de análise, opcionalmente em modo write-behind.
+
+    Com `batch_size <= 1` (padrão), cada resultado é gravado na hora pela sessão da
+    requisição, via `ResultCache.store`. Com `batch_size > 1`, os resultados entram em um
+    buffer que é gravado com um único insert em massa (`ResultCache.store_many`) quando
+    acumula `batch_size` linhas ou quando o mais antigo espera `batch_delay` segundos.
+    Quem chama continua recebendo o resultado persistido, com id, mas o custo do commit é
+    dividido pelo lote: sob carga alta, a vazão deixa de depender da latência do banco.
+    """
+
+    def __init__(
+        self,
+        result_cache: ResultCache,
+        session_factory: Callable[[], Session],
+        batch_size: int = 0,
+        batch_delay: float = 0.02,
+    ):
+        self._result_cache = result_cache
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._pending: List[Tuple[schemas.AnalysisResultCreate, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls, result_cache: ResultCache, session_factory: Callable[[], Session]) -> "ResultWriter":
+        """Cria o writer a partir de `RESULT_WRITE_BATCH_SIZE` e `RESULT_WRITE_BATCH_DELAY_MS`."""
+        return cls(
+            result_cache,
+            session_factory,
+            batch_size=int(os.getenv("RESULT_WRITE_BATCH_SIZE", "0")),
+            batch_delay=int(os.getenv("RESULT_WRITE_BATCH_DELAY_MS", "20")) / 1000,
+        )
+
+    @property
+    def buffered(self) -> bool:
+        return self.batch_size > 1
+
+    @property
+    def pending(self) -> int:
+        """Número de resultados no buffer aguardando gravação."""
+        return len(self._pending)
+
+    async def store(self, db: Union[Session, AsyncSession], analysis: schemas.AnalysisResultCreate) -> schemas.AnalysisResult:
+        """
+        Grava o resultado (direto ou pelo buffer) e retorna o registro persistido. O tempo até a
+        gravação entra como etapa `db_insert` nos tempos do resultado retornado e nas métricas.
+        """
+        timer = StageTimer(analysis.stage_timings)
+        start = time.perf_counter()
+        result = await self._store(db, analysis)
+        timer.add("db_insert", time.perf_counter() - start)
+        observe_stages(timer.timings)
+        return result.model_copy(update={"stage_timings": timer.timings})
+
+    async def _store(self, db: Union[Session, AsyncSession], analysis: schemas.AnalysisResultCreate) -> schemas.AnalysisResult:
+        if not self.buffered:
+            return await run_db(db, self._result_cache.store, analysis)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((analysis, future))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.batch_delay, self.flush)
+        # O resultado é gravado mesmo que quem aguarda seja cancelado.
+        return await asyncio.shield(future)
+
+    def flush(self) -> None:
+        """Agenda a gravação imediata do que estiver no buffer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def close(self) -> None:
+        """Grava o que restou no buffer e aguarda as gravações em andamento."""
+        self.flush()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _write(self, batch: List[Tuple[schemas.AnalysisResultCreate, asyncio.Future]]) -> None:
+        try:
+            results = await run_in_threadpool(self._store_many, [analysis for analysis, _ in batch])
+        except Exception as e:
+            logger.exception(f"Falha ao gravar um lote de {len(batch)} resultados: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _store_many(self, analyses: List[schemas.AnalysisResultCreate]) -> List[schemas.AnalysisResult]:
+        with self._session_factory() as db:
+            return self._result_cache.store_many(db, analyses)
@@ -0,0 +1,86 @@
+# scripts/benchmark_startup.py
+
+"""
+Mede o tempo de importação da API (`python -X importtime`) em um processo limpo e lista os
+módulos mais caros. Falha (código de saída 1) se a importação carregar dependências que
+devem ficar para o primeiro uso (numpy, trimesh, módulo de análise) ou se passar do
+orçamento informado, para que regressões no cold start sejam pegas na CI.
+
+Uso:
+    python -m scripts.benchmark_startup
+    python -m scripts.benchmark_startup --module printqa.main --top 15 --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Dependências pesadas que a API só deve carregar nos processos de análise.
+LAZY_MODULES = ("numpy", "trimesh", "scipy", "printqa.analysis", "printqa.outofcore")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure_imports(module: str) -> Dict[str, Tuple[int, int, int]]:
+    """
+    Importa `module` em um interpretador novo e retorna, por módulo importado,
+    (tempo próprio em µs, tempo acumulado em µs, profundidade).
+    A DATABASE_URL é removida do ambiente: importar a aplicação não pode depender do banco.
+    """
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha ao importar '{module}':\n{completed.stderr}")
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return timings
+
+
+def check(timings: Dict[str, Tuple[int, int, int]], module: str, budget_ms: float) -> List[str]:
+    """Retorna as violações encontradas: módulos pesados importados e orçamento estourado."""
+    problems = [
+        f"'{name}' foi importado na inicialização; importe-o no primeiro uso."
+        for name in LAZY_MODULES if name in timings
+    ]
+    total_ms = timings[module][1] / 1000
+    if budget_ms and total_ms > budget_ms:
+        problems.append(f"A importação de '{module}' levou {total_ms:.0f} ms (orçamento: {budget_ms:.0f} ms).")
+    return problems
+
+
+def run(module: str, top: int, budget_ms: float) -> int:
+    timings = measure_imports(module)
+    print(f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo")
+    ranked = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us, depth) in ranked[:top]:
+        print(f"{cumulative_us / 1000:>15.1f} {self_us / 1000:>13.1f}  {'  ' * depth}{name}")
+
+    problems = check(timings, module, budget_ms)
+    for problem in problems:
+        print(f"ERRO: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="printqa.main", help="Módulo cuja importação é medida.")
+    parser.add_argument("--top", type=int, default=20, help="Quantidade de módulos listados.")
+    parser.add_argument("--budget-ms", type=float, default=0,
+                        help="Tempo máximo de importação (ms); 0 desativa a verificação.")
+    args = parser.parse_args()
+    sys.exit(run(args.module, args.top, args.budget_ms))
+
+
+if __name__ == "__main__":
+    main()
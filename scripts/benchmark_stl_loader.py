@@ -0,0 +1,73 @@
+# scripts/benchmark_stl_loader.py
+
+"""
+Compara o leitor vetorizado de STL binário (`printqa.analysis.load_binary_stl`) com o
+carregamento genérico do trimesh, medindo tempo de parsing e pico de memória.
+
+Uso:
+    python -m scripts.benchmark_stl_loader
+    python -m scripts.benchmark_stl_loader --faces 10000 100000 --repeat 5
+"""
+
+import argparse
+import io
+import math
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import trimesh
+
+from printqa.analysis import load_binary_stl
+
+
+def make_binary_stl(target_faces: int) -> bytes:
+    """Gera uma esfera UV com aproximadamente `target_faces` faces e a exporta como STL binário."""
+    count = max(3, int(math.sqrt(target_faces / 4)))
+    sphere = trimesh.creation.uv_sphere(count=[count, count])
+    return sphere.export(file_type="stl")
+
+
+def _measure(func: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """Retorna o melhor tempo (s) entre `repeat` execuções e o pico de memória (MiB) de uma execução."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def run(face_targets, repeat: int) -> None:
+    print(f"{'faces':>10} {'trimesh (s)':>12} {'vetorizado (s)':>15} {'ganho':>7} {'trimesh (MiB)':>14} {'vetorizado (MiB)':>17}")
+    for target in face_targets:
+        data = make_binary_stl(target)
+        faces = (len(data) - 84) // 50
+
+        trimesh_time, trimesh_peak = _measure(
+            lambda: trimesh.load_mesh(io.BytesIO(data), file_type="stl"), repeat
+        )
+        fast_time, fast_peak = _measure(lambda: load_binary_stl(data), repeat)
+
+        print(
+            f"{faces:>10} {trimesh_time:>12.4f} {fast_time:>15.4f} {trimesh_time / fast_time:>6.1f}x"
+            f" {trimesh_peak:>14.1f} {fast_peak:>17.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faces", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Quantidades aproximadas de faces dos modelos gerados.")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medição (vale o melhor tempo).")
+    args = parser.parse_args()
+    run(args.faces, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
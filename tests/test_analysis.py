@@ -1,12 +1,14 @@
 # tests/test_analysis.py
 
 import pytest
+import io
 import os
 import logging
 from unittest.mock import patch, MagicMock
 
 import trimesh
-from printqa.analysis import analyze_file
+import numpy as np
+from printqa.analysis import STL_TRIANGLE_DTYPE, analyze_file, analyze_bytes, analyze_stream, is_binary_stl, load_binary_stl, check_edges, mesh_metrics
 
 pytestmark = pytest.mark.unit
 
@@ -44,53 +46,242 @@ def test_analyze_file_raises_value_error_on_load_exception_non_existent_file(cap
             analyze_file(non_existent_path)
         assert f"Falha ao carregar o arquivo '{non_existent_path}': [Errno 2] No such file or directory" in caplog.text
 
-def test_analyze_file_handles_empty_trimesh_scene_mocked():
+def test_analyze_file_handles_empty_trimesh_scene_mocked(cube_perfect_path: str):
     """ Testa se analyze_file lida com cenas Trimesh vazias, levantando ValueError.
         COMENTANDO O USO DE MOCK: Necessário para criar um objeto `trimesh.Scene` artificial
-        que `trimesh.load_mesh` retornaria, sem precisar de um arquivo real no disco
+        que `trimesh.load` retornaria, sem precisar de um arquivo real no disco
         para simular este cenário específico. Também mocka `os.path.getsize` para evitar `FileNotFoundError`.
     """
     mock_scene = MagicMock(spec=trimesh.Scene)
     mock_scene.geometry = {} # Simula uma cena sem geometria
 
     with patch('os.path.getsize', return_value=100): # Mock os.path.getsize para evitar FileNotFoundError
-        with patch('trimesh.load_mesh', return_value=mock_scene): # Mock trimesh.load_mesh para retornar cena vazia
-            with pytest.raises(ValueError, match="Cena 3D vazia, nenhum modelo para analisar."):
-                analyze_file("dummy_empty_scene.stl")
+        with patch('trimesh.load', return_value=mock_scene): # Mock trimesh.load para retornar cena vazia
+            with pytest.raises(ValueError, match="não contém uma malha 3D válida"):
+                analyze_file(cube_perfect_path) # Arquivo real: o conteúdo é mapeado em memória antes do load
 
-def test_analyze_file_concatenates_trimesh_scene_with_geometry_mocked(cube_perfect_path: str):
-    """
-    Testa se analyze_file concatena cenas Trimesh com geometria.
-    Cobre 'mesh = trimesh.util.concatenate(list(mesh.geometry.values()))'.    
-    COMENTANDO O USO DE MOCK: Necessário para simular uma `trimesh.Scene` com geometria
-    e verificar que `trimesh.util.concatenate` é chamado. Mocka `os.path.getsize`
-    e o comportamento da malha resultante da concatenação.
-    """
-    # Mock de uma malha que estaria dentro da cena
-    mock_sub_mesh = MagicMock(spec=trimesh.Trimesh)
-    mock_sub_mesh.is_watertight = True
-    mock_sub_mesh.is_winding_consistent = True
-    mock_sub_mesh.vertices = [0, 0, 0, 1, 1, 1]
-    mock_sub_mesh.faces = [[0, 1, 2], [1, 2, 3]]
-
-    # Mock da cena Trimesh
-    mock_scene = MagicMock(spec=trimesh.Scene)
-    mock_scene.geometry = {'mesh_part_1': mock_sub_mesh} # Simula uma cena com uma malha
-
-    # Mock da função trimesh.load_mesh para retornar a mock_scene
-    with patch('os.path.getsize', return_value=1000): # Mock os.path.getsize
-        with patch('trimesh.load_mesh', return_value=mock_scene):
-            # Mock da função trimesh.util.concatenate para verificar sua chamada
-            # e retornar uma malha válida (o mock_sub_mesh neste caso, pois a concatenação "resulta" em uma malha)
-            with patch('trimesh.util.concatenate', return_value=mock_sub_mesh) as mock_concatenate:
-                result = analyze_file(cube_perfect_path)
-
-                # Verifica se trimesh.util.concatenate foi chamado com os valores corretos
-                mock_concatenate.assert_called_once_with([mock_sub_mesh])
-                
-                # Verifica as propriedades da malha resultante (que vem do mock_sub_mesh)
-                assert result["is_watertight"] is True
-                assert result["has_inverted_faces"] is False
-                assert result["vertices_count"] == len(mock_sub_mesh.vertices)
-                assert result["faces_count"] == len(mock_sub_mesh.faces)
-                assert result["analysis_duration"] >= 0 
\ No newline at end of file
+def _assembly() -> trimesh.Scene:
+    """Cena com uma caixa fechada, uma caixa aberta e uma segunda instância (deslocada) da caixa fechada."""
+    closed = trimesh.creation.box(extents=[1, 1, 1])
+    opened = trimesh.creation.box(extents=[2, 2, 2])
+    opened = trimesh.Trimesh(vertices=opened.vertices, faces=opened.faces[:-2], process=False)
+    scene = trimesh.Scene()
+    scene.add_geometry(closed, geom_name="caixa", node_name="caixa")
+    scene.add_geometry(opened, geom_name="aberta", node_name="aberta",
+                       transform=trimesh.transformations.translation_matrix([5, 0, 0]))
+    scene.add_geometry(closed, geom_name="caixa", node_name="caixa_2",
+                       transform=trimesh.transformations.translation_matrix([0, 0, 10]))
+    return scene
+
+def test_analyze_scene_per_body_without_concatenation():
+    """Verifica se uma cena é analisada corpo a corpo, com os resultados combinados e o detalhamento por corpo."""
+    data = _assembly().export(file_type="glb")
+
+    with patch('trimesh.util.concatenate') as mock_concatenate:
+        result = analyze_bytes(data, "glb", "montagem.glb")
+    mock_concatenate.assert_not_called()
+
+    bodies = {body["name"]: body for body in result["bodies"]}
+    assert set(bodies) == {"caixa", "aberta", "caixa_2"}
+    assert bodies["caixa"]["is_watertight"] and bodies["caixa_2"]["is_watertight"]
+    assert not bodies["aberta"]["is_watertight"]
+    assert bodies["aberta"]["boundary_edges_count"] > 0
+
+    assert result["is_watertight"] is False
+    assert result["has_inverted_faces"] is False
+    assert result["faces_count"] == 12 + 10 + 12
+    assert result["shells_count"] == 3
+    assert result["boundary_edges_count"] == bodies["aberta"]["boundary_edges_count"]
+    assert result["volume"] == pytest.approx(sum(body["volume"] for body in bodies.values()))
+    # Caixa delimitadora da montagem: x de -0,5 a 6, z de -1 a 10,5 (instâncias posicionadas pelo grafo).
+    assert [result["bounding_box_x"], result["bounding_box_y"], result["bounding_box_z"]] == pytest.approx([6.5, 2.0, 11.5])
+
+def test_analyze_scene_with_single_body_has_no_breakdown():
+    scene = trimesh.Scene()
+    scene.add_geometry(trimesh.creation.box(), geom_name="unica")
+
+    result = analyze_bytes(scene.export(file_type="glb"), "glb", "unica.glb")
+
+    assert result["bodies"] is None
+    assert result["is_watertight"] is True
+    assert result["faces_count"] == 12
+
+@pytest.mark.parametrize("fixture_name", ["cube_perfect_path", "cube_open_path", "cube_inverted_path"])
+def test_analyze_bytes_matches_analyze_file(fixture_name: str, request):
+    """Verifica se a análise em memória produz os mesmos resultados que a análise do arquivo."""
+    path = request.getfixturevalue(fixture_name)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    from_file = analyze_file(path)
+    from_bytes = analyze_bytes(memoryview(data), "stl", "upload.stl")
+
+    for key in ("is_watertight", "has_inverted_faces", "vertices_count", "faces_count", "file_size"):
+        assert from_bytes[key] == from_file[key]
+
+def test_analyze_stream_reads_open_file(cube_inverted_path: str):
+    """Verifica se um arquivo já aberto pode ser analisado diretamente como stream."""
+    with open(cube_inverted_path, "rb") as f:
+        result = analyze_stream(f, "stl", "cubo_invertido.stl")
+    assert result["has_inverted_faces"] is True
+
+def test_analyze_bytes_raises_value_error_for_unknown_format():
+    """Verifica se um formato não suportado resulta em ValueError com o nome informado."""
+    with pytest.raises(ValueError, match="O arquivo 'modelo.xyz' é inválido ou está vazio."):
+        analyze_bytes(b"conteudo qualquer", "xyz", "modelo.xyz")
+
+@pytest.mark.parametrize("fixture_name", ["cube_path", "cube_open_path", "cube_inverted_path"])
+def test_load_binary_stl_matches_trimesh(fixture_name: str, request):
+    """Verifica se o leitor vetorizado de STL binário produz a mesma malha que o trimesh."""
+    path = request.getfixturevalue(fixture_name)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert is_binary_stl(data)
+
+    vertices, faces = load_binary_stl(data)
+    fast = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    reference = trimesh.load_mesh(path)
+
+    assert len(fast.vertices) == len(reference.vertices)
+    assert len(fast.faces) == len(reference.faces)
+    assert fast.is_watertight == reference.is_watertight
+    assert fast.is_winding_consistent == reference.is_winding_consistent
+    assert np.allclose(np.sort(fast.vertices, axis=0), np.sort(reference.vertices, axis=0))
+
+def test_load_binary_stl_merges_shared_vertices_of_generated_sphere():
+    sphere = trimesh.creation.icosphere(subdivisions=3)
+    vertices, faces = load_binary_stl(sphere.export(file_type="stl"))
+    assert len(vertices) == len(sphere.vertices)
+    assert len(faces) == len(sphere.faces)
+
+def _noisy_box_stl() -> bytes:
+    """Caixa com um canto compartilhado deslocado em 1e-12 num só triângulo (ruído de CAD)."""
+    box = trimesh.creation.box()
+    box.apply_translation([0.5, 0.5, 0.5])
+    data = bytearray(box.export(file_type="stl"))
+    triangles = np.frombuffer(data, dtype=STL_TRIANGLE_DTYPE, count=len(box.faces), offset=84)
+    face, corner, axis = np.argwhere(triangles["vertices"] == 0.0)[0]
+    triangles["vertices"][face, corner, axis] = 1e-12
+    return bytes(data)
+
+def test_load_binary_stl_merges_vertices_within_trimesh_tolerance():
+    """Verifica se vértices a menos de `tol.merge` são unificados, como no carregamento do trimesh."""
+    data = _noisy_box_stl()
+    reference = trimesh.load_mesh(io.BytesIO(data), file_type="stl")
+
+    result = analyze_bytes(data, "stl", "caixa.stl")
+    assert reference.is_watertight is True
+    assert (result["is_watertight"], result["boundary_edges_count"]) == (True, 0)
+    assert result["vertices_count"] == len(reference.vertices) == 8
+
+def test_load_binary_stl_drops_non_finite_triangles(cube_path: str):
+    """Verifica se triângulos com coordenadas NaN/inf são descartados, como no trimesh."""
+    with open(cube_path, "rb") as f:
+        data = bytearray(f.read())
+    # Corrompe a primeira coordenada do primeiro triângulo (após cabeçalho + normal).
+    data[84 + 12:84 + 16] = np.array([np.nan], dtype="<f4").tobytes()
+
+    _, faces = load_binary_stl(bytes(data))
+    assert len(faces) == 11
+
+def test_is_binary_stl_rejects_ascii_and_truncated_data(cube_perfect_path: str, cube_path: str):
+    with open(cube_perfect_path, "rb") as f:
+        assert not is_binary_stl(f.read())
+    with open(cube_path, "rb") as f:
+        assert not is_binary_stl(f.read()[:-10])
+    assert not is_binary_stl(b"curto")
+
+def _generated_meshes():
+    """Malhas sintéticas cobrindo os casos relevantes para as verificações de arestas."""
+    sphere = trimesh.creation.icosphere(subdivisions=3)
+    flipped = sphere.faces.copy()
+    flipped[:5] = flipped[:5, ::-1]
+    two_bodies = trimesh.util.concatenate([sphere, trimesh.creation.box().apply_translation([5, 0, 0])])
+    return {
+        "fechada": (sphere.vertices, sphere.faces),
+        "com_furos": (sphere.vertices, sphere.faces[7:]),
+        "faces_invertidas": (sphere.vertices, flipped),
+        "face_duplicada": (sphere.vertices, np.vstack([sphere.faces, sphere.faces[:1]])),
+        "face_unica": (sphere.vertices, sphere.faces[:1]),
+        "faces_degeneradas": (sphere.vertices, np.vstack([sphere.faces[:40], [[0, 0, 1], [0, 1, 0]]])),
+        "dois_corpos": (two_bodies.vertices, two_bodies.faces),
+    }
+
+@pytest.mark.parametrize("case", list(_generated_meshes()))
+def test_check_edges_agrees_with_trimesh(case: str):
+    """Verifica se o motor de arestas concorda com is_watertight/is_winding_consistent do trimesh."""
+    vertices, faces = _generated_meshes()[case]
+    reference = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+    is_watertight, is_winding_consistent = check_edges(faces, len(vertices))
+
+    assert is_watertight == reference.is_watertight
+    assert is_winding_consistent == reference.is_winding_consistent
+
+@pytest.mark.parametrize("fixture_name", ["cube_path", "cube_perfect_path", "cube_open_path", "cube_inverted_path"])
+def test_check_edges_agrees_with_trimesh_on_fixtures(fixture_name: str, request):
+    reference = trimesh.load_mesh(request.getfixturevalue(fixture_name))
+    assert check_edges(reference.faces, len(reference.vertices)) == (
+        reference.is_watertight, reference.is_winding_consistent
+    )
+
+def test_check_edges_on_empty_faces():
+    assert check_edges(np.empty((0, 3), dtype=np.int64), 0) == (False, False)
+
+def test_mesh_metrics_on_closed_sphere():
+    sphere = trimesh.creation.icosphere(subdivisions=3)
+    metrics = mesh_metrics(sphere.vertices, sphere.faces)
+
+    assert metrics["is_watertight"] is True
+    assert metrics["has_inverted_faces"] is False
+    assert metrics["degenerate_faces_count"] == 0
+    assert metrics["duplicate_faces_count"] == 0
+    assert metrics["non_manifold_edges_count"] == 0
+    assert metrics["boundary_edges_count"] == 0
+    assert metrics["shells_count"] == 1
+    assert metrics["volume"] == pytest.approx(sphere.volume)
+    assert [metrics["bounding_box_x"], metrics["bounding_box_y"], metrics["bounding_box_z"]] == pytest.approx(sphere.extents)
+
+def test_mesh_metrics_counts_defects():
+    """Verifica as contagens de defeitos em malhas sintéticas com problemas conhecidos."""
+    meshes = _generated_meshes()
+
+    vertices, faces = meshes["com_furos"]
+    reference = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    assert mesh_metrics(vertices, faces)["boundary_edges_count"] == len(trimesh.grouping.group_rows(reference.edges_sorted, require_count=1))
+
+    vertices, faces = meshes["face_duplicada"]
+    metrics = mesh_metrics(vertices, faces[:, ::-1])
+    assert metrics["duplicate_faces_count"] == 1
+    assert metrics["non_manifold_edges_count"] == 3
+
+    vertices, faces = meshes["faces_degeneradas"]
+    assert mesh_metrics(vertices, faces)["degenerate_faces_count"] == 2
+
+    vertices, faces = meshes["dois_corpos"]
+    metrics = mesh_metrics(vertices, faces)
+    assert metrics["shells_count"] == 2
+    assert metrics["volume"] == pytest.approx(trimesh.Trimesh(vertices, faces, process=False).volume)
+
+def test_mesh_metrics_ignores_unreferenced_vertices():
+    box = trimesh.creation.box()
+    vertices = np.vstack([box.vertices, [[100.0, 100.0, 100.0]]])
+    metrics = mesh_metrics(vertices, box.faces)
+
+    assert metrics["shells_count"] == 1
+    assert [metrics["bounding_box_x"], metrics["bounding_box_y"], metrics["bounding_box_z"]] == pytest.approx([1.0, 1.0, 1.0])
+
+def test_analyze_file_reports_defect_metrics(cube_open_path: str):
+    result = analyze_file(cube_open_path)
+    reference = trimesh.load_mesh(cube_open_path)
+
+    assert result["boundary_edges_count"] > 0
+    assert result["shells_count"] >= 1
+    assert result["bounding_box_x"] == pytest.approx(reference.extents[0])
+
+def test_analyze_file_reports_stage_timings(cube_perfect_path: str):
+    """Verifica se a análise registra o tempo (ms) de cada etapa, sem a de concatenação para malhas simples."""
+    timings = analyze_file(cube_perfect_path)["stage_timings"]
+
+    assert set(timings) == {"parse", "watertight", "winding", "metrics"}
+    assert all(value >= 0 for value in timings.values())
@@ -1,11 +1,18 @@
 # tests/test_api.py
 
 import pytest
+import asyncio
 import io
+import os
+import trimesh
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
-from printqa import crud
-from unittest.mock import patch
+from printqa import crud, database, models
+from printqa.main import lifespan
+from unittest.mock import patch, AsyncMock
+from printqa.profiling import ProfilingConfig
+from printqa.workers import AnalysisQueueFullError, AnalysisWorkerLostError
 
 pytestmark = [pytest.mark.api, pytest.mark.integration]
 
@@ -38,12 +45,241 @@ def test_upload_invalid_content_file_returns_400(client: TestClient, file_load_f
     assert response.status_code == 400
     assert "não contém uma malha 3D válida" in response.json()["detail"]
 
-def test_analyze_mesh_internal_server_error(client, cube_perfect_path):
+def test_analyze_mesh_internal_server_error(client, cube_open_path):
     """ Testa se um erro 500 é retornado quando uma exceção inesperada ocorre. Isso cobre o bloco 'except Exception' em main.py."""
     
-    with patch("printqa.main.analyze_file", side_effect=Exception("Crash inesperado!")):
-        with open(cube_perfect_path, "rb") as f:
+    with patch("printqa.main.crud.create_analysis_result", side_effect=Exception("Crash inesperado!")):
+        with open(cube_open_path, "rb") as f:
             response = client.post("/analyze_mesh/", files={"file": ("cube.stl", f, "model/stl")})
             
     assert response.status_code == 500
-    assert response.json() == {"detail": "Ocorreu um erro interno inesperado ao processar o arquivo."}
\ No newline at end of file
+    assert response.json() == {"detail": "Ocorreu um erro interno inesperado ao processar o arquivo."}
+
+def test_analyze_mesh_queue_full_returns_503(client: TestClient, cube_inverted_path: str):
+    """Testa se a fila de análise cheia retorna 503 com o cabeçalho Retry-After."""
+    executor = client.app.state.analysis_executor
+    with patch.object(executor, "run", AsyncMock(side_effect=AnalysisQueueFullError(retry_after=7))):
+        with open(cube_inverted_path, "rb") as f:
+            response = client.post("/analyze_mesh/", files={"file": ("cube.stl", f, "model/stl")})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert "fila de análise está cheia" in response.json()["detail"]
+
+def test_analyze_mesh_lost_worker_returns_503(client: TestClient, cube_inverted_path: str):
+    """Testa se a morte do processo de análise retorna 503 em vez de 500."""
+    executor = client.app.state.analysis_executor
+    with patch.object(executor, "run", AsyncMock(side_effect=AnalysisWorkerLostError(retry_after=7))):
+        with open(cube_inverted_path, "rb") as f:
+            response = client.post("/analyze_mesh/", files={"file": ("cube.stl", f, "model/stl")})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+def test_reupload_is_served_from_cache(client: TestClient, cube_path: str):
+    """Testa se o reenvio do mesmo conteúdo retorna o resultado armazenado sem nova análise."""
+    with open(cube_path, "rb") as f:
+        first = client.post("/analyze_mesh/", files={"file": ("cube.stl", f, "model/stl")})
+    assert first.status_code == 200
+    assert first.json()["cache_hit"] is False
+    assert first.json()["content_hash"] is not None
+
+    executor = client.app.state.analysis_executor
+    with patch.object(executor, "run", AsyncMock(side_effect=AssertionError("não deveria analisar"))):
+        with open(cube_path, "rb") as f:
+            second = client.post("/analyze_mesh/", files={"file": ("copia.stl", f, "model/stl")})
+
+    assert second.status_code == 200
+    assert second.json()["cache_hit"] is True
+    assert second.json()["id"] == first.json()["id"]
+
+def test_upload_larger_than_limit_returns_413(client: TestClient, cube_perfect_path: str):
+    """Testa se um arquivo acima do limite configurado é recusado com 413."""
+    with patch("printqa.uploads.MAX_UPLOAD_SIZE", 100):
+        with open(cube_perfect_path, "rb") as f:
+            response = client.post("/analyze_mesh/", files={"file": ("big.stl", f, "model/stl")})
+
+    assert response.status_code == 413
+    assert "tamanho máximo de 100 bytes" in response.json()["detail"]
+
+def test_truncated_binary_stl_returns_400(client: TestClient):
+    """Testa se um STL binário truncado é recusado pela pré-validação, sem chegar à análise."""
+    data = trimesh.creation.box(extents=[19, 1, 1]).export(file_type="stl")[:-20]
+    with patch("printqa.analysis.analyze_bytes") as analyze:
+        response = client.post("/analyze_mesh/", files={"file": ("truncado.stl", data, "model/stl")})
+
+    assert response.status_code == 400
+    assert "declara 12 triângulos" in response.json()["detail"]
+    analyze.assert_not_called()
+
+def test_stl_above_face_ceiling_returns_413(client: TestClient):
+    """Testa se um STL binário com mais faces que o teto é recusado com 413 pelo cabeçalho."""
+    data = trimesh.creation.box(extents=[19, 1, 1]).export(file_type="stl")
+    with patch("printqa.validation.MAX_MESH_FACES", 10):
+        response = client.post("/analyze_mesh/", files={"file": ("grande.stl", data, "model/stl")})
+
+    assert response.status_code == 413
+    assert "12 faces, acima do máximo de 10" in response.json()["detail"]
+
+def test_request_larger_than_limit_is_rejected_before_parsing(client: TestClient):
+    """Testa se o Content-Length acima do limite é recusado sem processar o corpo."""
+    with patch("printqa.main.MAX_REQUEST_SIZE", 10):
+        response = client.post("/analyze_mesh/", files={"file": ("big.stl", io.BytesIO(b"x" * 100), "model/stl")})
+
+    assert response.status_code == 413
+
+def _upload_box(client: TestClient, extents) -> dict:
+    data = trimesh.creation.box(extents=extents).export(file_type="stl")
+    response = client.post("/analyze_mesh/", files={"file": (f"caixa_{extents[0]}.stl", data, "model/stl")})
+    assert response.status_code == 200
+    return response.json()
+
+def test_get_result_with_conditional_requests(client: TestClient):
+    """Testa se o detalhe envia ETag/Last-Modified, exige revalidação e responde 304 quando o cliente já tem a versão."""
+    created = _upload_box(client, [11, 1, 1])
+
+    response = client.get(f"/results/{created['id']}")
+    assert response.status_code == 200
+    assert response.json()["content_hash"] == created["content_hash"]
+    assert response.headers["Cache-Control"] == "no-cache"
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    not_modified = client.get(f"/results/{created['id']}", headers={"If-None-Match": f"W/{etag}"})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    assert client.get(f"/results/{created['id']}", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(f"/results/{created['id']}", headers={"If-None-Match": '"outro"'}).status_code == 200
+
+def test_updated_result_is_served_with_new_etag(client: TestClient):
+    """Testa se, após o registro ser atualizado, a revalidação com o ETag antigo recebe o corpo novo."""
+    created = _upload_box(client, [21, 1, 1])
+    etag = client.get(f"/results/{created['id']}").headers["ETag"]
+
+    with database.SessionLocal() as db:
+        crud.update_analysis_result(db, created["id"], shells_count=2)
+
+    response = client.get(f"/results/{created['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["shells_count"] == 2
+    assert response.json()["updated_at"] is not None
+    assert response.headers["ETag"] != etag
+
+def test_get_unknown_result_returns_404(client: TestClient):
+    assert client.get("/results/999999").status_code == 404
+    assert client.delete("/results/999999").status_code == 404
+
+def test_list_results_with_cursor_and_etag(client: TestClient):
+    """Testa a listagem paginada por cursor e a revalidação da página via ETag."""
+    for size in (12, 13, 14):
+        _upload_box(client, [size, 1, 1])
+
+    first = client.get("/results/", params={"limit": 2})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is not None
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    second = client.get("/results/", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert {item["id"] for item in second["items"]}.isdisjoint({item["id"] for item in page["items"]})
+
+    revalidated = client.get("/results/", params={"limit": 2}, headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert "Last-Modified" not in first.headers
+
+    assert client.get("/results/", params={"cursor": "invalido"}).status_code == 400
+
+def test_statistics_endpoint_changes_etag_after_new_analysis(client: TestClient):
+    first = client.get("/statistics/")
+    assert first.status_code == 200
+    assert first.json()["total_analyses"] >= 0
+    assert client.get("/statistics/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    _upload_box(client, [15, 1, 1])
+    second = client.get("/statistics/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()["total_analyses"] == first.json()["total_analyses"] + 1
+
+def test_statistics_summary_is_rebuilt_at_startup(monkeypatch):
+    """Testa se a subida recalcula o resumo das estatísticas, desatualizado com a opção desligada."""
+    with database.SessionLocal() as db:
+        crud.refresh_analysis_statistics(db).total_analyses = -1
+        db.commit()
+
+    async def start_and_stop():
+        # Outra instância da aplicação: o estado do `client` do módulo fica intacto.
+        async with lifespan(FastAPI()):
+            pass
+
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", True)
+    asyncio.run(start_and_stop())
+
+    with database.SessionLocal() as db:
+        summary = db.get(models.AnalysisStatisticsDB, crud.STATISTICS_SUMMARY_ID)
+        assert summary.total_analyses == db.query(models.AnalysisResultDB).count()
+
+def test_delete_result_invalidates_cache(client: TestClient):
+    """Testa se, após a remoção, o mesmo conteúdo volta a ser analisado em vez de servido do cache."""
+    created = _upload_box(client, [16, 1, 1])
+
+    assert client.delete(f"/results/{created['id']}").status_code == 204
+    assert client.get(f"/results/{created['id']}").status_code == 404
+
+    again = _upload_box(client, [16, 1, 1])
+    assert again["cache_hit"] is False
+
+def test_database_pool_status_endpoint(client: TestClient):
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert response.json()["checked_out"] >= 0
+
+def test_analyze_mesh_returns_stage_timings_and_exports_metrics(client: TestClient):
+    """Testa se o resultado traz os tempos por etapa e se /metrics exporta histogramas, fila e cache."""
+    created = _upload_box(client, [17, 1, 1])
+    assert {"receive", "write", "parse", "watertight", "winding", "metrics", "db_insert"} <= set(created["stage_timings"])
+
+    stored = client.get(f"/results/{created['id']}").json()
+    assert "parse" in stored["stage_timings"]
+
+    _upload_box(client, [17, 1, 1])
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'printqa_analysis_stage_seconds_count{stage="parse"}' in body
+    assert 'printqa_analysis_stage_seconds_count{stage="db_insert"}' in body
+    assert "printqa_analysis_queue_depth 0.0" in body
+    assert "printqa_analysis_in_flight 0.0" in body
+    assert "printqa_result_cache_hits_total" in body
+    assert "printqa_result_cache_hit_ratio" in body
+
+def test_profile_header_writes_profile_for_request(client: TestClient, tmp_path):
+    """Testa se o cabeçalho X-PrintQA-Profile grava o perfil da análise com o digest da malha."""
+    client.app.state.profiling = ProfilingConfig(allow_header=True, directory=str(tmp_path))
+    data = trimesh.creation.box(extents=[18, 1, 1]).export(file_type="stl")
+
+    response = client.post(
+        "/analyze_mesh/", files={"file": ("perfil.stl", data, "model/stl")}, headers={"X-PrintQA-Profile": "1"}
+    )
+
+    assert response.status_code == 200
+    digest = response.json()["content_hash"]
+    assert sorted(os.path.splitext(name)[1] for name in os.listdir(tmp_path)) == [".json", ".prof"]
+    assert any(digest[:16] in name for name in os.listdir(tmp_path))
+
+def test_analyze_multi_body_file_returns_body_breakdown(client: TestClient):
+    """Testa se um arquivo com várias peças retorna o detalhamento por corpo, também na consulta posterior."""
+    scene = trimesh.Scene()
+    scene.add_geometry(trimesh.creation.box(extents=[19, 1, 1]), node_name="base")
+    scene.add_geometry(trimesh.creation.icosphere(), node_name="esfera",
+                       transform=trimesh.transformations.translation_matrix([30, 0, 0]))
+
+    response = client.post("/analyze_mesh/", files={"file": ("montagem.glb", scene.export(file_type="glb"), "model/gltf-binary")})
+
+    assert response.status_code == 200
+    created = response.json()
+    assert sorted(body["name"] for body in created["bodies"]) == ["base", "esfera"]
+    assert created["shells_count"] == 2
+    assert client.get(f"/results/{created['id']}").json()["bodies"] == created["bodies"]
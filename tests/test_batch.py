@@ -0,0 +1,70 @@
+# tests/test_batch.py
+
+import io
+import zipfile
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from printqa import crud
+
+pytestmark = [pytest.mark.api, pytest.mark.integration]
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_analyze_batch_with_multiple_files(client: TestClient, db_session: Session, cube_perfect_path: str, cube_inverted_path: str, file_load_fail_path: str):
+    """Testa se o lote retorna um item por arquivo, com falhas isoladas e conteúdo repetido analisado uma vez."""
+    perfect = _read(cube_perfect_path)
+    files = [
+        ("files", ("placa_1.stl", perfect, "model/stl")),
+        ("files", ("placa_2.stl", _read(cube_inverted_path), "model/stl")),
+        ("files", ("invalido.stl", _read(file_load_fail_path), "model/stl")),
+        ("files", ("placa_1_copia.stl", perfect, "model/stl")),
+    ]
+    response = client.post("/analyze_batch/", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["file_name"] for item in data["items"]] == ["placa_1.stl", "placa_2.stl", "invalido.stl", "placa_1_copia.stl"]
+    assert (data["total_files"], data["succeeded"], data["failed"]) == (4, 3, 1)
+    assert data["total_duration"] >= 0
+
+    first, second, invalid, copy = data["items"]
+    assert first["result"]["is_watertight"] is True
+    assert second["result"]["has_inverted_faces"] is True
+    assert invalid["result"] is None
+    assert "não contém uma malha 3D válida" in invalid["error"]
+    assert copy["result"]["id"] == first["result"]["id"]
+    assert copy["result"]["cache_hit"] is True
+
+    assert crud.get_analysis_result(db=db_session, result_id=second["result"]["id"]) is not None
+
+def test_analyze_batch_with_zip_archive(client: TestClient, cube_path: str, cube_open_path: str):
+    """Testa se um .zip é expandido e cada entrada é analisada como um arquivo do lote."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("placa/cube.stl", _read(cube_path))
+        archive.writestr("placa/cube_open.stl", _read(cube_open_path))
+
+    response = client.post("/analyze_batch/", files={"files": ("placa.zip", buffer.getvalue(), "application/zip")})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["file_name"] for item in data["items"]] == ["cube.stl", "cube_open.stl"]
+    assert data["succeeded"] == 2
+    assert data["items"][1]["result"]["is_watertight"] is False
+
+def test_analyze_batch_with_invalid_zip_returns_400(client: TestClient):
+    response = client.post("/analyze_batch/", files={"files": ("placa.zip", b"nao e zip", "application/zip")})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("'placa.zip':")
+
+def test_analyze_batch_over_file_limit_returns_400(client: TestClient, cube_path: str):
+    data = _read(cube_path)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("printqa.main.MAX_BATCH_FILES", 1)
+        response = client.post("/analyze_batch/", files=[("files", ("a.stl", data)), ("files", ("b.stl", data))])
+
+    assert response.status_code == 400
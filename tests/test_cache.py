@@ -0,0 +1,131 @@
+# tests/test_cache.py
+
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from printqa import crud, models, schemas
+from printqa.cache import ResultCache, content_digest
+
+pytestmark = pytest.mark.integration
+
+def _analysis(file_name: str, digest: str) -> schemas.AnalysisResultCreate:
+    return schemas.AnalysisResultCreate(
+        file_name=file_name, is_watertight=True, has_inverted_faces=False, content_hash=digest
+    )
+
+def test_content_digest_is_sha256():
+    assert content_digest(b"") == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+def test_lookup_miss_then_hit(db_session: Session):
+    """Testa se um digest desconhecido é um miss e, depois de armazenado, um hit pelo LRU."""
+    cache = ResultCache(maxsize=8)
+    digest = content_digest(b"malha-1")
+
+    assert cache.lookup(db_session, digest) is None
+    stored = cache.store(db_session, _analysis("m1.stl", digest))
+    assert stored.cache_hit is False
+
+    hit = cache.lookup(db_session, digest)
+    assert hit.cache_hit is True
+    assert hit.id == stored.id
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_lookup_falls_back_to_database(db_session: Session):
+    """Testa se, fora do LRU, o resultado é encontrado no banco e passa a ser servido pela memória."""
+    digest = content_digest(b"malha-2")
+    ResultCache(maxsize=8).store(db_session, _analysis("m2.stl", digest))
+
+    cache = ResultCache(maxsize=8)
+    assert cache.get(digest) is None
+    assert cache.lookup(db_session, digest).file_name == "m2.stl"
+    assert cache.get(digest) is not None
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2)
+    results = {
+        key: schemas.AnalysisResult(id=i, file_name=f"{key}.stl", is_watertight=True, has_inverted_faces=False, timestamp="2025-01-01T00:00:00")
+        for i, key in enumerate("abc")
+    }
+    cache.put("a", results["a"])
+    cache.put("b", results["b"])
+    cache.get("a")
+    cache.put("c", results["c"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("c") is None
+
+def test_disabled_lru_keeps_nothing_in_memory():
+    cache = ResultCache(maxsize=0)
+    cache.put("a", schemas.AnalysisResult(id=1, file_name="a.stl", is_watertight=True, has_inverted_faces=False, timestamp="2025-01-01T00:00:00"))
+    assert cache.get("a") is None
+
+def test_store_duplicate_returns_existing_record():
+    """
+    Testa se armazenar um digest já existente (corrida entre uploads iguais) devolve o
+    registro original em vez de falhar. COMENTANDO O USO DE MOCK: o rollback exigido
+    pela violação do índice único desfaria a transação externa da fixture `db_session`.
+    """
+    digest = content_digest(b"malha-3")
+    existing = models.AnalysisResultDB(
+        id=42, file_name="m3.stl", is_watertight=True, has_inverted_faces=False,
+        timestamp=datetime(2025, 1, 1), content_hash=digest
+    )
+    db = MagicMock()
+    with patch("printqa.cache.crud.create_analysis_result", side_effect=IntegrityError("INSERT", {}, Exception())):
+        with patch("printqa.cache.crud.get_analysis_result_by_hash", return_value=existing):
+            result = ResultCache(maxsize=0).store(db, _analysis("m3-copia.stl", digest))
+
+    db.rollback.assert_called_once()
+    assert result.id == 42
+    assert result.cache_hit is True
+
+def test_store_many_adds_results_to_lru(db_session: Session):
+    cache = ResultCache(maxsize=8)
+    digests = [content_digest(b"lote-1"), content_digest(b"lote-2")]
+    stored = cache.store_many(db_session, [_analysis(f"l{i}.stl", d) for i, d in enumerate(digests)])
+
+    assert [result.content_hash for result in stored] == digests
+    assert cache.get(digests[1]).id == stored[1].id
+
+def test_store_many_falls_back_to_single_rows_on_conflict():
+    """Testa se um conflito no insert em massa refaz o lote linha a linha."""
+    cache = ResultCache(maxsize=8)
+    db = MagicMock()
+    analyses = [_analysis("a.stl", "aa" * 32), _analysis("b.stl", "bb" * 32)]
+    with patch("printqa.cache.crud.create_analysis_results_bulk", side_effect=IntegrityError("INSERT", {}, Exception())), \
+         patch.object(cache, "store", side_effect=lambda db, analysis: analysis) as store:
+        assert cache.store_many(db, analyses) == analyses
+
+    db.rollback.assert_called_once()
+    assert store.call_count == 2
+
+def test_lookup_drops_results_deleted_elsewhere(db_session: Session):
+    """Testa se um resultado removido por outro processo não é mais servido pelo LRU."""
+    cache = ResultCache(maxsize=8)
+    digest = content_digest(b"malha-removida")
+    stored = cache.store(db_session, _analysis("removida.stl", digest))
+
+    assert crud.delete_analysis_result(db_session, stored.id)
+    assert cache.lookup(db_session, digest) is None
+    assert cache.get(digest) is None
+
+def test_lookup_drops_results_updated_elsewhere(db_session: Session):
+    """Testa se um resultado reescrito por outro processo (a reanálise) sai do LRU na verificação seguinte."""
+    cache = ResultCache(maxsize=8, sync_interval=0)
+    digest = content_digest(b"malha-reanalisada")
+    cache.store(db_session, _analysis("r.stl", digest))
+    assert cache.lookup(db_session, digest).is_watertight is True
+
+    assert crud.update_analysis_results_by_hash(db_session, {digest: {"is_watertight": False}}) == 1
+
+    result = cache.lookup(db_session, digest)
+    assert result.is_watertight is False
+    assert result.updated_at is not None
@@ -1,8 +1,10 @@
 # tests/test_crud.py (versão final)
 
 import pytest
+from datetime import datetime
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from printqa import crud, schemas
+from printqa import crud, models, schemas
 
 pytestmark = pytest.mark.integration
 
@@ -81,3 +83,174 @@ def test_update_nonexistent_result(db_session: Session):
     Cobre a linha `return None` em `update_analysis_result`. """
     updated = crud.update_analysis_result(db=db_session, result_id=999999, is_watertight=True)
     assert updated is None
+
+def test_create_and_update_analysis_job(db_session: Session):
+    """Testa o ciclo de vida de um job: criação como 'queued' e conclusão com resultado."""
+    job = crud.create_analysis_job(db=db_session, file_name="job.stl")
+    assert job.status == schemas.JobStatus.QUEUED.value
+
+    result = crud.create_analysis_result(db_session, schemas.AnalysisResultCreate(file_name="job.stl", is_watertight=True, has_inverted_faces=False))
+    updated = crud.update_analysis_job(db=db_session, job_id=job.id, status=schemas.JobStatus.DONE, result_id=result.id)
+    assert updated.status == "done"
+    assert crud.get_analysis_job(db=db_session, job_id=job.id).result.file_name == "job.stl"
+
+def test_update_nonexistent_job(db_session: Session):
+    """Testa a atualização de um job que não existe."""
+    assert crud.update_analysis_job(db=db_session, job_id="inexistente", status=schemas.JobStatus.FAILED) is None
+
+def test_get_analysis_result_by_hash(db_session: Session):
+    """Testa a busca de resultado pelo digest do conteúdo."""
+    crud.create_analysis_result(db_session, schemas.AnalysisResultCreate(file_name="hashed.stl", is_watertight=True, has_inverted_faces=False, content_hash="ab" * 32))
+    retrieved = crud.get_analysis_result_by_hash(db=db_session, content_hash="ab" * 32)
+    assert retrieved is not None
+    assert retrieved.file_name == "hashed.stl"
+    assert crud.get_analysis_result_by_hash(db=db_session, content_hash="cd" * 32) is None
+
+def test_create_analysis_results_bulk(db_session: Session):
+    """Testa a inserção de vários resultados em um único commit."""
+    analyses = [
+        schemas.AnalysisResultCreate(file_name=f"lote_{i}.stl", is_watertight=i % 2 == 0, has_inverted_faces=False)
+        for i in range(3)
+    ]
+    created = crud.create_analysis_results_bulk(db=db_session, analyses=analyses)
+
+    assert [result.file_name for result in created] == ["lote_0.stl", "lote_1.stl", "lote_2.stl"]
+    assert all(result.id is not None and result.timestamp is not None for result in created)
+    assert crud.get_analysis_result(db=db_session, result_id=created[1].id).is_watertight is False
+    assert crud.create_analysis_results_bulk(db=db_session, analyses=[]) == []
+
+def test_create_analysis_results_bulk_with_content_hashes(db_session: Session):
+    """Testa o caminho executemany, em que as linhas são relidas pelo digest na ordem de entrada."""
+    analyses = [
+        schemas.AnalysisResultCreate(file_name=f"hash_{i}.stl", is_watertight=True, has_inverted_faces=False, content_hash=f"{i:064x}")
+        for i in (3, 1, 2)
+    ]
+    created = crud.create_analysis_results_bulk(db=db_session, analyses=analyses)
+
+    assert [result.file_name for result in created] == ["hash_3.stl", "hash_1.stl", "hash_2.stl"]
+    assert len({result.id for result in created}) == 3
+
+def test_update_analysis_results_by_hash(db_session: Session, monkeypatch):
+    """Testa a atualização em lote pelo digest, com um só UPDATE, mantendo o resumo das estatísticas."""
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", True)
+    crud.refresh_analysis_statistics(db_session)
+    crud.create_analysis_results_bulk(db_session, [
+        schemas.AnalysisResultCreate(file_name=f"lote_{i}.stl", is_watertight=False, has_inverted_faces=True, content_hash=f"{i:064x}")
+        for i in (10, 11)
+    ])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        updated = crud.update_analysis_results_by_hash(db_session, {
+            f"{i:064x}": {"is_watertight": True, "has_inverted_faces": False, "faces_count": i}
+            for i in (10, 11, 12)
+        })
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    assert updated == 2
+    assert len([statement for statement in statements if statement.lstrip().startswith("UPDATE analysis_results")]) == 1
+    result = crud.get_analysis_result_by_hash(db_session, f"{11:064x}")
+    assert (result.file_name, result.is_watertight, result.has_inverted_faces, result.faces_count) == ("lote_11.stl", True, False, 11)
+
+    summary = crud.get_analysis_statistics(db=db_session)
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", False)
+    assert summary == crud.get_analysis_statistics(db=db_session)
+    assert crud.update_analysis_results_by_hash(db_session, {}) == 0
+
+def test_get_statistics_uses_single_query(db_session: Session):
+    """Testa se as estatísticas são calculadas com uma única consulta agregada."""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        crud.get_analysis_statistics(db=db_session)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+def test_statistics_summary_is_maintained_incrementally(db_session: Session, monkeypatch):
+    """Testa se o resumo materializado acompanha inserções, atualizações e remoções."""
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", True)
+    crud.refresh_analysis_statistics(db_session)
+
+    def new(name, watertight, inverted):
+        return schemas.AnalysisResultCreate(file_name=name, is_watertight=watertight, has_inverted_faces=inverted)
+
+    item = crud.create_analysis_result(db_session, new("resumo_1.stl", True, False))
+    crud.create_analysis_results_bulk(db_session, [new("resumo_2.stl", False, True), new("resumo_3.stl", True, True)])
+    crud.update_analysis_result(db_session, item.id, has_inverted_faces=True)
+    crud.delete_analysis_result(db_session, item.id)
+
+    summary = crud.get_analysis_statistics(db=db_session)
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", False)
+    assert summary == crud.get_analysis_statistics(db=db_session)
+
+def test_statistics_summary_is_not_written_when_disabled(db_session: Session, monkeypatch):
+    """Testa se, com a opção desligada, as escritas não tocam a linha de resumo."""
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", False)
+    before = crud.refresh_analysis_statistics(db_session).total_analyses
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        crud.create_analysis_result(db_session, schemas.AnalysisResultCreate(file_name="resumo_5.stl", is_watertight=True, has_inverted_faces=False))
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    assert not [statement for statement in statements if "analysis_statistics" in statement]
+    db_session.expire_all()
+    assert db_session.get(models.AnalysisStatisticsDB, crud.STATISTICS_SUMMARY_ID).total_analyses == before
+
+def test_statistics_summary_is_created_on_read_when_missing(db_session: Session, monkeypatch):
+    """Testa se, sem a linha de resumo, as escritas não a criam e a primeira leitura a recalcula."""
+    monkeypatch.setattr(crud, "STATISTICS_SUMMARY", True)
+    db_session.query(models.AnalysisStatisticsDB).delete()
+    crud.create_analysis_result(db_session, schemas.AnalysisResultCreate(file_name="resumo_4.stl", is_watertight=True, has_inverted_faces=False))
+    assert db_session.get(models.AnalysisStatisticsDB, crud.STATISTICS_SUMMARY_ID) is None
+
+    statistics = crud.get_analysis_statistics(db=db_session)
+    assert statistics["total_analyses"] == db_session.query(models.AnalysisResultDB).count()
+    assert db_session.get(models.AnalysisStatisticsDB, crud.STATISTICS_SUMMARY_ID) is not None
+
+def _add_results_at(db_session: Session, timestamps) -> list:
+    items = [
+        models.AnalysisResultDB(file_name=f"pagina_{i}.stl", is_watertight=i % 2 == 0, has_inverted_faces=False, timestamp=timestamp)
+        for i, timestamp in enumerate(timestamps)
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+def test_get_analysis_results_page_walks_all_rows_with_cursor(db_session: Session):
+    """Testa se a paginação por cursor percorre as linhas sem repetir nem pular, inclusive em empates de timestamp."""
+    same = datetime(2100, 1, 1, 12, 0, 0)
+    items = _add_results_at(db_session, [same, same, same, datetime(2100, 1, 1, 11, 0, 0), datetime(2100, 1, 2)])
+    expected = sorted(items, key=lambda item: (item.timestamp, item.id), reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = crud.get_analysis_results_page(db=db_session, limit=2, cursor=cursor)
+        seen.extend(page)
+        if cursor is None or len(seen) >= len(expected):
+            break
+
+    assert [item.id for item in seen[:len(expected)]] == [item.id for item in expected]
+
+def test_get_analysis_results_page_with_filters(db_session: Session):
+    _add_results_at(db_session, [datetime(2100, 2, 1, hour) for hour in range(6)])
+
+    first, cursor = crud.get_analysis_results_page(db=db_session, limit=2, watertight_only=True)
+    second, _ = crud.get_analysis_results_page(db=db_session, limit=2, cursor=cursor, watertight_only=True)
+
+    assert [item.file_name for item in first] == ["pagina_4.stl", "pagina_2.stl"]
+    assert second[0].file_name == "pagina_0.stl"
+    assert all(item.is_watertight for item in first + second)
+
+@pytest.mark.parametrize("cursor", ["nao-e-cursor", "W10", "WyJvbnRlbSIsMV0"])
+def test_decode_invalid_cursor_raises_value_error(cursor: str):
+    with pytest.raises(ValueError, match="Cursor de paginação inválido."):
+        crud.decode_cursor(cursor)
@@ -0,0 +1,187 @@
+# tests/test_jobs.py
+
+import asyncio
+import io
+import json
+import time
+import pytest
+import trimesh
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from printqa import crud, models, schemas
+from printqa.jobs import JobRunner
+from printqa.uploads import StoredUpload
+
+pytestmark = [pytest.mark.api, pytest.mark.integration]
+
+def _wait_for_job(client: TestClient, job_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(f"/jobs/{job_id}").json()
+        if data["status"] in ("done", "failed"):
+            return data
+        time.sleep(0.1)
+    pytest.fail(f"O job {job_id} não terminou em {timeout}s.")
+
+def test_submit_job_returns_202_and_completes(client: TestClient, db_session: Session, cube_perfect_path: str):
+    """Testa se o job é aceito imediatamente e, ao terminar, aponta para o resultado persistido."""
+    with open(cube_perfect_path, "rb") as f:
+        response = client.post("/jobs", files={"file": ("cube_perfect.stl", f, "model/stl")})
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["status"] in ("queued", "running")
+    assert response.headers["Location"] == f"/jobs/{data['id']}"
+
+    job = _wait_for_job(client, data["id"])
+    assert job["status"] == "done"
+    assert job["error"] is None
+    assert job["result"]["file_name"] == "cube_perfect.stl"
+    assert job["result"]["is_watertight"] is True
+
+    db_record = crud.get_analysis_result(db=db_session, result_id=job["result_id"])
+    assert db_record is not None
+
+def test_submit_invalid_file_job_returns_400(client: TestClient, file_load_fail_path: str):
+    """Testa se um arquivo recusado pela pré-validação do cabeçalho não chega a criar o job."""
+    with open(file_load_fail_path, "rb") as f:
+        response = client.post("/jobs", files={"file": ("invalid.stl", f, "model/stl")})
+    assert response.status_code == 400
+    assert "não contém uma malha 3D válida" in response.json()["detail"]
+
+def test_job_with_invalid_file_fails(client: TestClient):
+    """Testa se um arquivo que passa pela pré-validação mas falha na análise termina com status 'failed'."""
+    data = b"solid vazio\nendsolid vazio\n"
+    response = client.post("/jobs", files={"file": ("invalid.stl", io.BytesIO(data), "model/stl")})
+
+    job = _wait_for_job(client, response.json()["id"])
+    assert job["status"] == "failed"
+    assert "não contém uma malha 3D válida" in job["error"]
+    assert job["result_id"] is None
+
+def test_submit_empty_job_returns_400(client: TestClient):
+    """Testa se um upload vazio é recusado antes de criar o job."""
+    response = client.post("/jobs", files={"file": ("empty.stl", io.BytesIO(b""), "model/stl")})
+    assert response.status_code == 400
+
+def test_get_unknown_job_returns_404(client: TestClient):
+    assert client.get("/jobs/inexistente").status_code == 404
+    assert client.get("/jobs/inexistente/events").status_code == 404
+
+def test_job_events_stream_until_terminal_status(client: TestClient, cube_path: str):
+    """Testa se o endpoint SSE transmite os status do job e encerra ao concluir."""
+    with open(cube_path, "rb") as f:
+        job_id = client.post("/jobs", files={"file": ("sse.stl", f, "model/stl")}).json()["id"]
+
+    events = []
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+
+    assert events[-1]["status"] == "done"
+    assert events[-1]["result"]["file_name"] == "sse.stl"
+
+def test_job_for_known_content_completes_immediately(client: TestClient, cube_perfect_path: str):
+    """Testa se um job de conteúdo já analisado é concluído na própria submissão, pelo cache."""
+    with open(cube_perfect_path, "rb") as f:
+        first = client.post("/jobs", files={"file": ("first.stl", f, "model/stl")}).json()
+    first_job = _wait_for_job(client, first["id"])
+
+    with open(cube_perfect_path, "rb") as f:
+        response = client.post("/jobs", files={"file": ("again.stl", f, "model/stl")})
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "done"
+    assert response.json()["result_id"] == first_job["result_id"]
+
+def test_submit_job_returns_503_when_too_many_jobs_are_pending(client: TestClient, cube_path: str, monkeypatch):
+    """Testa se, com o limite de jobs pendentes atingido, o job é recusado com 503 e Retry-After."""
+    runner = client.app.state.job_runner
+    monkeypatch.setattr(runner, "max_pending", runner.pending)
+    with open(cube_path, "rb") as f:
+        response = client.post("/jobs", files={"file": ("cheio.stl", f, "model/stl")})
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+def test_submit_job_removes_upload_when_job_creation_fails(client: TestClient, cube_path: str):
+    """Testa se o upload e a vaga reservada são liberados quando o registro do job falha."""
+    runner = client.app.state.job_runner
+    pending = runner.pending
+    with patch("printqa.main._create_job", side_effect=RuntimeError("banco indisponível")), \
+            patch.object(StoredUpload, "remove", autospec=True) as remove:
+        with open(cube_path, "rb") as f, pytest.raises(RuntimeError):
+            client.post("/jobs", files={"file": ("falha.stl", f, "model/stl")})
+
+    remove.assert_called_once()
+    assert runner.pending == pending
+
+def test_heartbeat_fails_orphaned_jobs(client: TestClient, db_session: Session):
+    """Testa se jobs queued/running sem heartbeat (de um processo encerrado) são marcados como 'failed'."""
+    orphan = crud.create_analysis_job(db_session, "orfao.stl")
+    fresh = crud.create_analysis_job(db_session, "recente.stl")
+    crud.update_analysis_job(db_session, orphan.id, schemas.JobStatus.RUNNING)
+    db_session.query(models.AnalysisJobDB).filter(models.AnalysisJobDB.id == orphan.id).update(
+        {"updated_at": datetime.utcnow() - timedelta(minutes=5)}
+    )
+    db_session.commit()
+
+    @asynccontextmanager
+    async def session_scope():
+        yield db_session
+
+    runner = JobRunner(client.app.state.analysis_executor, session_scope, client.app.state.result_writer, stale_after=60)
+    assert asyncio.run(runner.beat()) == 1
+
+    db_session.expire_all()
+    assert crud.get_analysis_job(db_session, orphan.id).status == "failed"
+    assert "interrompido" in crud.get_analysis_job(db_session, orphan.id).error
+    assert crud.get_analysis_job(db_session, fresh.id).status == "queued"
+
+def test_status_changes_of_local_jobs_are_notified_in_memory(client: TestClient, db_session: Session):
+    """Testa se cada mudança de status de um job deste processo dispara o evento lido pelo SSE."""
+    job = crud.create_analysis_job(db_session, "aviso.stl")
+
+    @asynccontextmanager
+    async def session_scope():
+        yield db_session
+
+    runner = JobRunner(client.app.state.analysis_executor, session_scope, client.app.state.result_writer)
+
+    async def scenario():
+        finish = asyncio.Event()
+
+        async def run(job_id, upload, profiling):
+            await runner._update(job_id, schemas.JobStatus.RUNNING)
+            await finish.wait()
+
+        with patch.object(runner, "_run", run):
+            runner.reserve()
+            runner.start(job.id, upload=None)
+            queued = runner.status_changed(job.id)
+            await asyncio.wait_for(queued.wait(), 5)
+
+            running = runner.status_changed(job.id)
+            assert running is not queued and not running.is_set()
+            finish.set()
+            await asyncio.wait_for(running.wait(), 5)
+        return runner.status_changed(job.id), runner.pending
+
+    assert asyncio.run(scenario()) == (None, 0)
+    assert crud.get_analysis_job(db_session, job.id).status == "running"
+    assert runner.status_changed("de-outro-processo") is None
+
+def test_submit_job_above_face_ceiling_returns_413(client: TestClient):
+    """Testa se um STL binário acima do teto de faces é recusado com 413 antes de criar o job."""
+    data = trimesh.creation.box(extents=[23, 1, 1]).export(file_type="stl")
+    with patch("printqa.validation.MAX_MESH_FACES", 10):
+        response = client.post("/jobs", files={"file": ("grande.stl", data, "model/stl")})
+
+    assert response.status_code == 413
+    assert "acima do máximo de 10" in response.json()["detail"]
@@ -0,0 +1,99 @@
+# tests/test_meshstore.py
+
+import os
+import pytest
+import numpy as np
+import trimesh
+from unittest.mock import patch
+
+from printqa import meshstore
+from printqa.analysis import analyze_bytes, analyze_file, analyze_stored
+from printqa.meshstore import MeshStore
+
+pytestmark = pytest.mark.unit
+
+def _body(name=None, subdivisions=1):
+    sphere = trimesh.creation.icosphere(subdivisions=subdivisions)
+    return name, np.asarray(sphere.vertices), np.asarray(sphere.faces)
+
+def test_save_and_load_maps_arrays_without_copy(tmp_path):
+    """Verifica se a malha volta do armazenamento como arrays mapeados do disco, iguais aos gravados."""
+    store = MeshStore(str(tmp_path))
+    name, vertices, faces = _body()
+    store.save("abc", [(name, vertices, faces)], 1234, "esfera.stl")
+
+    stored = store.load("abc")
+    assert "abc" in store
+    assert stored.file_size == 1234
+    assert stored.file_name == "esfera.stl"
+    (loaded_name, loaded_vertices, loaded_faces), = stored.bodies
+    assert loaded_name is None
+    assert isinstance(loaded_vertices, np.memmap) and isinstance(loaded_faces, np.memmap)
+    assert np.array_equal(loaded_vertices, vertices)
+    assert np.array_equal(loaded_faces, faces)
+    assert store.load("inexistente") is None
+
+def test_load_rejects_digest_outside_store(tmp_path):
+    with pytest.raises(ValueError):
+        MeshStore(str(tmp_path)).load("../fora")
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    """Verifica se, acima do limite de tamanho, as malhas usadas há mais tempo são removidas primeiro."""
+    store = MeshStore(str(tmp_path), max_bytes=10 ** 9)
+    for index, digest in enumerate(["a", "b", "c"]):
+        store.save(digest, [_body()], 100)
+        os.utime(tmp_path / digest, (index, index))
+    store.load("a")  # "a" passa a ser a mais recente
+
+    # O meta.json de cada malha pode diferir em alguns bytes (created_at): o limite usa a maior.
+    entry_size = max(sum(item.stat().st_size for item in os.scandir(tmp_path / digest)) for digest in "abc")
+    store.max_bytes = 2 * entry_size
+    store.evict()
+
+    assert store.digests() == ["c", "a"]
+
+def test_eviction_keeps_the_newest_mesh(tmp_path):
+    store = MeshStore(str(tmp_path), max_bytes=1)
+    store.save("a", [_body()], 100)
+    store.save("b", [_body()], 100)
+    assert store.digests() == ["b"]
+
+def test_analyze_file_reuses_stored_mesh(cube_open_path: str, tmp_path, monkeypatch):
+    """Verifica se a segunda análise do mesmo conteúdo lê a malha do armazenamento, sem o parser."""
+    monkeypatch.setattr(meshstore, "MESH_STORE_DIR", str(tmp_path))
+    first = analyze_file(cube_open_path, content_hash="cubo")
+    assert "cubo" in MeshStore(str(tmp_path))
+
+    with patch("printqa.analysis._load_mesh") as load_mesh:
+        second = analyze_file(cube_open_path, content_hash="cubo")
+        load_mesh.assert_not_called()
+
+    for key in ("analysis_duration", "stage_timings"):
+        first.pop(key)
+        second.pop(key)
+    assert second == first
+
+def test_analyze_stored_reanalyzes_without_original_file(tmp_path, monkeypatch):
+    """Verifica se uma cena com vários corpos é reanalisada só a partir do armazenamento."""
+    scene = trimesh.Scene()
+    scene.add_geometry(trimesh.creation.box(), node_name="caixa")
+    scene.add_geometry(trimesh.creation.icosphere().apply_translation([5, 0, 0]), node_name="esfera")
+    data = scene.export(file_type="glb")
+
+    monkeypatch.setattr(meshstore, "MESH_STORE_DIR", str(tmp_path))
+    expected = analyze_bytes(data, "glb", "cena.glb", content_hash="cena")
+    result = analyze_stored("cena")
+
+    assert [body["name"] for body in result["bodies"]] == [body["name"] for body in expected["bodies"]]
+    assert result["faces_count"] == expected["faces_count"]
+    assert result["file_size"] == len(data)
+    assert result["volume"] == pytest.approx(expected["volume"])
+
+def test_analyze_stored_raises_for_unknown_digest(tmp_path):
+    with pytest.raises(ValueError, match="não está no armazenamento"):
+        analyze_stored("inexistente", store_dir=str(tmp_path))
+
+def test_analysis_without_digest_does_not_store(cube_open_path: str, tmp_path, monkeypatch):
+    monkeypatch.setattr(meshstore, "MESH_STORE_DIR", str(tmp_path))
+    analyze_file(cube_open_path)
+    assert os.listdir(tmp_path) == []
@@ -3,7 +3,7 @@
 import pytest
 from datetime import datetime
 from printqa.models import AnalysisResultDB
-from printqa.crud import create_analysis_result
+from printqa.crud import create_analysis_result, update_analysis_result
 from printqa.schemas import AnalysisResultCreate
 from sqlalchemy.orm import Session
 
@@ -53,13 +53,29 @@ def test_analysis_result_db_to_dict_full_fields(db_session: Session):
         'is_watertight': True,
         'has_inverted_faces': False,
         'timestamp': created_result.timestamp.isoformat(),
+        'updated_at': None,
         'file_size': 2048,
         'vertices_count': 200,
         'faces_count': 100,
-        'analysis_duration': 250
+        'analysis_duration': 250,
+        'content_hash': None,
+        'degenerate_faces_count': None,
+        'duplicate_faces_count': None,
+        'non_manifold_edges_count': None,
+        'boundary_edges_count': None,
+        'shells_count': None,
+        'volume': None,
+        'bounding_box_x': None,
+        'bounding_box_y': None,
+        'bounding_box_z': None,
+        'stage_timings': None,
+        'bodies': None
     }
     assert created_result.to_dict() == expected_dict
 
+    updated = update_analysis_result(db_session, created_result.id, faces_count=101)
+    assert updated.to_dict()['updated_at'] == updated.updated_at.isoformat()
+
 def test_analysis_result_db_to_dict_nullable_fields(db_session: Session):
     """
     Testa o método to_dict do modelo AnalysisResultDB quando os campos opcionais
@@ -86,9 +102,22 @@ def test_analysis_result_db_to_dict_nullable_fields(db_session: Session):
         'is_watertight': False,
         'has_inverted_faces': True,
         'timestamp': created_result.timestamp.isoformat(),
+        'updated_at': None,
         'file_size': None,
         'vertices_count': None,
         'faces_count': None,
-        'analysis_duration': None
+        'analysis_duration': None,
+        'content_hash': None,
+        'degenerate_faces_count': None,
+        'duplicate_faces_count': None,
+        'non_manifold_edges_count': None,
+        'boundary_edges_count': None,
+        'shells_count': None,
+        'volume': None,
+        'bounding_box_x': None,
+        'bounding_box_y': None,
+        'bounding_box_z': None,
+        'stage_timings': None,
+        'bodies': None
     }
     assert created_result.to_dict() == expected_dict
\ No newline at end of file
@@ -0,0 +1,90 @@
+# tests/test_outofcore.py
+
+import pytest
+import numpy as np
+import trimesh
+
+from printqa import outofcore
+from printqa.analysis import STL_TRIANGLE_DTYPE, analyze_bytes, analyze_file
+from printqa.outofcore import ExternalSorter, binary_stl_metrics, exceeds_memory_budget
+
+pytestmark = pytest.mark.unit
+
+COMPARED = (
+    "is_watertight", "has_inverted_faces", "vertices_count", "faces_count",
+    "non_manifold_edges_count", "boundary_edges_count",
+)
+
+def _sphere_cases():
+    sphere = trimesh.creation.icosphere(subdivisions=4)
+    holes = trimesh.Trimesh(vertices=sphere.vertices, faces=sphere.faces[10:], process=False)
+    faces = sphere.faces.copy()
+    faces[:50] = faces[:50, ::-1]
+    flipped = trimesh.Trimesh(vertices=sphere.vertices, faces=faces, process=False)
+    return {"fechada": sphere, "furos": holes, "invertida": flipped}
+
+@pytest.mark.parametrize("case", ["fechada", "furos", "invertida"])
+def test_binary_stl_metrics_match_in_memory_analysis(case: str, tmp_path):
+    """Verifica se a análise em blocos, com as arestas ordenadas em disco, concorda com a análise em memória."""
+    data = _sphere_cases()[case].export(file_type="stl")
+    expected = analyze_bytes(data, "stl", "esfera.stl")
+
+    metrics, faces = binary_stl_metrics(data, memory_budget=64 * 1024, spill_dir=str(tmp_path))
+
+    assert faces == expected["faces_count"]
+    assert {key: metrics[key] for key in COMPARED} == {key: expected[key] for key in COMPARED}
+    assert metrics["volume"] == pytest.approx(expected["volume"])
+    assert metrics["bounding_box_x"] == pytest.approx(expected["bounding_box_x"])
+    assert metrics["shells_count"] is None
+    assert list(tmp_path.iterdir()) == []  # arquivos temporários removidos
+
+def test_binary_stl_metrics_merge_vertices_within_trimesh_tolerance(tmp_path):
+    """Verifica se um canto deslocado em 1e-12 (ruído de CAD) não abre a malha na análise em blocos."""
+    box = trimesh.creation.box()
+    box.apply_translation([0.5, 0.5, 0.5])
+    data = bytearray(box.export(file_type="stl"))
+    triangles = np.frombuffer(data, dtype=STL_TRIANGLE_DTYPE, count=len(box.faces), offset=84)
+    face, corner, axis = np.argwhere(triangles["vertices"] == 0.0)[0]
+    triangles["vertices"][face, corner, axis] = 1e-12
+
+    metrics, _ = binary_stl_metrics(bytes(data), memory_budget=64 * 1024, spill_dir=str(tmp_path))
+    assert (metrics["is_watertight"], metrics["boundary_edges_count"], metrics["vertices_count"]) == (True, 0, 8)
+
+def test_external_sorter_merges_spilled_runs(tmp_path):
+    keys = np.random.default_rng(0).integers(0, 2**63, size=20_000, dtype=np.uint64)
+    sorter = ExternalSorter(str(tmp_path), memory_budget=16 * 2048)
+    for chunk in np.array_split(keys, 7):
+        sorter.add(chunk)
+
+    merged = np.concatenate(list(sorter.iter_sorted()))
+    assert len(sorter.runs) > 1
+    assert np.array_equal(merged, np.sort(keys))
+
+def test_exceeds_memory_budget():
+    assert exceeds_memory_budget(84 + 50 * 1000, memory_budget=0) is False
+    assert exceeds_memory_budget(84 + 50 * 1000, memory_budget=1024 * 1024) is False
+    assert exceeds_memory_budget(84 + 50 * 1000, memory_budget=100 * 1000) is True
+
+def test_analyze_file_uses_out_of_core_mode_above_budget(tmp_path, monkeypatch):
+    """Verifica se `analyze_file` analisa em blocos um STL binário acima do orçamento de memória."""
+    path = tmp_path / "esfera.stl"
+    path.write_bytes(_sphere_cases()["furos"].export(file_type="stl"))
+    expected = analyze_file(str(path))
+
+    monkeypatch.setattr(outofcore, "MEMORY_BUDGET", 64 * 1024)
+    result = analyze_file(str(path))
+
+    assert result["is_watertight"] is False
+    assert result["boundary_edges_count"] == expected["boundary_edges_count"]
+    assert result["duplicate_faces_count"] is None
+    assert set(result["stage_timings"]) == {"parse", "watertight", "metrics"}
+
+def test_analyze_file_out_of_core_rejects_mesh_without_finite_triangles(tmp_path, monkeypatch):
+    path = tmp_path / "nan.stl"
+    triangles = np.zeros(1, dtype=outofcore.STL_TRIANGLE_DTYPE)
+    triangles["vertices"] = np.nan
+    path.write_bytes(bytes(80) + np.uint32(1).tobytes() + triangles.tobytes())
+
+    monkeypatch.setattr(outofcore, "MEMORY_BUDGET", 1)
+    with pytest.raises(ValueError, match="não contém uma malha 3D válida"):
+        analyze_file(str(path))
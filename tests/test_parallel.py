@@ -0,0 +1,87 @@
+# tests/test_parallel.py
+
+import asyncio
+import os
+import threading
+import pytest
+import numpy as np
+import trimesh
+
+from printqa import parallel
+from printqa.analysis import analyze_bytes, analyze_file, mesh_metrics
+from printqa.parallel import partitioned_mesh_metrics, should_partition
+from printqa.timing import StageTimer
+from printqa.workers import AnalysisExecutor
+
+pytestmark = pytest.mark.unit
+
+@pytest.fixture(scope="module", autouse=True)
+def partition_pools():
+    yield
+    parallel.shutdown()
+
+def _meshes():
+    sphere = trimesh.creation.icosphere(subdivisions=4)
+    faces = sphere.faces.copy()
+    faces[:50] = faces[:50, ::-1]
+    two_shells = trimesh.util.concatenate([sphere, sphere.copy().apply_translation([3, 0, 0])])
+    return {
+        "fechada": (sphere.vertices, sphere.faces),
+        "furos": (sphere.vertices, sphere.faces[10:]),
+        "invertida": (sphere.vertices, faces),
+        "duplicadas": (sphere.vertices, np.vstack([sphere.faces, sphere.faces[:7]])),
+        "duas_cascas": (two_shells.vertices, two_shells.faces),
+    }
+
+@pytest.mark.parametrize("case", ["fechada", "furos", "invertida", "duplicadas", "duas_cascas"])
+@pytest.mark.parametrize("partitions", [2, 3])
+def test_partitioned_metrics_match_single_process(case: str, partitions: int):
+    """Verifica se a análise dividida entre processos, com o merge das arestas de fronteira, concorda com a análise em um processo."""
+    vertices, faces = _meshes()[case]
+    expected = mesh_metrics(vertices, faces)
+
+    metrics, _, _ = partitioned_mesh_metrics(vertices, faces, StageTimer(), partitions)
+
+    assert metrics.pop("volume") == pytest.approx(expected.pop("volume"))
+    assert metrics == expected
+
+def test_should_partition(monkeypatch):
+    monkeypatch.setattr(parallel, "PARTITION_MIN_FACES", 100)
+    assert should_partition(1000, partitions=4) is True
+    assert should_partition(99, partitions=4) is False
+    assert should_partition(1000, partitions=1) is False
+
+def test_analyze_file_partitions_large_meshes(cube_open_path: str, monkeypatch):
+    """Verifica se `analyze_file` divide a malha acima do limite de faces e não deixa memória compartilhada para trás."""
+    expected = analyze_file(cube_open_path)
+    shared_before = set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+    monkeypatch.setattr(parallel, "PARTITIONS", 2)
+    monkeypatch.setattr(parallel, "PARTITION_MIN_FACES", 1)
+    result = analyze_file(cube_open_path)
+
+    for key in ("analysis_duration", "stage_timings"):
+        expected.pop(key)
+        result.pop(key)
+    assert result == expected
+    if os.path.isdir("/dev/shm"):
+        assert set(os.listdir("/dev/shm")) == shared_before
+
+def test_analysis_executor_shuts_down_after_partitioned_analysis(monkeypatch):
+    """Verifica se o pool de análise encerra depois de um processo dele ter criado o pool das partições."""
+    monkeypatch.setenv("ANALYSIS_PARTITIONS", "2")
+    monkeypatch.setenv("ANALYSIS_PARTITION_MIN_FACES", "100")
+    data = trimesh.creation.icosphere(subdivisions=3).export(file_type="stl")
+
+    executor = AnalysisExecutor(max_workers=1, queue_size=0)
+    result = asyncio.run(executor.run(analyze_bytes, data, "stl", "esfera.stl"))
+    assert result["faces_count"] == 1280
+
+    shutdown = threading.Thread(target=executor.shutdown, daemon=True)
+    shutdown.start()
+    shutdown.join(timeout=60)
+    if shutdown.is_alive():
+        # Sem isso, o próprio pytest ficaria esperando pelos processos ao sair.
+        for process in list(executor._pool._processes.values()):
+            process.kill()
+        pytest.fail("O encerramento do pool de análise ficou bloqueado.")
@@ -0,0 +1,85 @@
+# tests/test_profiling.py
+
+import json
+import os
+import pstats
+import pytest
+from printqa.profiling import ProfilingConfig, profiled_call, rotate_profiles
+
+pytestmark = pytest.mark.unit
+
+def _fail(message: str):
+    raise ValueError(message)
+
+def test_for_request_uses_env_and_header():
+    """Verifica se o perfil é ligado pelo ambiente ou pelo cabeçalho, que força a gravação."""
+    disabled = ProfilingConfig(allow_header=True)
+    assert disabled.for_request(None) is None
+    assert disabled.for_request("0") is None
+    assert disabled.for_request("true").force is True
+
+    # Por padrão, o cabeçalho é ignorado: qualquer cliente poderia ligar o perfil.
+    assert ProfilingConfig().for_request("1") is None
+    enabled = ProfilingConfig(enabled=True)
+    assert enabled.for_request(None) is enabled
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_PROFILE", "true")
+    monkeypatch.setenv("ANALYSIS_PROFILE_MIN_DURATION_MS", "250")
+    monkeypatch.setenv("ANALYSIS_PROFILE_MIN_PEAK_MB", "1.5")
+    monkeypatch.setenv("ANALYSIS_PROFILE_MAX_FILES", "3")
+
+    config = ProfilingConfig.from_env()
+    assert config.enabled is True
+    assert config.min_duration_ms == 250
+    assert config.min_peak_bytes == int(1.5 * 1024 * 1024)
+    assert config.max_files == 3
+
+def test_profiled_call_skips_fast_analyses(tmp_path):
+    config = ProfilingConfig(enabled=True, directory=str(tmp_path))
+    assert profiled_call(config, "abc", "rapido.stl", sum, [1, 2, 3]) == 6
+    assert os.listdir(tmp_path) == []
+
+def test_profiled_call_writes_profile_with_digest(tmp_path):
+    """Verifica se o perfil forçado grava o .prof legível pelo pstats e o relatório com o digest."""
+    config = ProfilingConfig(directory=str(tmp_path), force=True)
+    assert profiled_call(config, "f" * 64, "lento.stl", sorted, [3, 1, 2]) == [1, 2, 3]
+
+    files = sorted(os.listdir(tmp_path))
+    assert [os.path.splitext(name)[1] for name in files] == [".json", ".prof"]
+    assert "ffffffffffffffff" in files[0]
+    pstats.Stats(str(tmp_path / files[1]))
+
+    with open(tmp_path / files[0], encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["content_hash"] == "f" * 64
+    assert report["file_name"] == "lento.stl"
+    assert report["error"] is None
+    assert report["peak_bytes"] >= 0
+    assert isinstance(report["top_allocations"], list)
+
+def test_profiled_call_records_errors(tmp_path):
+    config = ProfilingConfig(directory=str(tmp_path), min_duration_ms=0)
+    with pytest.raises(ValueError, match="malha inválida"):
+        profiled_call(config, "abc", "ruim.stl", _fail, "malha inválida")
+
+    [report_name] = [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+    with open(tmp_path / report_name, encoding="utf-8") as f:
+        assert json.load(f)["error"] == "malha inválida"
+
+def test_rotate_profiles_removes_oldest(tmp_path):
+    """Verifica se a rotação remove os perfis mais antigos, por quantidade e por tamanho, mantendo o mais novo."""
+    for index in range(4):
+        for extension in (".prof", ".json"):
+            path = tmp_path / f"perfil{index}{extension}"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 + index, 1000 + index))
+    (tmp_path / "outro.txt").write_text("mantido")
+
+    rotate_profiles(str(tmp_path), max_files=3, max_bytes=10_000)
+    assert sorted(os.listdir(tmp_path)) == [
+        "outro.txt", "perfil1.json", "perfil1.prof", "perfil2.json", "perfil2.prof", "perfil3.json", "perfil3.prof"
+    ]
+
+    rotate_profiles(str(tmp_path), max_files=10, max_bytes=1)
+    assert sorted(os.listdir(tmp_path)) == ["outro.txt", "perfil3.json", "perfil3.prof"]
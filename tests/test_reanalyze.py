@@ -0,0 +1,153 @@
+# tests/test_reanalyze.py
+
+import io
+import shutil
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+import trimesh
+from sqlalchemy.orm import Session
+
+from printqa import crud, reanalyze, schemas
+from printqa.__main__ import main
+from printqa.meshstore import MeshStore
+from printqa.reanalyze import Checkpoint, ReanalysisTask, directory_tasks, run, store_tasks
+
+pytestmark = pytest.mark.integration
+
+def _record(db_session: Session, content_hash: str, file_name: str) -> None:
+    """Registro desatualizado: o resultado gravado não bate com a malha."""
+    crud.create_analysis_result(db_session, schemas.AnalysisResultCreate(
+        file_name=file_name, is_watertight=False, has_inverted_faces=True, faces_count=0, content_hash=content_hash,
+    ))
+
+def _meshes(tmp_path, cube_open_path: str):
+    directory = tmp_path / "malhas"
+    (directory / "sub").mkdir(parents=True)
+    (directory / "esfera.stl").write_bytes(trimesh.creation.icosphere().export(file_type="stl"))
+    shutil.copy(cube_open_path, directory / "sub" / "cubo_aberto.stl")
+    (directory / "sub" / "leia-me.txt").write_text("ignorado")
+    return directory
+
+def test_directory_tasks_walks_mesh_files(tmp_path, cube_open_path: str):
+    directory = _meshes(tmp_path, cube_open_path)
+    assert [task.key for task in directory_tasks(str(directory))] == ["esfera.stl", "sub/cubo_aberto.stl"]
+
+def test_run_updates_records_from_directory(db_session: Session, tmp_path, cube_open_path: str):
+    """Verifica se a reanálise de um diretório atualiza os registros pelo digest e mostra a vazão."""
+    directory = _meshes(tmp_path, cube_open_path)
+    tasks = directory_tasks(str(directory))
+    digests = [reanalyze._file_digest(task.path) for task in tasks]
+    _record(db_session, digests[0], "esfera.stl")
+    progress = io.StringIO()
+
+    summary = run(
+        tasks, workers=2, batch_size=1, checkpoint_path=str(tmp_path / "checkpoint"),
+        session_factory=lambda: db_session, progress_stream=progress,
+    )
+
+    assert (summary.processed, summary.updated, summary.missing, summary.failed) == (2, 1, 1, 0)
+    assert summary.files_per_second > 0
+    assert "2/2 (100.0%)" in progress.getvalue() and "arquivos/s" in progress.getvalue()
+    result = crud.get_analysis_result_by_hash(db_session, digests[0])
+    assert (result.is_watertight, result.has_inverted_faces, result.faces_count) == (True, False, 1280)
+    assert not (tmp_path / "checkpoint").exists()
+
+def test_run_resumes_from_checkpoint(db_session: Session, tmp_path, cube_open_path: str):
+    """Verifica se as tarefas já registradas no checkpoint são puladas e se `restart` o descarta."""
+    tasks = directory_tasks(str(_meshes(tmp_path, cube_open_path)))
+    checkpoint = tmp_path / "checkpoint"
+    Checkpoint(str(checkpoint)).add(["esfera.stl"])
+
+    summary = run(tasks, workers=1, checkpoint_path=str(checkpoint), session_factory=lambda: db_session, progress_stream=io.StringIO())
+    assert (summary.skipped, summary.processed) == (1, 1)
+
+    Checkpoint(str(checkpoint)).add(["esfera.stl"])
+    summary = run(
+        tasks, workers=1, checkpoint_path=str(checkpoint), restart=True,
+        session_factory=lambda: db_session, progress_stream=io.StringIO(),
+    )
+    assert (summary.skipped, summary.processed) == (0, 2)
+
+def test_run_reanalyzes_mesh_store_and_reports_failures(db_session: Session, tmp_path):
+    """Verifica a reanálise a partir do armazenamento de malhas, sem os arquivos originais."""
+    sphere = trimesh.creation.icosphere()
+    store = MeshStore(str(tmp_path / "store"))
+    store.save("a" * 64, [(None, sphere.vertices, sphere.faces)], 1234, "esfera.stl")
+    _record(db_session, "a" * 64, "esfera.stl")
+    tasks = store_tasks(store.directory) + [ReanalysisTask(key="b" * 64, content_hash="b" * 64)]
+
+    summary = run(
+        tasks, store_dir=store.directory, workers=1, checkpoint_path=str(tmp_path / "checkpoint"),
+        session_factory=lambda: db_session, progress_stream=io.StringIO(),
+    )
+
+    assert (summary.updated, summary.failed) == (1, 1)
+    result = crud.get_analysis_result_by_hash(db_session, "a" * 64)
+    assert (result.is_watertight, result.faces_count, result.file_size) == (True, 1280, 1234)
+
+def test_reanalyze_reports_any_analysis_error(monkeypatch):
+    """Verifica se uma exceção inesperada da análise vira a falha da tarefa, não do processo."""
+    def boom(*args):
+        raise RuntimeError("malha corrompida")
+
+    monkeypatch.setattr("printqa.analysis.analyze_stored", boom)
+    assert reanalyze._reanalyze(ReanalysisTask(key="c" * 64, content_hash="c" * 64), None) == (
+        "c" * 64, "c" * 64, "RuntimeError: malha corrompida"
+    )
+
+def test_run_survives_a_dead_worker(monkeypatch, db_session: Session, tmp_path):
+    """
+    Verifica se a morte de um processo do pool conta as tarefas em andamento como falhas e
+    se as restantes rodam em um pool novo. COMENTANDO O USO DE MOCK: o pool falso falha como
+    um pool quebrado (BrokenProcessPool) sem matar um processo de verdade.
+    """
+    pools = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.broken = not pools
+            pools.append(self)
+
+        def submit(self, func, *args):
+            future = Future()
+            if self.broken:
+                future.set_exception(BrokenProcessPool("processo encerrado"))
+            else:
+                future.set_result((args[0].key, args[0].content_hash, {"is_watertight": True, "has_inverted_faces": False}))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setattr(reanalyze, "ProcessPoolExecutor", FakePool)
+    tasks = [ReanalysisTask(key=str(i), content_hash=str(i)) for i in range(4)]
+
+    summary = run(
+        tasks, workers=1, checkpoint_path=str(tmp_path / "checkpoint"),
+        session_factory=lambda: db_session, progress_stream=io.StringIO(),
+    )
+
+    assert len(pools) == 2
+    assert (summary.processed, summary.failed, summary.missing) == (4, 2, 2)
+
+def test_cli_requires_a_source(monkeypatch, capsys):
+    monkeypatch.setattr("printqa.meshstore.MESH_STORE_DIR", None)
+    assert main(["reanalyze"]) == 2
+    assert "--directory" in capsys.readouterr().err
+
+def test_cli_runs_reanalysis(monkeypatch, tmp_path, capsys):
+    captured = {}
+
+    def fake_run(tasks, **kwargs):
+        captured.update(tasks=tasks, **kwargs)
+        return reanalyze.ReanalysisSummary(total=len(tasks), processed=len(tasks), updated=len(tasks), elapsed=1.0)
+
+    (tmp_path / "peca.stl").write_bytes(trimesh.creation.box().export(file_type="stl"))
+    monkeypatch.setattr(reanalyze, "run", fake_run)
+    assert main(["reanalyze", "--directory", str(tmp_path), "--workers", "3", "--batch-size", "50", "--restart"]) == 0
+
+    assert [task.key for task in captured["tasks"]] == ["peca.stl"]
+    assert (captured["workers"], captured["batch_size"], captured["restart"]) == (3, 50, True)
+    assert "1.0 arquivos/s" in capsys.readouterr().out
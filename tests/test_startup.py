@@ -0,0 +1,23 @@
+import pytest
+
+from scripts.benchmark_startup import check, measure_imports
+
+
+def test_api_import_is_lazy():
+    """Importar a API não deve exigir DATABASE_URL nem carregar numpy/trimesh/análise."""
+    timings = measure_imports("printqa.main")
+    assert "printqa.main" in timings
+    assert check(timings, "printqa.main", budget_ms=0) == []
+
+
+def test_check_reports_heavy_imports_and_budget():
+    timings = {"printqa.main": (10, 5_000_000, 0), "trimesh": (1, 2_000_000, 1)}
+    problems = check(timings, "printqa.main", budget_ms=1000)
+    assert len(problems) == 2
+    assert "trimesh" in problems[0]
+    assert "5000 ms" in problems[1]
+
+
+def test_measure_imports_raises_on_import_error():
+    with pytest.raises(RuntimeError, match="modulo_inexistente"):
+        measure_imports("modulo_inexistente")
@@ -0,0 +1,145 @@
+# tests/test_uploads.py
+
+import asyncio
+import hashlib
+import io
+import os
+import tracemalloc
+import zipfile
+import pytest
+from fastapi import UploadFile
+
+from printqa.uploads import StoredUpload, UploadTooLargeError, extract_zip_entries, save_upload
+
+pytestmark = pytest.mark.unit
+
+def _upload(data: bytes, filename: str = "modelo.STL", size=None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename, size=size)
+
+def test_save_upload_keeps_small_files_in_memory(tmp_path):
+    """Verifica se uploads abaixo do limite de spool não passam pelo disco."""
+    data = b"solid cubo\n" * 100
+    stored = asyncio.run(save_upload(_upload(data), directory=str(tmp_path), chunk_size=7))
+
+    assert stored.data == data
+    assert stored.path is None
+    assert stored.size == len(data)
+    assert stored.content_hash == hashlib.sha256(data).hexdigest()
+    assert os.listdir(tmp_path) == []
+
+    analyze, args = stored.analysis_call()
+    assert analyze.__name__ == "analyze_bytes"
+    assert args == (data, "stl", "modelo.STL", stored.content_hash)
+
+def test_save_upload_does_not_copy_spooled_content(tmp_path):
+    """Verifica se o upload mantido em memória não é copiado ao final (pico próximo do tamanho do arquivo)."""
+    data = b"solid cubo\n" * (400 * 1024)
+
+    async def save():
+        upload = _upload(data)
+        tracemalloc.start()
+        try:
+            stored = await save_upload(upload, directory=str(tmp_path), chunk_size=64 * 1024)
+            return stored, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    stored, peak = asyncio.run(save())
+    assert stored.data == data and isinstance(stored.data, bytes)
+    # O buffer do spool e um bloco; com `bytes(bytearray)` ao final, o conteúdo ficava duplicado.
+    assert peak < 1.5 * len(data)
+
+def test_save_upload_spills_large_files_to_disk_in_chunks(tmp_path):
+    """Verifica se, acima do limite de spool, o upload é copiado por blocos para um arquivo temporário."""
+    data = b"solid cubo\n" * 100
+    stored = asyncio.run(save_upload(_upload(data), directory=str(tmp_path), chunk_size=7, spool_size=50))
+
+    assert stored.data is None
+    assert stored.size == len(data)
+    assert stored.content_hash == hashlib.sha256(data).hexdigest()
+    assert stored.file_name == "modelo.STL"
+    assert stored.path.endswith(".stl")
+    with open(stored.path, "rb") as f:
+        assert f.read() == data
+
+    analyze, args = stored.analysis_call()
+    assert analyze.__name__ == "analyze_file"
+    assert args == (stored.path, "modelo.STL", stored.content_hash)
+
+    stored.remove()
+    assert not os.path.exists(stored.path)
+
+def test_save_upload_uses_unique_paths_for_same_name(tmp_path):
+    """Verifica se uploads simultâneos de mesmo nome não disputam o mesmo arquivo."""
+    first = asyncio.run(save_upload(_upload(b"a"), directory=str(tmp_path), spool_size=0, validate=False))
+    second = asyncio.run(save_upload(_upload(b"b"), directory=str(tmp_path), spool_size=0, validate=False))
+    assert first.path != second.path
+
+def test_save_upload_strips_directories_from_filename(tmp_path):
+    stored = asyncio.run(save_upload(_upload(b"a", filename="../../etc/cubo.stl"), directory=str(tmp_path), spool_size=0, validate=False))
+    assert stored.file_name == "cubo.stl"
+    assert os.path.dirname(stored.path) == str(tmp_path)
+
+def test_save_upload_rejects_oversized_stream(tmp_path):
+    """Verifica se o limite é aplicado durante a cópia e o arquivo parcial é removido."""
+    with pytest.raises(UploadTooLargeError) as exc_info:
+        asyncio.run(save_upload(_upload(b"x" * 100), directory=str(tmp_path), max_bytes=10, chunk_size=4, spool_size=0))
+    assert exc_info.value.max_bytes == 10
+    assert os.listdir(tmp_path) == []
+
+def test_save_upload_rejects_declared_size_before_copying(tmp_path):
+    """Verifica se o tamanho informado pelo parser multipart é recusado antes de criar o arquivo."""
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(_upload(b"x", size=11), directory=str(tmp_path / "novo"), max_bytes=10))
+    assert not (tmp_path / "novo").exists()
+
+def test_save_upload_rejects_empty_file(tmp_path):
+    with pytest.raises(ValueError, match="O arquivo enviado está vazio."):
+        asyncio.run(save_upload(_upload(b""), directory=str(tmp_path)))
+    assert os.listdir(tmp_path) == []
+
+def _zip_upload(entries: dict) -> StoredUpload:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    data = buffer.getvalue()
+    return StoredUpload(file_name="lote.zip", size=len(data), content_hash=hashlib.sha256(data).hexdigest(), data=data)
+
+def test_extract_zip_entries_spools_and_skips_metadata(tmp_path):
+    """Verifica se as entradas são extraídas com digest, em memória ou em disco conforme o tamanho."""
+    small, large = b"solid a\n", b"solid b\n" * 50
+    upload = _zip_upload({"placa/a.stl": small, "b.obj": large, "__MACOSX/._a.stl": b"x", "placa/": b""})
+
+    entries = extract_zip_entries(upload, directory=str(tmp_path), chunk_size=16, spool_size=100)
+
+    assert [entry.file_name for entry in entries] == ["a.stl", "b.obj"]
+    assert entries[0].data == small
+    assert entries[0].content_hash == hashlib.sha256(small).hexdigest()
+    assert entries[1].data is None
+    with open(entries[1].path, "rb") as f:
+        assert f.read() == large
+    assert entries[1].path.endswith(".obj")
+
+def test_extract_zip_entries_enforces_limits_and_cleans_up(tmp_path):
+    """Verifica se os limites valem sobre os bytes descompactados e as entradas já extraídas são removidas."""
+    upload = _zip_upload({"a.stl": b"a" * 40, "b.stl": b"b" * 40})
+
+    with pytest.raises(UploadTooLargeError):
+        extract_zip_entries(upload, directory=str(tmp_path), max_total_bytes=60, spool_size=0)
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(ValueError, match="limite de 1 arquivos"):
+        extract_zip_entries(upload, directory=str(tmp_path), max_entries=1)
+
+def test_extract_zip_entries_rejects_invalid_archive(tmp_path):
+    upload = StoredUpload(file_name="lote.zip", size=4, content_hash="", data=b"nada")
+    with pytest.raises(ValueError, match="zip enviado é inválido"):
+        extract_zip_entries(upload, directory=str(tmp_path))
+
+def test_save_upload_records_receive_and_write_timings(tmp_path):
+    stored = asyncio.run(save_upload(_upload(b"solid cubo\n" * 100), directory=str(tmp_path), chunk_size=7, spool_size=50))
+
+    assert set(stored.stage_timings) == {"receive", "write"}
+    assert all(value >= 0 for value in stored.stage_timings.values())
+    stored.remove()
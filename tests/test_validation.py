@@ -0,0 +1,62 @@
+# tests/test_validation.py
+
+import struct
+import pytest
+import trimesh
+
+from printqa.validation import TooManyFacesError, check_mesh_header
+
+pytestmark = pytest.mark.unit
+
+def _binary_stl(faces: int) -> bytes:
+    return bytes(80) + struct.pack("<I", faces) + bytes(50 * faces)
+
+def test_binary_stl_with_matching_size_passes():
+    data = trimesh.creation.box().export(file_type="stl")
+    check_mesh_header(data[:4096], "stl", "caixa.stl", len(data))
+    check_mesh_header(data[:4096], "stl", "caixa.stl")
+
+def test_binary_stl_size_mismatch_is_rejected():
+    """Verifica se um STL binário truncado é recusado pela contagem de triângulos do cabeçalho."""
+    data = _binary_stl(12)[:-10]
+    with pytest.raises(ValueError, match="declara 12 triângulos \\(684 bytes\\), mas o arquivo tem 674 bytes"):
+        check_mesh_header(data[:4096], "stl", "truncado.stl", len(data))
+
+def test_binary_stl_without_triangles_is_rejected():
+    with pytest.raises(ValueError, match="não declara nenhum triângulo"):
+        check_mesh_header(_binary_stl(0), "stl", "vazio.stl", 84)
+
+def test_short_stl_is_rejected():
+    with pytest.raises(ValueError, match="STL com 10 bytes"):
+        check_mesh_header(b"x" * 10, "stl", "curto.stl", 10)
+
+def test_face_ceiling_is_checked_from_the_header():
+    """Verifica se o teto de faces é aplicado só com o cabeçalho, antes de conhecer o tamanho total."""
+    with pytest.raises(TooManyFacesError) as exc_info:
+        check_mesh_header(_binary_stl(20)[:4096], "stl", "grande.stl", max_faces=10)
+    assert (exc_info.value.faces, exc_info.value.max_faces) == (20, 10)
+    assert "acima do máximo de 10" in exc_info.value.message
+
+def test_ascii_stl_is_accepted(cube_perfect_path: str):
+    """Verifica se STL ASCII, inclusive com comentários antes de 'solid', passa pela pré-validação."""
+    with open(cube_perfect_path, "rb") as f:
+        head = f.read(4096)
+    assert head.startswith(b"#")
+    check_mesh_header(head, "stl", "cubo.stl")
+    check_mesh_header(b"solid x\nendsolid x\n", "stl", "x.stl", 19)
+
+def test_obj_sniffing():
+    data = b"# cubo\nv 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n"
+    check_mesh_header(data, "obj", "cubo.obj", len(data))
+    # Sem o tamanho total, a ausência de faces no início do arquivo não é conclusiva.
+    check_mesh_header(b"v 0 0 0\nv 1 0 0\n", "obj", "parcial.obj")
+
+    with pytest.raises(ValueError, match="não declara nenhuma face"):
+        check_mesh_header(b"v 0 0 0\nv 1 0 0\n", "obj", "sem_faces.obj", 16)
+    with pytest.raises(ValueError, match="não começa com uma instrução de OBJ"):
+        check_mesh_header(b"<html>\n</html>\n", "obj", "pagina.obj")
+    with pytest.raises(ValueError, match="não é um arquivo de texto"):
+        check_mesh_header(b"v 0\x00 0 0\n", "obj", "binario.obj")
+
+def test_other_formats_are_not_checked():
+    check_mesh_header(b"qualquer coisa", "glb", "cena.glb", 14)
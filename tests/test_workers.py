@@ -0,0 +1,86 @@
+# tests/test_workers.py
+
+import asyncio
+import os
+import time
+import pytest
+
+from printqa.analysis import analyze_file
+from printqa.workers import AnalysisExecutor, AnalysisQueueFullError, AnalysisWorkerLostError
+
+pytestmark = pytest.mark.unit
+
+def test_executor_runs_analysis_in_worker_process(cube_perfect_path: str):
+    """Verifica se a análise executada no pool de processos retorna o mesmo resultado."""
+    executor = AnalysisExecutor(max_workers=1, queue_size=0)
+    try:
+        result = asyncio.run(executor.run(analyze_file, cube_perfect_path))
+    finally:
+        executor.shutdown()
+
+    assert result["is_watertight"] is True
+    assert executor.pending == 0
+
+def test_executor_rejects_when_queue_is_full():
+    """Verifica se o executor recusa novas submissões quando não há vagas."""
+    executor = AnalysisExecutor(max_workers=1, queue_size=0, retry_after=3)
+    try:
+        future = executor.submit(time.sleep, 0.5)
+        assert executor.pending == 1
+
+        with pytest.raises(AnalysisQueueFullError) as exc_info:
+            executor.submit(time.sleep, 0)
+        assert exc_info.value.retry_after == 3
+
+        future.result()
+        # A liberação da vaga ocorre no callback da future, logo após o resultado.
+        for _ in range(50):
+            if executor.pending == 0:
+                break
+            time.sleep(0.01)
+        assert executor.pending == 0
+        executor.submit(time.sleep, 0).result()
+    finally:
+        executor.shutdown()
+
+def test_executor_recovers_from_dead_worker(cube_perfect_path: str):
+    """Verifica se a morte de um processo falha só a análise dele e se o pool é recriado para as próximas."""
+    executor = AnalysisExecutor(max_workers=1, queue_size=1, retry_after=4)
+    try:
+        with pytest.raises(AnalysisWorkerLostError) as exc_info:
+            asyncio.run(executor.run(os._exit, 1))
+        assert exc_info.value.retry_after == 4
+
+        result = asyncio.run(executor.run(analyze_file, cube_perfect_path))
+        assert result["is_watertight"] is True
+        assert executor.pending == 0
+    finally:
+        executor.shutdown()
+
+def test_executor_from_env(monkeypatch):
+    """Verifica se a configuração do executor é lida das variáveis de ambiente."""
+    monkeypatch.setenv("ANALYSIS_WORKERS", "2")
+    monkeypatch.setenv("ANALYSIS_QUEUE_SIZE", "5")
+    monkeypatch.setenv("ANALYSIS_RETRY_AFTER", "9")
+
+    executor = AnalysisExecutor.from_env()
+    try:
+        assert executor.max_workers == 2
+        assert executor.queue_size == 5
+        assert executor.retry_after == 9
+        assert executor.prewarm is True
+    finally:
+        executor.shutdown()
+
+def test_warm_up_starts_workers_without_taking_slots():
+    """Verifica se o aquecimento inicia os processos sem ocupar vagas da fila."""
+    executor = AnalysisExecutor(max_workers=2, queue_size=0, prewarm=True)
+    try:
+        futures = executor.warm_up()
+        assert len(futures) == 2
+        assert executor.pending == 0
+        for future in futures:
+            assert future.result(timeout=60) is None
+        executor.submit(time.sleep, 0).result()
+    finally:
+        executor.shutdown()
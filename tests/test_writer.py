@@ -0,0 +1,113 @@
+# tests/test_writer.py
+
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from sqlalchemy.orm import Session, sessionmaker
+from printqa import crud, schemas
+from printqa.cache import ResultCache, content_digest
+from printqa.writer import ResultWriter
+
+pytestmark = pytest.mark.unit
+
+def _analysis(index: int) -> schemas.AnalysisResultCreate:
+    return schemas.AnalysisResultCreate(
+        file_name=f"w{index}.stl", is_watertight=True, has_inverted_faces=False,
+        content_hash=content_digest(f"writer-{index}".encode())
+    )
+
+def _stored(analysis: schemas.AnalysisResultCreate, result_id: int = 1) -> schemas.AnalysisResult:
+    return schemas.AnalysisResult(**analysis.model_dump(), id=result_id, timestamp=datetime(2026, 1, 1))
+
+def _mock_cache() -> MagicMock:
+    cache = MagicMock()
+    cache.store_many.side_effect = lambda db, analyses: [_stored(analysis) for analysis in analyses]
+    return cache
+
+def _file_names(results):
+    return [result.file_name for result in results]
+
+def test_unbuffered_writer_stores_with_request_session():
+    cache = MagicMock()
+    cache.store.side_effect = lambda db, analysis: _stored(analysis, result_id=7)
+    db = MagicMock()
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=0)
+
+    result = asyncio.run(writer.store(db, _analysis(0)))
+
+    assert result.id == 7
+    cache.store.assert_called_once_with(db, _analysis(0))
+
+def test_writer_adds_db_insert_to_stage_timings():
+    """Verifica se o tempo de gravação entra nos tempos por etapa do resultado retornado."""
+    cache = MagicMock()
+    cache.store.side_effect = lambda db, analysis: _stored(analysis)
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=0)
+    analysis = _analysis(0).model_copy(update={"stage_timings": {"parse": 1.5}})
+
+    result = asyncio.run(writer.store(MagicMock(), analysis))
+
+    assert result.stage_timings["parse"] == 1.5
+    assert result.stage_timings["db_insert"] >= 0
+
+def test_buffered_writer_flushes_when_batch_is_full():
+    """Verifica se `batch_size` gravações simultâneas viram um único insert em massa."""
+    cache = _mock_cache()
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=3, batch_delay=60)
+
+    async def scenario():
+        return await asyncio.gather(*(writer.store(None, _analysis(i)) for i in range(3)))
+
+    assert _file_names(asyncio.run(scenario())) == ["w0.stl", "w1.stl", "w2.stl"]
+    assert cache.store_many.call_count == 1
+
+def test_buffered_writer_flushes_after_delay():
+    cache = _mock_cache()
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=100, batch_delay=0.01)
+
+    async def scenario():
+        results = await asyncio.gather(writer.store(None, _analysis(0)), writer.store(None, _analysis(1)))
+        return _file_names(results), writer.pending
+
+    assert asyncio.run(scenario()) == (["w0.stl", "w1.stl"], 0)
+    assert cache.store_many.call_count == 1
+
+def test_buffered_writer_propagates_errors_to_every_caller():
+    cache = MagicMock()
+    cache.store_many.side_effect = RuntimeError("banco indisponível")
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=2)
+
+    async def scenario():
+        return await asyncio.gather(
+            writer.store(None, _analysis(0)), writer.store(None, _analysis(1)), return_exceptions=True
+        )
+
+    assert [str(e) for e in asyncio.run(scenario())] == ["banco indisponível"] * 2
+
+def test_close_flushes_pending_results():
+    cache = _mock_cache()
+    writer = ResultWriter(cache, session_factory=MagicMock(), batch_size=10, batch_delay=60)
+
+    async def scenario():
+        task = asyncio.create_task(writer.store(None, _analysis(0)))
+        await asyncio.sleep(0)
+        assert writer.pending == 1
+        await writer.close()
+        return await task
+
+    assert asyncio.run(scenario()).file_name == "w0.stl"
+
+@pytest.mark.integration
+def test_buffered_writer_persists_rows(db_engine, db_session: Session):
+    """Verifica se os resultados gravados pelo buffer voltam com id e estão no banco."""
+    writer = ResultWriter(ResultCache(maxsize=8), sessionmaker(bind=db_engine), batch_size=4, batch_delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(writer.store(None, _analysis(i)) for i in range(10, 16)))
+
+    results = asyncio.run(scenario())
+
+    assert [result.file_name for result in results] == [f"w{i}.stl" for i in range(10, 16)]
+    for result in results:
+        assert crud.get_analysis_result(db=db_session, result_id=result.id).content_hash == result.content_hash